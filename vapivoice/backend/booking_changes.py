@@ -0,0 +1,111 @@
+"""
+Booking Changes - Append-only feed of booking status changes
+BookingService writes a booking_changes row in the same transaction as every
+booking it creates or whose status it changes, so the log and the bookings
+table can't disagree. Each change has an increasing seq. A consumer keeps
+the last seq it handled and resumes from there after a restart. New
+consumers start at the current end (latest()).
+
+Readers get pushes instead of polling the bookings table: follow() is an
+async iterator, and GET /api/booking-changes/stream serves the same feed as
+Server-Sent Events. Writers call notify() after their commit, which wakes
+waiting readers through a VersionTracker. Only this process's writes wake
+readers immediately. Others are picked up when the wait times out.
+"""
+
+import asyncio
+import sqlite3
+import logging
+from typing import Dict, Any, List, Optional, AsyncIterator
+
+from backend.versioning import VersionTracker
+
+logger = logging.getLogger(__name__)
+
+# Changes read per query when catching up
+CHANGE_BATCH_ROWS = 500
+
+# How long a follower waits for a notification before re-reading anyway
+IDLE_WAIT_SECONDS = 15.0
+
+CHANGE_FIELDS = ("seq", "booking_id", "booking_reference", "booking_type", "old_status", "new_status", "changed_at")
+
+INSERT_CHANGE = (
+    "INSERT INTO booking_changes (booking_id, booking_reference, booking_type, old_status, new_status, changed_at) "
+    "VALUES (?, ?, ?, ?, ?, ?)"
+)
+
+_FEED_KEY = "booking_changes"
+
+
+def create_table(cursor: sqlite3.Cursor) -> None:
+    # AUTOINCREMENT: a seq is never reused, even after the newest rows are deleted
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS booking_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            booking_id TEXT NOT NULL,
+            booking_reference TEXT NOT NULL,
+            booking_type TEXT,
+            old_status TEXT,
+            new_status TEXT NOT NULL,
+            changed_at TEXT NOT NULL
+        )
+    ''')
+
+
+class BookingChangeFeed:
+    """Reads of the booking_changes log, with wake-ups on new changes"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._versions = VersionTracker()
+
+    def notify(self) -> None:
+        """Wake followers; call after committing change rows"""
+        self._versions.bump(_FEED_KEY)
+
+    def latest(self) -> int:
+        """seq of the newest change (0 when there are none)"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM booking_changes").fetchone()[0]
+        finally:
+            conn.close()
+
+    def read(self, offset: int = 0, limit: int = CHANGE_BATCH_ROWS) -> List[Dict[str, Any]]:
+        """Changes with seq > offset, oldest first"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                f"SELECT {', '.join(CHANGE_FIELDS)} FROM booking_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                (offset, limit)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [dict(zip(CHANGE_FIELDS, row)) for row in rows]
+
+    async def poll(self, offset: int, timeout: float = IDLE_WAIT_SECONDS) -> List[Dict[str, Any]]:
+        """
+        The next changes after offset; waits up to timeout for one to be
+        committed. An empty list means nothing arrived in time.
+        """
+        # Version first: a commit landing after the read still ends the wait
+        version = self._versions.version(_FEED_KEY)
+        changes = await asyncio.to_thread(self.read, offset)
+        if changes:
+            return changes
+        await self._versions.wait_for_change(_FEED_KEY, version, timeout)
+        return await asyncio.to_thread(self.read, offset)
+
+    async def follow(self, offset: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Every change after offset, then new ones as they are committed
+        (forever; stop iterating to unsubscribe). offset=None starts at the
+        current end of the log.
+        """
+        if offset is None:
+            offset = await asyncio.to_thread(self.latest)
+        while True:
+            for change in await self.poll(offset):
+                offset = change["seq"]
+                yield change
@@ -0,0 +1,149 @@
+"""
+Booking I/O - NDJSON / CSV records for bulk booking import and export
+One record per booking, with its passengers nested. NDJSON records carry
+booking_data and passengers as JSON values. CSV rows carry them as
+JSON-encoded cells, so both formats round-trip through
+BookingService.import_bookings / export_bookings. Readers and writers work
+one record at a time, so callers control how much is held in memory.
+"""
+
+import io
+import csv
+import json
+import logging
+from typing import Dict, Any, List, Iterable, Iterator, Optional, TextIO, Tuple
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("ndjson", "csv")
+
+CONTENT_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8"
+}
+
+BOOKING_TYPES = ("flight", "hotel", "package")
+
+BOOKING_STATUSES = ("pending", "confirmed", "completed", "cancelled")
+
+# Column order of the bookings table
+BOOKING_FIELDS = (
+    "booking_id", "booking_reference", "booking_type", "customer_phone", "customer_email",
+    "item_id", "booking_data", "total_amount", "currency", "status", "created_at", "updated_at"
+)
+
+PASSENGER_FIELDS = ("first_name", "last_name", "date_of_birth", "passport_number", "nationality")
+
+CSV_FIELDS = BOOKING_FIELDS + ("passengers",)
+
+# (line number, record or None, parse error or None)
+RawRecord = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+def check_format(fmt: str) -> str:
+    fmt = (fmt or "ndjson").lower()
+    if fmt in ("jsonl", "json"):
+        fmt = "ndjson"
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+    return fmt
+
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[RawRecord]:
+    """Records of an NDJSON or CSV text stream, read lazily"""
+    if check_format(fmt) == "csv":
+        reader = csv.DictReader(stream)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Expected a JSON object"
+            continue
+        yield line_number, record, None
+
+
+def _json_value(value: Any, default: Any) -> Any:
+    """A nested value that may arrive JSON-encoded (CSV cells)"""
+    if value is None or value == "":
+        return default
+    if isinstance(value, str):
+        return json.loads(value)
+    return value
+
+
+def booking_row(record: Dict[str, Any], now: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Validated booking columns and passengers of one record; raises
+    ValueError. booking_reference / booking_id may be missing (they are
+    assigned on insert).
+    """
+    booking_type = str(record.get("booking_type") or "").lower()
+    if booking_type not in BOOKING_TYPES:
+        raise ValueError(f"booking_type must be one of: {', '.join(BOOKING_TYPES)}")
+    customer_phone = str(record.get("customer_phone") or "").strip()
+    if not customer_phone:
+        raise ValueError("customer_phone is required")
+    status = str(record.get("status") or "pending").lower()
+    if status not in BOOKING_STATUSES:
+        raise ValueError(f"status must be one of: {', '.join(BOOKING_STATUSES)}")
+    booking_data = _json_value(record.get("booking_data"), {})
+    passengers = _json_value(record.get("passengers"), [])
+    if not isinstance(booking_data, dict) or not isinstance(passengers, list):
+        raise ValueError("booking_data must be an object and passengers a list")
+    if not all(isinstance(passenger, dict) for passenger in passengers):
+        raise ValueError("passengers must be objects")
+    total_amount = record.get("total_amount")
+    row = {
+        "booking_id": str(record.get("booking_id") or "") or None,
+        "booking_reference": str(record.get("booking_reference") or "").upper() or None,
+        "booking_type": booking_type,
+        "customer_phone": customer_phone,
+        "customer_email": str(record.get("customer_email") or ""),
+        "item_id": str(record.get("item_id") or ""),
+        "booking_data": json.dumps(booking_data),
+        "total_amount": float(total_amount) if total_amount not in (None, "") else 0.0,
+        "currency": str(record.get("currency") or "INR"),
+        "status": status,
+        "created_at": str(record.get("created_at") or now),
+        "updated_at": str(record.get("updated_at") or record.get("created_at") or now)
+    }
+    return row, passengers
+
+
+def booking_record(row: Tuple, passengers: List[Tuple]) -> Dict[str, Any]:
+    """Export record for a bookings row (BOOKING_FIELDS order) and its passenger rows"""
+    record = dict(zip(BOOKING_FIELDS, row))
+    record["booking_data"] = json.loads(record["booking_data"]) if record["booking_data"] else {}
+    record["passengers"] = [dict(zip(PASSENGER_FIELDS, passenger)) for passenger in passengers]
+    return record
+
+
+def header(fmt: str) -> str:
+    """Text written before the first chunk (the CSV header row)"""
+    if check_format(fmt) != "csv":
+        return ""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(CSV_FIELDS)
+    return buffer.getvalue()
+
+
+def format_records(records: Iterable[Dict[str, Any]], fmt: str) -> str:
+    """One chunk of output for a batch of export records"""
+    if check_format(fmt) == "ndjson":
+        return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for record in records:
+        writer.writerow([
+            json.dumps(record[field], ensure_ascii=False) if field in ("booking_data", "passengers") else record[field]
+            for field in CSV_FIELDS
+        ])
+    return buffer.getvalue()
@@ -3,25 +3,192 @@ Booking Service - Manages all booking operations
 Coordinates between flight/hotel APIs and customer bookings
 """
 
+import os
+import csv
 import json
+import time
+import base64
+import binascii
+import hashlib
 import sqlite3
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable, Iterator, TextIO, Tuple
 from datetime import datetime
-import random
-import string
 from dotenv import load_dotenv
 
+from backend.metrics import SQLITE_QUERY_SECONDS, BOOKING_CACHE_LOOKUPS, timed
+from backend.seat_inventory import SeatInventory
+from backend.quotes import QuoteCache, flight_quote, hotel_quote
+from backend import references
+from backend import booking_io
+from backend.booking_io import BOOKING_FIELDS, PASSENGER_FIELDS
+from backend import booking_changes
+from backend.booking_changes import BookingChangeFeed, INSERT_CHANGE
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# How long a create_booking response is replayed for its idempotency key
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv("VAPI_IDEMPOTENCY_TTL_SECONDS", 24 * 60 * 60))
+
+# Minimum time between sweeps of expired idempotency keys
+IDEMPOTENCY_PURGE_SECONDS = 300
+
+# Rows per executemany / transaction when importing, and per query when exporting
+IMPORT_BATCH_ROWS = int(os.getenv("VAPI_IMPORT_BATCH_ROWS", "2000"))
+EXPORT_BATCH_ROWS = int(os.getenv("VAPI_EXPORT_BATCH_ROWS", "2000"))
+
+# Customer booking history page sizes
+CUSTOMER_PAGE_SIZE = 20
+MAX_CUSTOMER_PAGE_SIZE = 100
+
+# Columns of a customer booking history entry (booking_data is never read)
+CUSTOMER_BOOKING_FIELDS = ("booking_reference", "booking_type", "status", "total_amount", "currency", "created_at")
+
+# Decoded booking records kept for repeated status lookups
+BOOKING_CACHE_SIZE = int(os.getenv("VAPI_BOOKING_CACHE_SIZE", "2048"))
+
+_STATUS_FIELDS = ("booking_id", "booking_reference", "booking_type", "status", "total_amount", "currency", "booking_data", "created_at")
+_STATUS_PASSENGER_FIELDS = ("first_name", "last_name", "date_of_birth")
+
+# Required (X-Bulk-Token header) by the bulk import/export endpoints; unset disables them
+BULK_TOKEN = os.getenv("VAPI_BULK_TOKEN")
+
+# Import errors reported back (the rest are only counted)
+MAX_IMPORT_ERRORS = 100
+
+_INSERT_BOOKING = f"INSERT INTO bookings ({', '.join(BOOKING_FIELDS)}) VALUES ({', '.join('?' * len(BOOKING_FIELDS))})"
+_INSERT_PASSENGER = f"INSERT INTO passengers (booking_id, {', '.join(PASSENGER_FIELDS)}) VALUES (?{', ?' * len(PASSENGER_FIELDS)})"
+
+
+_BOOKING_CACHE_HIT = BOOKING_CACHE_LOOKUPS.labels("hit")
+_BOOKING_CACHE_MISS = BOOKING_CACHE_LOOKUPS.labels("miss")
+
+
+def _encode_cursor(created_at: str, booking_id: str) -> str:
+    """Opaque page cursor for the keyset (created_at, booking_id)"""
+    return base64.urlsafe_b64encode(json.dumps([created_at, booking_id]).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        created_at, booking_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if not isinstance(created_at, str) or not isinstance(booking_id, str):
+        raise ValueError("Invalid cursor")
+    return created_at, booking_id
+
+
+def _request_hash(*fields: Any) -> str:
+    """Fingerprint of a booking request, to catch a key reused for something else"""
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class BookingRecord:
+    """A booking as read for status lookups, with booking_data decoded once"""
+    __slots__ = _STATUS_FIELDS + ("passengers",)
+
+    def __init__(self, row: Tuple, passengers: List[Dict[str, Any]]):
+        (self.booking_id, self.booking_reference, self.booking_type, self.status,
+         self.total_amount, self.currency, booking_data, self.created_at) = row
+        self.booking_data: Dict[str, Any] = json.loads(booking_data) if booking_data else {}
+        self.passengers = passengers
+
+    def to_status(self) -> Dict[str, Any]:
+        # Fresh containers each time: the record itself stays cached
+        return {
+            "success": True,
+            "booking_reference": self.booking_reference,
+            "booking_type": self.booking_type,
+            "status": self.status,
+            "total_amount": self.total_amount,
+            "currency": self.currency,
+            "booking_details": dict(self.booking_data),
+            "passengers": [dict(passenger) for passenger in self.passengers],
+            "created_at": self.created_at
+        }
+
+
+class BookingCache:
+    """
+    LRU of BookingRecords by booking reference
+
+    invalidate() bumps a generation so a lookup that read the database
+    before a concurrent status update can't put the stale record back.
+    """
+
+    def __init__(self, max_entries: int = BOOKING_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._records: "OrderedDict[str, BookingRecord]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, *keys: str) -> Optional[BookingRecord]:
+        for key in keys:
+            record = self._records.get(key)
+            if record is not None:
+                with self._lock:
+                    # A hit makes the reference most recently used; it may
+                    # have been evicted or invalidated since the read
+                    if self._records.get(key) is record:
+                        self._records.move_to_end(key)
+                _BOOKING_CACHE_HIT.inc()
+                return record
+        _BOOKING_CACHE_MISS.inc()
+        return None
+
+    def put(self, record: BookingRecord, generation: int) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._records[record.booking_reference] = record
+            self._records.move_to_end(record.booking_reference)
+            while len(self._records) > self.max_entries:
+                self._records.popitem(last=False)
+
+    def invalidate(self, *keys: str) -> None:
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._records.pop(key, None)
+
 
 class BookingService:
     """Main booking service for flights and hotels"""
     
-    def __init__(self, db_path: str = "bookings.db"):
+    def __init__(
+        self,
+        db_path: str = "bookings.db",
+        seats: Optional[SeatInventory] = None,
+        flights: Optional[Any] = None,
+        hotels: Optional[Any] = None,
+        quotes: Optional[QuoteCache] = None
+    ):
         self.db_path = db_path
+        # Flight bookings take their seats from here when set
+        self.seats = seats
+        # Catalogues looked up by id (get_flight / get_hotel_details) and the
+        # quotes recorded when their cards were shown
+        self.flights = flights
+        self.hotels = hotels
+        self.quotes = quotes
+        self._last_purge = 0.0
+        self.cache = BookingCache()
+        # Status changes are logged with every write; readers follow them here
+        self.changes = BookingChangeFeed(db_path)
         self._init_database()
     
     def _init_database(self):
@@ -61,16 +228,71 @@ class BookingService:
             )
         ''')
         
+        # Passengers are fetched by booking (status lookups, exports)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_passengers_booking ON passengers (booking_id)")
+        
+        # Customer history pages: keyset order first, then the listed columns so
+        # pages are read from the index alone
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_bookings_customer ON bookings (
+                customer_phone, created_at, booking_id,
+                status, booking_reference, booking_type, total_amount, currency
+            )
+        ''')
+        
+        # Single-row counter behind collision-free booking references
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS booking_sequence (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                value INTEGER NOT NULL
+            )
+        ''')
+        cursor.execute("INSERT OR IGNORE INTO booking_sequence (id, value) VALUES (1, 0)")
+        
+        # Responses of keyed create_booking calls, replayed on retry until they expire
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                idempotency_key TEXT PRIMARY KEY,
+                request_hash TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        ''')
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_idempotency_expires ON idempotency_keys (expires_at)")
+        
+        # Append-only log of booking status changes (see booking_changes.py)
+        booking_changes.create_table(cursor)
+        
         conn.commit()
         conn.close()
-    
+
+    def ping(self, timeout: float = 1.0) -> float:
+        """
+        Cheap round-trip to the bookings database for health checks
+        Reads from the bookings table, so it waits on (and reports) a held
+        write lock instead of just checking the file opens.
+        Returns latency in seconds; raises sqlite3.Error on failure.
+        """
+        start = time.perf_counter()
+        conn = sqlite3.connect(self.db_path, timeout=timeout)
+        try:
+            conn.execute("SELECT 1 FROM bookings LIMIT 1").fetchall()
+        finally:
+            conn.close()
+        return time.perf_counter() - start
+
+    @timed(SQLITE_QUERY_SECONDS.labels("create_booking"))
     def create_booking(
         self,
         booking_type: str,
         item_id: str,
         customer_phone: str,
         customer_email: Optional[str] = None,
-        passenger_details: Optional[List[Dict]] = None
+        passenger_details: Optional[List[Dict]] = None,
+        hold_id: Optional[str] = None,
+        travel_date: Optional[str] = None,
+        idempotency_key: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Create a new booking
@@ -81,18 +303,31 @@ class BookingService:
             customer_phone: Customer phone number
             customer_email: Customer email
             passenger_details: List of passenger details
+            hold_id: Seat hold to confirm (flights); without one, seats
+                     for every passenger are taken directly
+            travel_date: Departure date the seats are for
+            idempotency_key: Client key for retries; a repeat within
+                             IDEMPOTENCY_TTL_SECONDS replays the first
+                             response instead of booking again
             
         Returns:
             Booking confirmation details
         """
+        request_hash = None
+        if idempotency_key:
+            request_hash = _request_hash(
+                booking_type, item_id, customer_phone, customer_email, passenger_details, hold_id, travel_date
+            )
+            replay = self._replay(idempotency_key, request_hash)
+            if replay is not None:
+                return replay
+        
+        sale = None
+        conn = None
         try:
-            # Generate booking reference
-            booking_reference = self._generate_booking_reference()
-            booking_id = f"BK_{datetime.now().strftime('%Y%m%d')}_{booking_reference}"
-            
             # Get item details and calculate amount
             if booking_type == "flight":
-                item_data = self._get_flight_booking_data(item_id)
+                item_data = self._get_flight_booking_data(item_id, travel_date)
             elif booking_type == "hotel":
                 item_data = self._get_hotel_booking_data(item_id)
             else:
@@ -108,11 +343,26 @@ class BookingService:
                 }
             
             total_amount = item_data.get("price", 0)
+            currency = item_data.get("currency", "INR")
+            
+            # Seats first: the booking is only saved once they are ours
+            if booking_type == "flight" and self.seats is not None:
+                sale = self._take_seats(item_id, travel_date, len(passenger_details or []) or 1, hold_id)
+                if not sale["success"]:
+                    return {
+                        "success": False,
+                        "error": sale["error"]
+                    }
             
             # Save booking to database
             conn = sqlite3.connect(self.db_path)
             cursor = conn.cursor()
             
+            # Reference, booking, passengers and idempotency key commit together
+            booking_reference = self._generate_booking_reference(cursor)
+            booking_id = f"BK_{datetime.now().strftime('%Y%m%d')}_{booking_reference}"
+            created_at = datetime.now().isoformat()
+            
             cursor.execute('''
                 INSERT INTO bookings (
                     booking_id, booking_reference, booking_type,
@@ -129,11 +379,12 @@ class BookingService:
                 item_id,
                 json.dumps(item_data),
                 total_amount,
-                "INR",
+                currency,
                 "pending",
-                datetime.now().isoformat(),
-                datetime.now().isoformat()
+                created_at,
+                created_at
             ))
+            cursor.execute(INSERT_CHANGE, (booking_id, booking_reference, booking_type, None, "pending", created_at))
             
             # Save passenger details if provided
             if passenger_details:
@@ -152,76 +403,144 @@ class BookingService:
                         passenger.get("nationality", "")
                     ))
             
-            conn.commit()
-            conn.close()
-            
-            # Send confirmation (SMS/Email)
-            self._send_confirmation(booking_reference, customer_phone, customer_email)
-            
-            return {
+            result = {
                 "success": True,
                 "booking_id": booking_id,
                 "booking_reference": booking_reference,
                 "booking_type": booking_type,
                 "total_amount": total_amount,
-                "currency": "INR",
+                "currency": currency,
                 "status": "pending",
+                "seats": sale["seats"] if sale else None,
                 "payment_link": f"https://mytrip.ai/pay/{booking_reference}",
                 "message": "Booking created successfully. Please complete payment."
             }
             
+            if idempotency_key:
+                now = time.time()
+                try:
+                    cursor.execute('''
+                        INSERT INTO idempotency_keys (idempotency_key, request_hash, response, created_at, expires_at)
+                        VALUES (?, ?, ?, ?, ?)
+                    ''', (idempotency_key, request_hash, json.dumps(result), now, now + IDEMPOTENCY_TTL_SECONDS))
+                except sqlite3.IntegrityError:
+                    # A concurrent request with the same key committed first: undo ours, replay theirs
+                    conn.rollback()
+                    if sale:
+                        self.seats.refund(sale["flight_id"], sale["travel_date"], sale["seats"])
+                    return self._replay(idempotency_key, request_hash) or {
+                        "success": False,
+                        "error": "Idempotency key conflict"
+                    }
+            
+            conn.commit()
+            self.changes.notify()
+            self._maybe_purge_keys()
+            
+            # Send confirmation (SMS/Email)
+            self._send_confirmation(booking_reference, customer_phone, customer_email)
+            
+            return result
+            
         except Exception as e:
+            if sale:
+                self.seats.refund(sale["flight_id"], sale["travel_date"], sale["seats"])
             return {
                 "success": False,
                 "error": str(e)
             }
+        finally:
+            if conn is not None:
+                conn.close()
     
-    def get_booking_status(self, booking_reference: str) -> Dict[str, Any]:
-        """Get booking status by reference number"""
+    def _replay(self, idempotency_key: str, request_hash: str) -> Optional[Dict[str, Any]]:
+        """Stored response for a live key; an error if the key was used for a different request"""
+        conn = sqlite3.connect(self.db_path)
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM bookings WHERE booking_reference = ?
-            ''', (booking_reference,))
-            
-            row = cursor.fetchone()
-            
-            if not row:
-                return {
-                    "success": False,
-                    "error": "Booking not found"
-                }
-            
-            # Get passenger details
-            cursor.execute('''
-                SELECT * FROM passengers WHERE booking_id = ?
-            ''', (row[0],))
-            
-            passengers = []
-            for p_row in cursor.fetchall():
-                passengers.append({
-                    "first_name": p_row[2],
-                    "last_name": p_row[3],
-                    "date_of_birth": p_row[4]
-                })
-            
+            row = conn.execute('''
+                SELECT request_hash, response FROM idempotency_keys
+                WHERE idempotency_key = ? AND expires_at > ?
+            ''', (idempotency_key, time.time())).fetchone()
+        finally:
             conn.close()
-            
-            booking_data = json.loads(row[6]) if row[6] else {}
-            
+        if row is None:
+            return None
+        if row[0] != request_hash:
             return {
-                "success": True,
-                "booking_reference": row[1],
-                "booking_type": row[2],
-                "status": row[9],
-                "total_amount": row[7],
-                "currency": row[8],
-                "booking_details": booking_data,
-                "passengers": passengers,
-                "created_at": row[10]
+                "success": False,
+                "error": "Idempotency key was already used for a different booking request",
+                "idempotency_conflict": True
             }
+        logger.info(f"Replaying booking for idempotency key {idempotency_key}")
+        return {**json.loads(row[1]), "idempotent_replay": True}
+    
+    def _maybe_purge_keys(self) -> None:
+        """Drop expired idempotency keys, at most once per IDEMPOTENCY_PURGE_SECONDS"""
+        now = time.time()
+        if now - self._last_purge < IDEMPOTENCY_PURGE_SECONDS:
+            return
+        self._last_purge = now
+        conn = sqlite3.connect(self.db_path)
+        try:
+            # Expiry-ordered index: this reads only the expired rows
+            deleted = conn.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,)).rowcount
+            conn.commit()
+        finally:
+            conn.close()
+        if deleted:
+            logger.info(f"Purged {deleted} expired idempotency keys")
+    
+    def _take_seats(self, flight_id: str, travel_date: Optional[str], seats: int, hold_id: Optional[str]) -> Dict[str, Any]:
+        """Confirm the caller's hold, or hold-and-confirm seats now"""
+        if not hold_id:
+            return self.seats.book(flight_id, travel_date, seats)
+        return self.seats.confirm(hold_id, flight_id, travel_date, seats)
+    
+    def get_booking_status(self, booking_reference: str) -> Dict[str, Any]:
+        """
+        Get booking status by reference number
+        
+        Served from the booking cache when the record was read before and its
+        status hasn't been updated since.
+        """
+        # Spoken/typed forms ("399d-bc80") match too; older random references are looked up as given
+        keys = (booking_reference, references.normalize(booking_reference) or booking_reference)
+        record = self.cache.get(*keys)
+        if record is not None:
+            return record.to_status()
+        return self._load_booking_status(keys)
+    
+    @timed(SQLITE_QUERY_SECONDS.labels("get_booking_status"))
+    def _load_booking_status(self, keys: Tuple[str, str]) -> Dict[str, Any]:
+        """Cache miss: read the booking and its passengers, then cache the record"""
+        try:
+            generation = self.cache.generation
+            conn = sqlite3.connect(self.db_path)
+            try:
+                row = conn.execute(
+                    f"SELECT {', '.join(_STATUS_FIELDS)} FROM bookings WHERE booking_reference IN (?, ?)", keys
+                ).fetchone()
+                
+                if not row:
+                    return {
+                        "success": False,
+                        "error": "Booking not found"
+                    }
+                
+                # Get passenger details
+                passengers = [
+                    dict(zip(_STATUS_PASSENGER_FIELDS, passenger))
+                    for passenger in conn.execute(
+                        f"SELECT {', '.join(_STATUS_PASSENGER_FIELDS)} FROM passengers WHERE booking_id = ? ORDER BY id",
+                        (row[0],)
+                    )
+                ]
+            finally:
+                conn.close()
+            
+            record = BookingRecord(row, passengers)
+            self.cache.put(record, generation)
+            return record.to_status()
             
         except Exception as e:
             return {
@@ -229,20 +548,53 @@ class BookingService:
                 "error": str(e)
             }
     
+    @timed(SQLITE_QUERY_SECONDS.labels("update_booking_status"))
     def update_booking_status(self, booking_reference: str, status: str) -> bool:
-        """Update booking status (pending, confirmed, completed)"""
+        """
+        Update booking status (pending, confirmed, completed); False when no
+        booking has the reference
+        
+        The change is logged to booking_changes in the same transaction
+        (unless the status is unchanged) and pushed to change-feed followers.
+        """
+        # Same reference forms as get_booking_status
+        keys = (booking_reference, references.normalize(booking_reference) or booking_reference)
         try:
             conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            try:
+                cursor = conn.cursor()
+                now = datetime.now().isoformat()
+                
+                # The write lock is taken up front so the old status can't change under us
+                cursor.execute("BEGIN IMMEDIATE")
+                row = cursor.execute('''
+                    SELECT booking_id, booking_reference, booking_type, status
+                    FROM bookings WHERE booking_reference IN (?, ?)
+                ''', keys).fetchone()
+                if row is None:
+                    conn.rollback()
+                    logger.warning(f"Status update for unknown booking {booking_reference}")
+                    return False
+                booking_id, reference, booking_type, old_status = row
+                
+                cursor.execute('''
+                    UPDATE bookings
+                    SET status = ?, updated_at = ?
+                    WHERE booking_id = ?
+                ''', (status, now, booking_id))
+                
+                changed = old_status != status
+                if changed:
+                    cursor.execute(INSERT_CHANGE, (booking_id, reference, booking_type, old_status, status, now))
+                
+                conn.commit()
+            finally:
+                conn.close()
             
-            cursor.execute('''
-                UPDATE bookings
-                SET status = ?, updated_at = ?
-                WHERE booking_reference = ?
-            ''', (status, datetime.now().isoformat(), booking_reference))
-            
-            conn.commit()
-            conn.close()
+            # After the commit, so a lookup can't re-cache the old status
+            self.cache.invalidate(reference, *keys)
+            if changed:
+                self.changes.notify()
             
             return True
             
@@ -250,64 +602,292 @@ class BookingService:
             logger.error(f"Error updating booking status: {e}")
             return False
     
-    def get_customer_bookings(self, customer_phone: str) -> List[Dict[str, Any]]:
-        """Get all bookings for a customer"""
+    @timed(SQLITE_QUERY_SECONDS.labels("get_customer_bookings"))
+    def get_customer_bookings(
+        self,
+        customer_phone: str,
+        limit: int = CUSTOMER_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        status: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        One page of a customer's bookings, newest first
+        
+        Keyset pagination on (created_at, booking_id): pass next_cursor back
+        to get the following page. Only the listed columns are read, all from
+        the idx_bookings_customer covering index, so a page costs the same
+        whether the customer has ten bookings or ten thousand.
+        
+        Returns:
+            bookings, next_cursor (None on the last page)
+        """
+        limit = max(1, min(int(limit), MAX_CUSTOMER_PAGE_SIZE))
+        query = f"SELECT {', '.join(CUSTOMER_BOOKING_FIELDS)}, booking_id FROM bookings WHERE customer_phone = ?"
+        params: List[Any] = [customer_phone]
+        if status:
+            query += " AND status = ?"
+            params.append(status)
+        if cursor:
+            try:
+                created_at, booking_id = _decode_cursor(cursor)
+            except ValueError:
+                return {
+                    "success": False,
+                    "error": "Invalid cursor"
+                }
+            query += " AND (created_at, booking_id) < (?, ?)"
+            params.extend((created_at, booking_id))
+        # One extra row says whether there is a next page
+        query += " ORDER BY created_at DESC, booking_id DESC LIMIT ?"
+        params.append(limit + 1)
+        
         try:
             conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT * FROM bookings WHERE customer_phone = ?
-                ORDER BY created_at DESC
-            ''', (customer_phone,))
-            
-            bookings = []
-            for row in cursor.fetchall():
-                bookings.append({
-                    "booking_reference": row[1],
-                    "booking_type": row[2],
-                    "status": row[9],
-                    "total_amount": row[7],
-                    "created_at": row[10]
-                })
-            
-            conn.close()
-            
-            return bookings
-            
-        except Exception as e:
+            try:
+                rows = conn.execute(query, params).fetchall()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
             logger.error(f"Error fetching customer bookings: {e}")
-            return []
-    
-    def _generate_booking_reference(self) -> str:
-        """Generate unique booking reference"""
-        return ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-    
-    def _get_flight_booking_data(self, flight_id: str) -> Optional[Dict[str, Any]]:
-        """Get flight data for booking"""
-        # In production, fetch from flight API
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            next_cursor = _encode_cursor(last[CUSTOMER_BOOKING_FIELDS.index("created_at")], last[-1])
         return {
-            "flight_id": flight_id,
-            "airline": "IndiGo",
-            "flight_number": "6E1234",
-            "route": "BLR-DXB",
-            "departure": "2025-12-10 08:30",
-            "arrival": "2025-12-10 11:45",
-            "price": 15000
+            "success": True,
+            "bookings": [dict(zip(CUSTOMER_BOOKING_FIELDS, row)) for row in page],
+            "next_cursor": next_cursor
         }
     
-    def _get_hotel_booking_data(self, hotel_id: str) -> Optional[Dict[str, Any]]:
-        """Get hotel data for booking"""
+    def import_bookings(
+        self,
+        stream: TextIO,
+        fmt: str = "ndjson",
+        batch_size: int = IMPORT_BATCH_ROWS
+    ) -> Dict[str, Any]:
+        """
+        Bulk-load bookings (with passengers) from an NDJSON or CSV text stream
+        
+        Records are read lazily and written batch_size at a time with
+        executemany, one transaction per batch, so memory stays flat however
+        long the stream is. Bookings whose booking_id or booking_reference
+        already exists are skipped, which makes re-running an import safe.
+        Invalid records are rejected (the first MAX_IMPORT_ERRORS are
+        reported with their line numbers); the rest of the file still loads.
+        
+        Returns:
+            Counts of imported, skipped and rejected records
+        """
+        fmt = booking_io.check_format(fmt)
+        start = time.perf_counter()
+        summary = {"imported": 0, "passengers": 0, "skipped": 0, "rejected": 0, "batches": 0}
+        errors: List[Dict[str, Any]] = []
+        
+        def reject(line: int, error: str) -> None:
+            summary["rejected"] += 1
+            if len(errors) < MAX_IMPORT_ERRORS:
+                errors.append({"line": line, "error": error})
+        
+        conn = sqlite3.connect(self.db_path)
+        try:
+            batch: List[tuple] = []
+            now = datetime.now().isoformat()
+            for line, record, error in booking_io.read_records(stream, fmt):
+                if error:
+                    reject(line, error)
+                    continue
+                try:
+                    row, passengers = booking_io.booking_row(record, now)
+                except (ValueError, TypeError) as e:
+                    reject(line, str(e))
+                    continue
+                batch.append((line, row, passengers))
+                if len(batch) >= batch_size:
+                    self._import_batch(conn, batch, summary, reject)
+                    batch = []
+            if batch:
+                self._import_batch(conn, batch, summary, reject)
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            logger.error(f"Booking import stopped: {e}")
+            return {"success": False, "error": str(e), **summary, "errors": errors}
+        finally:
+            conn.close()
+        
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Imported {summary['imported']} bookings ({summary['skipped']} skipped, "
+            f"{summary['rejected']} rejected) in {elapsed:.2f}s"
+        )
         return {
-            "hotel_id": hotel_id,
-            "hotel_name": "Grand Palace Hotel",
-            "location": "Dubai",
-            "check_in": "2025-12-10",
-            "check_out": "2025-12-15",
-            "nights": 5,
-            "price": 25000
+            "success": True,
+            **summary,
+            "errors": errors,
+            "seconds": round(elapsed, 3),
+            "rows_per_second": round(summary["imported"] / elapsed) if elapsed else None
         }
     
+    def _import_batch(
+        self,
+        conn: sqlite3.Connection,
+        batch: List[tuple],
+        summary: Dict[str, Any],
+        reject: Callable[[int, str], None]
+    ) -> None:
+        """
+        Insert one batch in one transaction, skipping bookings that already
+        exist. A batch the database refuses is rolled back and its records
+        are rejected; later batches still load.
+        """
+        cursor = conn.cursor()
+        try:
+            # Write lock before the duplicate check, so no other writer can
+            # insert one of these ids in between
+            cursor.execute("BEGIN IMMEDIATE")
+            added = self._insert_batch(cursor, batch)
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Booking import batch rolled back: {e}")
+            for line, _, _ in batch:
+                reject(line, f"Batch not saved: {e}")
+            return
+        if added["changes"]:
+            self.changes.notify()
+        summary["imported"] += added["bookings"]
+        summary["skipped"] += added["skipped"]
+        summary["passengers"] += added["passengers"]
+        summary["batches"] += 1
+    
+    def _insert_batch(self, cursor: sqlite3.Cursor, batch: List[tuple]) -> Dict[str, int]:
+        """Insert a batch's new bookings (caller holds the write lock); returns counts"""
+        ids = [row["booking_id"] for _, row, _ in batch if row["booking_id"]]
+        refs = [row["booking_reference"] for _, row, _ in batch if row["booking_reference"]]
+        taken = set()
+        # Chunked to stay under SQLite's bound-parameter limit
+        for column, values in (("booking_id", ids), ("booking_reference", refs)):
+            for i in range(0, len(values), 500):
+                chunk = values[i:i + 500]
+                cursor.execute(
+                    f"SELECT {column} FROM bookings WHERE {column} IN ({', '.join('?' * len(chunk))})", chunk
+                )
+                taken.update(value for (value,) in cursor.fetchall())
+        
+        bookings, passengers, changes, skipped = [], [], [], 0
+        for _, row, people in batch:
+            if row["booking_id"] in taken or row["booking_reference"] in taken:
+                skipped += 1
+                continue
+            if not row["booking_reference"]:
+                row["booking_reference"] = self._generate_booking_reference(cursor)
+            if not row["booking_id"]:
+                row["booking_id"] = f"BK_{row['created_at'][:10].replace('-', '')}_{row['booking_reference']}"
+            # Duplicates within the file: first one wins
+            taken.update((row["booking_id"], row["booking_reference"]))
+            bookings.append(tuple(row[field] for field in BOOKING_FIELDS))
+            changes.append((row["booking_id"], row["booking_reference"], row["booking_type"], None, row["status"], row["updated_at"]))
+            passengers.extend(
+                (row["booking_id"], *(str(person.get(field) or "") for field in PASSENGER_FIELDS))
+                for person in people
+            )
+        
+        cursor.executemany(_INSERT_BOOKING, bookings)
+        cursor.executemany(_INSERT_PASSENGER, passengers)
+        cursor.executemany(INSERT_CHANGE, changes)
+        # Counted by the caller once the batch commits
+        return {"bookings": len(bookings), "passengers": len(passengers), "changes": len(changes), "skipped": skipped}
+    
+    def export_bookings(
+        self,
+        fmt: str = "ndjson",
+        status: Optional[str] = None,
+        booking_type: Optional[str] = None,
+        since: Optional[str] = None,
+        batch_size: int = EXPORT_BATCH_ROWS
+    ) -> Iterator[str]:
+        """
+        Bookings (with passengers) as NDJSON or CSV text chunks, oldest first
+        
+        Pages by rowid - each batch is its own short read, so a long export
+        never holds the database against writers, and memory is one batch.
+        since filters on created_at (ISO prefix, e.g. "2025-12-01").
+        """
+        fmt = booking_io.check_format(fmt)
+        filters, params = [], []
+        for column, value in (("status", status), ("booking_type", booking_type)):
+            if value:
+                filters.append(f"{column} = ?")
+                params.append(value)
+        if since:
+            filters.append("created_at >= ?")
+            params.append(since)
+        where = "".join(f" AND {condition}" for condition in filters)
+        query = f"SELECT rowid, {', '.join(BOOKING_FIELDS)} FROM bookings WHERE rowid > ?{where} ORDER BY rowid LIMIT ?"
+        
+        yield booking_io.header(fmt)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            last = 0
+            while True:
+                rows = conn.execute(query, (last, *params, batch_size)).fetchall()
+                if not rows:
+                    break
+                last = rows[-1][0]
+                ids = [row[1] for row in rows]
+                people: Dict[str, List[tuple]] = {}
+                for i in range(0, len(ids), 500):
+                    chunk = ids[i:i + 500]
+                    for booking_id, *passenger in conn.execute(
+                        f"SELECT booking_id, {', '.join(PASSENGER_FIELDS)} FROM passengers "
+                        f"WHERE booking_id IN ({', '.join('?' * len(chunk))}) ORDER BY id",
+                        chunk
+                    ):
+                        people.setdefault(booking_id, []).append(passenger)
+                yield booking_io.format_records(
+                    (booking_io.booking_record(row[1:], people.get(row[1], [])) for row in rows), fmt
+                )
+        finally:
+            conn.close()
+    
+    def _generate_booking_reference(self, cursor: sqlite3.Cursor) -> str:
+        """
+        Next reference from the booking sequence (inside the caller's write
+        transaction, so concurrent bookings get distinct numbers)
+        """
+        while True:
+            cursor.execute("UPDATE booking_sequence SET value = value + 1 WHERE id = 1")
+            sequence = cursor.execute("SELECT value FROM booking_sequence WHERE id = 1").fetchone()[0]
+            reference = references.encode(sequence)
+            # Imported bookings may already use a reference further along the sequence
+            if cursor.execute("SELECT 1 FROM bookings WHERE booking_reference = ?", (reference,)).fetchone() is None:
+                return reference
+    
+    def _get_flight_booking_data(self, flight_id: str, travel_date: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Flight data for booking: the quote from the card the caller saw for
+        that date, else the catalogue entry for the id (None when unknown)
+        """
+        if self.quotes is not None:
+            quote = self.quotes.get("flight", flight_id, travel_date)
+            if quote is not None:
+                return quote
+        flight = self.flights.get_flight(flight_id) if self.flights is not None else None
+        return flight_quote(flight, travel_date) if flight else None
+    
+    def _get_hotel_booking_data(self, hotel_id: str) -> Optional[Dict[str, Any]]:
+        """Hotel data for booking: the shown quote, else the catalogue entry"""
+        if self.quotes is not None:
+            quote = self.quotes.get("hotel", hotel_id)
+            if quote is not None:
+                return quote
+        hotel = self.hotels.get_hotel_details(hotel_id) if self.hotels is not None else None
+        return hotel_quote(hotel) if hotel else None
+    
     def _send_confirmation(
         self,
         booking_reference: str,
@@ -336,7 +916,9 @@ class BookingService:
 
 if __name__ == "__main__":
     # Test booking service
-    service = BookingService()
+    from backend.mock_flights import MockFlightsDatabase
+    from backend.mock_hotels import MockHotelsDatabase
+    service = BookingService(flights=MockFlightsDatabase(), hotels=MockHotelsDatabase())
     
     print("Testing Booking Service...\n")
     
@@ -344,7 +926,7 @@ if __name__ == "__main__":
     print("1. Creating flight booking")
     booking = service.create_booking(
         booking_type="flight",
-        item_id="FLBLRDXB1",
+        item_id="BLR-DXB-001",
         customer_phone="+919876543210",
         customer_email="customer@example.com",
         passenger_details=[
@@ -0,0 +1,281 @@
+"""
+Call Sessions - Per-call state for concurrent Vapi calls
+Each Vapi call id gets a CallSession that owns its flight/hotel cards, the
+transcript fragments received while the call is live, and the end-of-call
+summary. Sessions are created on call.started (or on first use), marked ended
+on end-of-call-report, and expire after a TTL, so one caller starting a call
+never wipes another caller's cards.
+"""
+
+import os
+import time
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+
+from backend.versioning import VersionTracker
+
+logger = logging.getLogger(__name__)
+
+# Pseudo call id used by pollers that don't know their call id
+LATEST = "latest"
+
+CARD_KINDS = ("flight", "hotel")
+
+# Idle sessions (no call.ended seen) are dropped after this long
+SESSION_IDLE_TTL_SECONDS = int(os.getenv("SESSION_IDLE_TTL_SECONDS", 2 * 60 * 60))
+
+# Ended sessions stay around long enough for the widget/email to fetch the summary
+SESSION_ENDED_TTL_SECONDS = int(os.getenv("SESSION_ENDED_TTL_SECONDS", 30 * 60))
+
+# Hard cap on live sessions; the least recently used are evicted beyond it
+MAX_SESSIONS = int(os.getenv("MAX_CALL_SESSIONS", 10000))
+
+# Minimum time between expiry sweeps
+SWEEP_INTERVAL_SECONDS = 30
+
+
+class CallSession:
+    """State owned by a single Vapi call"""
+
+    def __init__(self, call_id: str):
+        self.call_id = call_id
+        self.status = "active"
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.ended_at: Optional[float] = None
+        self.cards: Dict[str, Dict[str, Any]] = {}
+        self.transcript: List[Dict[str, Any]] = []
+        self.summary: Optional[Dict[str, Any]] = None
+
+    def touch(self) -> None:
+        self.updated_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "call_id": self.call_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "ended_at": self.ended_at,
+            "cards": {kind: len(entry.get("cards", [])) for kind, entry in self.cards.items()},
+            "transcript_messages": len(self.transcript),
+            "has_summary": self.summary is not None
+        }
+
+
+class CallSessionStore:
+    """
+    In-memory registry of CallSessions keyed by Vapi call id
+
+    Every write bumps the matching version in `versions` so the polling
+    endpoints can serve ETags / long-polls per call:
+    ("flight"|"hotel"|"summary", call_id), plus call_id "latest" for the
+    most recent entry of each kind.
+    """
+
+    def __init__(
+        self,
+        idle_ttl: int = SESSION_IDLE_TTL_SECONDS,
+        ended_ttl: int = SESSION_ENDED_TTL_SECONDS,
+        max_sessions: int = MAX_SESSIONS,
+        versions: Optional[VersionTracker] = None
+    ):
+        self.idle_ttl = idle_ttl
+        self.ended_ttl = ended_ttl
+        self.max_sessions = max_sessions
+        self.versions = versions or VersionTracker()
+        self._sessions: Dict[str, CallSession] = {}
+        # call id whose cards a "latest" poll resolves to, per card kind
+        self._latest_cards: Dict[str, Optional[str]] = {kind: None for kind in CARD_KINDS}
+        self._latest_summary: Optional[Dict[str, Any]] = None
+        self._last_sweep = time.time()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, call_id: str) -> bool:
+        return call_id in self._sessions
+
+    # Lifecycle
+
+    def start(self, call_id: str) -> CallSession:
+        """Create a fresh session for a call (replacing any previous state for that id)"""
+        self._maybe_sweep()
+        previous = self._sessions.get(call_id)
+        session = CallSession(call_id)
+        self._sessions[call_id] = session
+
+        keys = [("flight", LATEST), ("hotel", LATEST)]
+        if previous is not None:
+            keys.extend((kind, call_id) for kind in previous.cards)
+        # "latest" pollers follow the newest call, which has no cards yet
+        for kind in CARD_KINDS:
+            self._latest_cards[kind] = call_id
+        self.versions.bump(*keys)
+
+        logger.info(f"Call session started: {call_id} ({len(self._sessions)} active)")
+        return session
+
+    def get(self, call_id: str) -> Optional[CallSession]:
+        return self._sessions.get(call_id)
+
+    def get_or_create(self, call_id: str) -> CallSession:
+        """Session for call_id, creating it when the call.started event was missed"""
+        session = self._sessions.get(call_id)
+        if session is None:
+            self._maybe_sweep()
+            session = CallSession(call_id)
+            self._sessions[call_id] = session
+        return session
+
+    def end(self, call_id: str) -> Optional[CallSession]:
+        """Mark a call as ended; its state is kept for SESSION_ENDED_TTL_SECONDS"""
+        session = self._sessions.get(call_id)
+        if session is not None and session.status != "ended":
+            session.status = "ended"
+            session.ended_at = time.time()
+            session.touch()
+        return session
+
+    def remove(self, call_id: str) -> bool:
+        """Drop a session and invalidate everything pollers may hold for it"""
+        session = self._sessions.pop(call_id, None)
+        if session is None:
+            return False
+        keys = [(kind, call_id) for kind in session.cards]
+        if session.summary is not None:
+            keys.append(("summary", call_id))
+        for kind in CARD_KINDS:
+            if self._latest_cards[kind] == call_id:
+                self._latest_cards[kind] = None
+                keys.append((kind, LATEST))
+        if keys:
+            # Wake long-pollers, then fall back to "never written"
+            self.versions.bump(*keys)
+            self.versions.forget(*keys)
+        return True
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Expire ended/idle sessions and enforce MAX_SESSIONS. Returns sessions removed."""
+        now = now or time.time()
+        self._last_sweep = now
+        expired = [
+            call_id for call_id, session in self._sessions.items()
+            if (session.ended_at is not None and now - session.ended_at > self.ended_ttl)
+            or now - session.updated_at > self.idle_ttl
+        ]
+        for call_id in expired:
+            self.remove(call_id)
+
+        overflow = len(self._sessions) - self.max_sessions
+        if overflow > 0:
+            oldest = sorted(self._sessions.values(), key=lambda s: s.updated_at)[:overflow]
+            for session in oldest:
+                self.remove(session.call_id)
+            expired.extend(s.call_id for s in oldest)
+
+        if expired:
+            logger.info(f"Expired {len(expired)} call sessions ({len(self._sessions)} remaining)")
+        return len(expired)
+
+    def _maybe_sweep(self) -> None:
+        if time.time() - self._last_sweep >= SWEEP_INTERVAL_SECONDS or len(self._sessions) > self.max_sessions:
+            self.sweep()
+
+    # Cards
+
+    def set_cards(self, call_id: str, kind: str, entry: Dict[str, Any]) -> None:
+        """Store the latest card set of a kind ("flight"/"hotel") for a call"""
+        session = self.get_or_create(call_id)
+        session.cards[kind] = entry
+        session.touch()
+        self._latest_cards[kind] = call_id
+        self.versions.bump((kind, call_id), (kind, LATEST))
+
+    def get_cards(self, call_id: str, kind: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Card entry for a call, resolving "latest" to the newest call
+
+        Returns:
+            (actual call id, cache entry) or None
+        """
+        if call_id == LATEST:
+            latest_id = self._latest_cards.get(kind)
+            session = self._sessions.get(latest_id) if latest_id else None
+            if session is None or kind not in session.cards:
+                # Fallback for pollers on an exact "latest" key (tool calls without a call id)
+                session = self._sessions.get(LATEST)
+        else:
+            session = self._sessions.get(call_id)
+        if session is None or kind not in session.cards:
+            return None
+        return session.call_id, session.cards[kind]
+
+    def clear_cards(self, call_id: Optional[str] = None) -> Dict[str, int]:
+        """
+        Clear cards for one call, or detach "latest" pollers from every call
+
+        Without a call id no session loses its cards; "latest" pollers simply
+        see nothing until the next search stores new cards.
+        """
+        cleared = {kind: 0 for kind in CARD_KINDS}
+        keys = []
+
+        # Pollers without a call id share the literal "latest" session
+        session = self._sessions.get(call_id or LATEST)
+        if session is not None:
+            for kind in session.cards:
+                cleared[kind] += 1
+                keys.append((kind, session.call_id))
+            session.cards.clear()
+
+        for kind in CARD_KINDS:
+            if call_id in (None, LATEST) or self._latest_cards[kind] == call_id:
+                self._latest_cards[kind] = None
+                keys.append((kind, LATEST))
+
+        self.versions.bump(*keys)
+        return cleared
+
+    def card_counts(self) -> Dict[str, int]:
+        """Number of calls holding cards, per kind"""
+        counts = {kind: 0 for kind in CARD_KINDS}
+        for session in self._sessions.values():
+            for kind in session.cards:
+                counts[kind] = counts.get(kind, 0) + 1
+        return counts
+
+    # Transcript and summary
+
+    def add_transcript_fragment(self, call_id: str, role: str, text: str) -> None:
+        """Append a final transcript fragment received while the call is live"""
+        session = self.get_or_create(call_id)
+        session.transcript.append({"role": role, "message": text})
+        session.touch()
+
+    def set_summary(self, call_id: Optional[str], summary: Dict[str, Any]) -> None:
+        """Store an end-of-call summary (also becomes the "latest" summary)"""
+        keys = [("summary", LATEST)]
+        if call_id:
+            session = self.get_or_create(call_id)
+            session.summary = summary
+            session.touch()
+            keys.append(("summary", call_id))
+        self._latest_summary = summary
+        self.versions.bump(*keys)
+
+    def get_summary(self, call_id: str) -> Optional[Dict[str, Any]]:
+        if call_id == LATEST:
+            return self._latest_summary
+        session = self._sessions.get(call_id)
+        return session.summary if session is not None else None
+
+    @property
+    def latest_summary(self) -> Optional[Dict[str, Any]]:
+        return self._latest_summary
+
+    def summary_count(self) -> int:
+        return sum(1 for session in self._sessions.values() if session.summary is not None)
+
+    def list_sessions(self) -> List[Dict[str, Any]]:
+        return [session.to_dict() for session in self._sessions.values()]
@@ -0,0 +1,233 @@
+"""
+Catalogue - Hot-reloadable flight and hotel snapshots
+Each catalogue holds one immutable snapshot (a database object plus a
+version number). A reload builds the replacement off the event loop from
+the data file and swaps a single reference, so a search always runs
+against one complete snapshot and never waits on a reload. Reloads are
+triggered by POST /admin/catalogue/reload or by a polling file watcher
+(VAPI_CATALOGUE_WATCH_SECONDS); search responses carry catalogue_version.
+
+Data files:
+  flights (VAPI_FLIGHT_INVENTORY): .vfi columnar inventory, .jsonl with one
+      flight per line, or .json mapping "BLR-JED" route keys to flights
+  hotels (VAPI_HOTEL_CATALOGUE): .json mapping city names to hotels
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Callable
+
+from backend.mock_flights import MockFlightsDatabase
+from backend.mock_hotels import MockHotelsDatabase
+from backend.flight_inventory import ColumnarFlightInventory, read_jsonl, FLIGHT_INVENTORY_PATH
+
+logger = logging.getLogger(__name__)
+
+HOTEL_CATALOGUE_PATH = os.getenv("VAPI_HOTEL_CATALOGUE")
+
+# Seconds between data file checks; 0 disables the watcher
+WATCH_INTERVAL_SECONDS = float(os.getenv("VAPI_CATALOGUE_WATCH_SECONDS", "0"))
+
+# The reload endpoint requires this value in X-Catalogue-Token; unset disables it
+RELOAD_TOKEN = os.getenv("VAPI_CATALOGUE_TOKEN")
+
+VERSION_FIELD = "catalogue_version"
+
+
+class CatalogueSnapshot:
+    """One immutable generation of a catalogue"""
+
+    __slots__ = ("version", "database", "source", "loaded_at", "load_ms", "file_stamp")
+
+    def __init__(self, version: int, database: Any, source: Optional[str], load_ms: float, file_stamp: Optional[tuple]):
+        self.version = version
+        self.database = database
+        self.source = source
+        self.loaded_at = time.time()
+        self.load_ms = load_ms
+        self.file_stamp = file_stamp
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "source": self.source or "built-in",
+            "database": type(self.database).__name__,
+            "loaded_at": self.loaded_at,
+            "load_ms": self.load_ms
+        }
+
+
+def _file_stamp(path: Optional[str]) -> Optional[tuple]:
+    """(mtime_ns, size) of the data file, or None when there is none"""
+    if not path:
+        return None
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class SnapshotCatalogue:
+    """
+    Holds the current snapshot and swaps in new ones
+
+    Readers take self._snapshot once per call (a single attribute read, so
+    no lock); only reloads are serialised. Attributes not defined here are
+    forwarded to the current database, so existing call sites keep working.
+    """
+
+    def __init__(self, name: str, loader: Callable[[Optional[str]], Any], path: Optional[str] = None,
+                 watch_interval: float = WATCH_INTERVAL_SECONDS):
+        self.name = name
+        self.loader = loader
+        self.path = path
+        self.last_error: Optional[str] = None
+        self._reload_lock = threading.Lock()
+        self._snapshot = self._build(1, path)
+        self._watcher: Optional[threading.Thread] = None
+        if watch_interval > 0 and path:
+            self.watch(watch_interval)
+
+    def _build(self, version: int, path: Optional[str]) -> CatalogueSnapshot:
+        stamp = _file_stamp(path)
+        start = time.perf_counter()
+        database = self.loader(path)
+        load_ms = round((time.perf_counter() - start) * 1000, 2)
+        logger.info(f"Loaded {self.name} catalogue v{version} from {path or 'built-in data'} in {load_ms}ms")
+        return CatalogueSnapshot(version, database, path, load_ms, stamp)
+
+    @property
+    def snapshot(self) -> CatalogueSnapshot:
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    def reload(self, path: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build a new snapshot (blocking - run it in a thread) and swap it in
+        On failure the current snapshot stays in place.
+        """
+        with self._reload_lock:
+            path = path or self.path
+            try:
+                snapshot = self._build(self._snapshot.version + 1, path)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                logger.error(f"Reloading {self.name} catalogue from {path} failed, keeping v{self._snapshot.version}: {e}")
+                return {"success": False, "error": self.last_error, "current": self._snapshot.to_dict()}
+            previous, self._snapshot = self._snapshot, snapshot
+            self.path = path
+            self.last_error = None
+            # The previous snapshot is freed once the last search using it returns
+            return {"success": True, "previous_version": previous.version, "current": snapshot.to_dict()}
+
+    def watch(self, interval: float) -> None:
+        """Reload whenever the data file's mtime or size changes"""
+        if self._watcher is not None:
+            return
+
+        def run() -> None:
+            seen = self._snapshot.file_stamp
+            while True:
+                time.sleep(interval)
+                stamp = _file_stamp(self.path)
+                # Compare with the last stamp tried, so a bad file is not retried every tick
+                if stamp is not None and stamp != seen:
+                    seen = stamp
+                    logger.info(f"{self.name} catalogue file changed - reloading")
+                    self.reload()
+
+        self._watcher = threading.Thread(target=run, name=f"{self.name}-catalogue-watch", daemon=True)
+        self._watcher.start()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            **self._snapshot.to_dict(),
+            "path": self.path,
+            "watching": self._watcher is not None,
+            "last_error": self.last_error
+        }
+
+    def _versioned(self, method: str, *args, **kwargs) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        result = getattr(snapshot.database, method)(*args, **kwargs)
+        if isinstance(result, dict):
+            result[VERSION_FIELD] = snapshot.version
+        return result
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr.startswith("_"):
+            raise AttributeError(attr)
+        return getattr(self._snapshot.database, attr)
+
+
+class FlightCatalogue(SnapshotCatalogue):
+    """Reloadable flight database; search_flights responses carry the version"""
+
+    def __init__(self, path: Optional[str] = FLIGHT_INVENTORY_PATH, **kwargs):
+        super().__init__("flights", load_flights, path, **kwargs)
+
+    def search_flights(self, *args, **kwargs) -> Dict[str, Any]:
+        return self._versioned("search_flights", *args, **kwargs)
+
+    def search_connections(self, *args, **kwargs) -> Dict[str, Any]:
+        return self._versioned("search_connections", *args, **kwargs)
+
+    def search_fare_calendar(self, *args, **kwargs) -> Dict[str, Any]:
+        return self._versioned("search_fare_calendar", *args, **kwargs)
+
+
+class HotelCatalogue(SnapshotCatalogue):
+    """Reloadable hotel database; search_hotels responses carry the version"""
+
+    def __init__(self, path: Optional[str] = HOTEL_CATALOGUE_PATH, **kwargs):
+        super().__init__("hotels", load_hotels, path, **kwargs)
+
+    def search_hotels(self, *args, **kwargs) -> Dict[str, Any]:
+        return self._versioned("search_hotels", *args, **kwargs)
+
+
+# Loaders
+
+def load_flights(path: Optional[str]) -> MockFlightsDatabase:
+    """Flight database for a data file (or the built-in routes), route graph and id index included"""
+    database = _open_flights(path)
+    # Built with the snapshot so the first connection, calendar search or booking doesn't pay for it
+    database.fare_calendar()
+    database.flight_index()
+    return database
+
+
+def _open_flights(path: Optional[str]) -> MockFlightsDatabase:
+    if not path:
+        return MockFlightsDatabase()
+    if path.endswith(".vfi"):
+        return ColumnarFlightInventory(path)
+    if path.endswith(".jsonl"):
+        flights_db: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for flight in read_jsonl(path):
+            flights_db[f"{flight['from']['code']}-{flight['to']['code']}"].append(flight)
+        return MockFlightsDatabase(dict(flights_db))
+    with open(path) as f:
+        flights_db = json.load(f)
+    if not isinstance(flights_db, dict):
+        raise ValueError(f"{path}: expected an object mapping route keys to flight lists")
+    return MockFlightsDatabase(flights_db)
+
+
+def load_hotels(path: Optional[str]) -> MockHotelsDatabase:
+    """Hotel database for a data file (or the built-in cities)"""
+    if not path:
+        return MockHotelsDatabase()
+    with open(path) as f:
+        hotels_data = json.load(f)
+    if not isinstance(hotels_data, dict) or not all(isinstance(v, list) for v in hotels_data.values()):
+        raise ValueError(f"{path}: expected an object mapping city names to hotel lists")
+    return MockHotelsDatabase(hotels_data)
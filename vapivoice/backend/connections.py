@@ -0,0 +1,278 @@
+"""
+Connections - One- and two-stop itineraries over the flight route graph
+The inventory's legs are indexed once per catalogue snapshot into a route
+graph: per airport, departures sorted by time of day, plus per-route minimum
+fare and flight time. A search is a time-dependent A* over (airport, arrival
+time) labels: a label only extends to departures inside the connection
+window (minimum connection time to maximum layover) on days the leg
+operates, and its lower bound is the cheapest (or shortest) way to reach the
+destination in the legs left, so itineraries come out best-first and the
+search stops after k of them.
+"""
+
+import os
+import time
+import heapq
+import bisect
+import logging
+import threading
+from datetime import date
+from typing import Dict, Any, List, Optional, Tuple, Iterable
+
+from backend.itineraries import clock_minutes, duration_minutes
+
+logger = logging.getLogger(__name__)
+
+RANK_BY = ("price", "duration")
+
+# Minimum time between landing and the next departure at a connecting airport
+MIN_CONNECTION_MINUTES = int(os.getenv("VAPI_MIN_CONNECTION_MINUTES", "60"))
+
+# Longest wait at a connecting airport
+MAX_LAYOVER_MINUTES = int(os.getenv("VAPI_MAX_LAYOVER_MINUTES", "720"))
+
+MAX_STOPS = 2
+
+# A search returns what it has after this long (voice-turn latency budget)
+SEARCH_BUDGET_MS = float(os.getenv("VAPI_CONNECTION_BUDGET_MS", "50"))
+
+# Operating days bitmask (Mon..Sun); legs without one fly daily
+ALL_DAYS = 0x7F
+
+DAY_MINUTES = 24 * 60
+
+# Leg tuple handed to RouteGraph: origin, destination, departure minute of
+# day, flight minutes, fare, operating days, and a reference the database
+# turns back into the flight dict
+Leg = Tuple[str, str, int, int, float, int, Any]
+
+
+def flight_leg(flight: Dict[str, Any], ref: Any) -> Leg:
+    """Graph leg for a flight dict (the MockFlightsDatabase shape)"""
+    departure = clock_minutes(flight["from"]["time"])
+    flown = duration_minutes(flight.get("duration", ""))
+    if not flown:
+        flown = (clock_minutes(flight["to"]["time"]) - departure) % DAY_MINUTES
+    return (
+        flight["from"]["code"], flight["to"]["code"], departure, flown,
+        float(flight.get("price") or 0), int(flight.get("days", ALL_DAYS)), ref
+    )
+
+
+class RouteGraph:
+    """
+    Adjacency lists over all legs of one flight inventory
+
+    Built once (O(legs log legs)) and then read-only, so concurrent searches
+    need no locking. Lower-bound tables per destination are computed on
+    first use and cached.
+    """
+
+    def __init__(self, legs: Iterable[Leg]):
+        start = time.perf_counter()
+        self.airports: Dict[str, int] = {}
+        by_route: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        self.dest: List[int] = []
+        self.flown: List[int] = []
+        self.price: List[float] = []
+        self.days: List[int] = []
+        self.refs: List[Any] = []
+        # (origin, dest) -> [min fare, min flight minutes]
+        self.route_min: Dict[Tuple[int, int], List[float]] = {}
+
+        for origin, dest, departure, flown, price, days, ref in legs:
+            a, b = self._airport(origin), self._airport(dest)
+            edge = len(self.refs)
+            self.dest.append(b)
+            self.flown.append(flown)
+            self.price.append(price)
+            self.days.append(days)
+            self.refs.append(ref)
+            by_route.setdefault((a, b), []).append((departure, edge))
+            best = self.route_min.get((a, b))
+            if best is None:
+                self.route_min[(a, b)] = [price, flown]
+            else:
+                best[0] = min(best[0], price)
+                best[1] = min(best[1], flown)
+
+        # Per airport and next airport: departures sorted by time (for bisect)
+        # and the matching edge ids, so the last leg only scans routes into
+        # the destination
+        self.out_routes: List[Dict[int, Tuple[List[int], List[int]]]] = [{} for _ in self.airports]
+        # Per airport: (origin, min fare, min flight minutes) of routes into it
+        self.into: List[List[Tuple[int, float, int]]] = [[] for _ in self.airports]
+        for (a, b), edges in by_route.items():
+            edges.sort()
+            self.out_routes[a][b] = ([departure for departure, _ in edges], [edge for _, edge in edges])
+            self.into[b].append((a, *self.route_min[(a, b)]))
+        self.codes = list(self.airports)
+
+        self._bounds: Dict[Tuple[int, str, int, int], List[Dict[int, float]]] = {}
+        self._bounds_lock = threading.Lock()
+        self.build_ms = round((time.perf_counter() - start) * 1000, 2)
+        logger.info(f"Route graph built: {len(self.refs)} legs, {len(self.airports)} airports, {len(self.route_min)} routes in {self.build_ms}ms")
+
+    def _airport(self, code: str) -> int:
+        index = self.airports.get(code)
+        if index is None:
+            index = self.airports[code] = len(self.airports)
+        return index
+
+    def stats(self) -> Dict[str, Any]:
+        return {"legs": len(self.refs), "airports": len(self.airports), "routes": len(self.route_min), "build_ms": self.build_ms}
+
+    def _lower_bounds(self, target: int, rank_by: str, max_legs: int, connection: int) -> List[Dict[int, float]]:
+        """
+        bounds[r][airport]: least cost from landing at airport to target using
+        at most r more legs (fare, or flight plus minimum connection minutes);
+        airports missing from bounds[r] cannot reach target in r legs
+        """
+        key = (target, rank_by, max_legs, connection)
+        bounds = self._bounds.get(key)
+        if bounds is not None:
+            return bounds
+        by_price = rank_by == "price"
+        into = self.into
+        bounds = [{target: 0.0}]
+        for _ in range(max_legs):
+            previous = bounds[-1]
+            current = dict(previous)
+            get = current.get
+            for b, cost in previous.items():
+                for a, price, flown in into[b]:
+                    candidate = (price if by_price else flown + connection) + cost
+                    if candidate < get(a, candidate + 1):
+                        current[a] = candidate
+            bounds.append(current)
+        with self._bounds_lock:
+            self._bounds[key] = bounds
+        return bounds
+
+    def search(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: Optional[str] = None,
+        k: int = 5,
+        max_stops: int = MAX_STOPS,
+        rank_by: str = "price",
+        min_connection_minutes: int = MIN_CONNECTION_MINUTES,
+        max_layover_minutes: int = MAX_LAYOVER_MINUTES,
+        budget_ms: float = SEARCH_BUDGET_MS
+    ) -> Dict[str, Any]:
+        """
+        Best k itineraries of 1..max_stops + 1 legs departing on departure_date
+
+        Returns {"itineraries": [{"legs": [ref, ...], "departure", "arrival",
+        "price", "flight_minutes", "layovers": [(airport, minutes)]}], ...}
+        with departure/arrival in minutes after midnight of departure_date.
+        """
+        if rank_by not in RANK_BY:
+            raise ValueError(f"rank_by must be one of {RANK_BY}")
+        started = time.perf_counter()
+        deadline = started + budget_ms / 1000
+        source, target = self.airports.get(origin), self.airports.get(destination)
+        result: Dict[str, Any] = {"itineraries": [], "rank_by": rank_by, "labels": 0, "truncated": False}
+        if source is None or target is None or source == target or k <= 0:
+            return result
+
+        max_legs = max(0, min(max_stops, MAX_STOPS)) + 1
+        # bounds[r] covers the legs after the one being taken, so r < max_legs
+        bounds = self._lower_bounds(target, rank_by, max_legs - 1, min_connection_minutes)
+        if not any(nxt in bounds[-1] for nxt in self.out_routes[source]):
+            return result
+        weekday = None
+        if departure_date:
+            try:
+                weekday = date.fromisoformat(departure_date).weekday()
+            except ValueError:
+                pass
+        by_price = rank_by == "price"
+
+        # Label: (estimate, cost, tiebreak, airport, arrival, legs as (edge, departure))
+        frontier: List[Tuple[float, float, int, int, int, Tuple[Tuple[int, int], ...]]] = []
+        counter = 0
+        # Costs of the k best complete itineraries generated so far (negated,
+        # a max-heap): nothing costing more than the worst of them can place
+        complete: List[float] = []
+        cutoff = float("inf")
+
+        def extend(cost: float, airport: int, ready_at: int, latest: int, legs: Tuple[Tuple[int, int], ...]) -> None:
+            nonlocal counter, cutoff
+            remaining = max_legs - len(legs) - 1
+            routes = self.out_routes[airport]
+            if remaining == 0:
+                routes = {target: routes[target]} if target in routes else {}
+            reachable = bounds[remaining]
+            visited = {source, airport}.union(self.dest[edge] for edge, _ in legs)
+            first = legs[0][1] if legs else None
+            first_day, last_day = ready_at // DAY_MINUTES, latest // DAY_MINUTES
+            for nxt, (departures, edges) in routes.items():
+                bound = reachable.get(nxt)
+                if bound is None or nxt in visited:
+                    continue
+                # Duration only grows with the departure time, so a route's
+                # later departures can be cut off as a block
+                earliest_arrival = bound + self.route_min[(airport, nxt)][1] - (0 if first is None else first)
+                for day in range(first_day, last_day + 1):
+                    offset = day * DAY_MINUTES
+                    bit = 1 << ((weekday + day) % 7) if weekday is not None else ALL_DAYS
+                    low = bisect.bisect_left(departures, ready_at - offset) if day == first_day else 0
+                    high = bisect.bisect_right(departures, latest - offset) if day == last_day else len(departures)
+                    for position in range(low, high):
+                        departure = offset + departures[position]
+                        if not by_price and first is not None and departure + earliest_arrival > cutoff:
+                            break
+                        edge = edges[position]
+                        if not self.days[edge] & bit:
+                            continue
+                        arrival = departure + self.flown[edge]
+                        new_cost = cost + self.price[edge] if by_price else arrival - (departure if first is None else first)
+                        estimate = new_cost + bound
+                        if estimate > cutoff:
+                            continue
+                        if nxt == target:
+                            heapq.heappush(complete, -new_cost)
+                            if len(complete) > k:
+                                heapq.heappop(complete)
+                            if len(complete) == k:
+                                cutoff = -complete[0]
+                        counter += 1
+                        heapq.heappush(frontier, (estimate, new_cost, counter, nxt, arrival, legs + ((edge, departure),)))
+
+        extend(0.0, source, 0, DAY_MINUTES - 1, ())
+        itineraries = result["itineraries"]
+        popped = 0
+        while frontier and len(itineraries) < k:
+            popped += 1
+            if not popped & 15 and time.perf_counter() > deadline:
+                result["truncated"] = True
+                break
+            _, cost, _, airport, arrival, legs = heapq.heappop(frontier)
+            if airport == target:
+                itineraries.append(self._itinerary(legs))
+                continue
+            if len(legs) < max_legs:
+                extend(cost, airport, arrival + min_connection_minutes, arrival + max_layover_minutes, legs)
+
+        result["labels"] = counter
+        result["search_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        if result["truncated"]:
+            logger.warning(f"Connection search {origin}-{destination} hit the {budget_ms}ms budget after {counter} labels")
+        return result
+
+    def _itinerary(self, legs: Tuple[Tuple[int, int], ...]) -> Dict[str, Any]:
+        times = [(departure, departure + self.flown[edge]) for edge, departure in legs]
+        return {
+            "legs": [self.refs[edge] for edge, _ in legs],
+            "times": times,
+            "departure": times[0][0],
+            "arrival": times[-1][1],
+            "price": sum(self.price[edge] for edge, _ in legs),
+            "flight_minutes": sum(self.flown[edge] for edge, _ in legs),
+            "layovers": [
+                (self.codes[self.dest[legs[i][0]]], times[i + 1][0] - times[i][1])
+                for i in range(len(legs) - 1)
+            ]
+        }
@@ -0,0 +1,295 @@
+"""
+Date Parser - Resolves spoken travel dates to ISO dates
+Handles the formats callers actually use on Vapi calls ("December fifteenth",
+"next Friday", "20251228", "15/03/2025") relative to a reference date
+"""
+
+import re
+import logging
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+MONTHS = {
+    'january': 1, 'jan': 1,
+    'february': 2, 'feb': 2,
+    'march': 3, 'mar': 3,
+    'april': 4, 'apr': 4,
+    'may': 5,
+    'june': 6, 'jun': 6,
+    'july': 7, 'jul': 7,
+    'august': 8, 'aug': 8,
+    'september': 9, 'sept': 9, 'sep': 9,
+    'october': 10, 'oct': 10,
+    'november': 11, 'nov': 11,
+    'december': 12, 'dec': 12
+}
+
+WEEKDAYS = {
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6
+}
+
+_UNITS = [
+    'one', 'two', 'three', 'four', 'five', 'six', 'seven', 'eight', 'nine'
+]
+_UNIT_ORDINALS = [
+    'first', 'second', 'third', 'fourth', 'fifth', 'sixth', 'seventh', 'eighth', 'ninth'
+]
+_TEENS = [
+    'ten', 'eleven', 'twelve', 'thirteen', 'fourteen', 'fifteen', 'sixteen',
+    'seventeen', 'eighteen', 'nineteen'
+]
+_TEEN_ORDINALS = [
+    'tenth', 'eleventh', 'twelfth', 'thirteenth', 'fourteenth', 'fifteenth',
+    'sixteenth', 'seventeenth', 'eighteenth', 'nineteenth'
+]
+
+
+def _build_day_words() -> Tuple[dict, dict]:
+    """Build word -> day-of-month tables for cardinals and ordinals (1-31)"""
+    cardinals = {}
+    ordinals = {}
+    for i, (card, ordn) in enumerate(zip(_UNITS, _UNIT_ORDINALS), start=1):
+        cardinals[card] = i
+        ordinals[ordn] = i
+    for i, (card, ordn) in enumerate(zip(_TEENS, _TEEN_ORDINALS), start=10):
+        cardinals[card] = i
+        ordinals[ordn] = i
+    cardinals['twenty'] = 20
+    ordinals['twentieth'] = 20
+    cardinals['thirty'] = 30
+    ordinals['thirtieth'] = 30
+    for i in range(9):
+        for sep in ('-', ' '):
+            cardinals[f"twenty{sep}{_UNITS[i]}"] = 21 + i
+            ordinals[f"twenty{sep}{_UNIT_ORDINALS[i]}"] = 21 + i
+    for sep in ('-', ' '):
+        cardinals[f"thirty{sep}one"] = 31
+        ordinals[f"thirty{sep}first"] = 31
+    return cardinals, ordinals
+
+
+DAY_CARDINALS, DAY_ORDINALS = _build_day_words()
+DAY_WORDS = {**DAY_CARDINALS, **DAY_ORDINALS}
+
+SMALL_NUMBERS = {'a': 1, 'an': 1, **{word: i for i, word in enumerate(_UNITS, start=1)}}
+
+
+def _alternation(words) -> str:
+    """Regex alternation with longest words first so prefixes never win"""
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+_MONTH = rf"(?:{_alternation(MONTHS)})"
+_WEEKDAY = rf"(?:{_alternation(WEEKDAYS)})"
+_ORDINAL_WORD = rf"(?:{_alternation(DAY_ORDINALS)})"
+_ANY_DAY_WORD = rf"(?:{_alternation(DAY_WORDS)})"
+_DAY_DIGITS = r"(?:[0-3]?\d(?:st|nd|rd|th)?)"
+_YEAR = r"(?:(?:19|20)\d{2})"
+
+# One compiled scanner shared by single-utterance resolution and transcript
+# scanning. Alternatives are ordered so the more specific forms win when two
+# could start at the same position (ISO before day/month numeric, etc.)
+_DATE_RE = re.compile(
+    rf"""
+    \b(?:
+        (?P<iso_y>{_YEAR})[-/.](?P<iso_m>\d{{1,2}})[-/.](?P<iso_d>\d{{1,2}})
+      | (?P<c_y>{_YEAR})(?P<c_m>0[1-9]|1[0-2])(?P<c_d>0[1-9]|[12]\d|3[01])
+      | (?P<n_a>\d{{1,2}})[/.-](?P<n_b>\d{{1,2}})[/.-](?P<n_y>\d{{4}}|\d{{2}})
+      | (?P<md_m>{_MONTH})\.?\s+(?:the\s+)?(?P<md_d>{_DAY_DIGITS}|{_ANY_DAY_WORD})
+            (?:\s*,?\s*(?P<md_y>{_YEAR}))?
+      | (?:the\s+)?(?P<dm_d>{_DAY_DIGITS}|{_ORDINAL_WORD})\s+(?:of\s+)?(?P<dm_m>{_MONTH})
+            (?:\s*,?\s*(?P<dm_y>{_YEAR}))?
+      | (?P<rel>day\s+after\s+tomorrow|tomorrow|today|tonight)
+      | (?:(?P<wd_mod>next|this|coming)\s+)?(?P<wd>{_WEEKDAY})
+      | in\s+(?P<in_n>\d{{1,3}}|a|an|{_alternation(_UNITS)})\s+(?P<in_u>days?|weeks?)
+      | (?P<nw>next\s+week)
+    )\b
+    """,
+    re.IGNORECASE | re.VERBOSE
+)
+
+_DIGITS_RE = re.compile(r"\d+")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _upcoming(reference: date, month: int, day: int) -> Optional[date]:
+    """First occurrence of month/day on or after the reference date"""
+    for year in range(reference.year, reference.year + 5):
+        try:
+            candidate = date(year, month, day)
+        except ValueError:
+            # Feb 29 outside a leap year - try the next one
+            continue
+        if candidate >= reference:
+            return candidate
+    return None
+
+
+def _day_value(token: str) -> Optional[int]:
+    """Day-of-month from '15', '15th' or 'fifteenth'"""
+    token = token.lower()
+    if token[0].isdigit():
+        return int(_DIGITS_RE.match(token).group(0))
+    return DAY_WORDS.get(_WHITESPACE_RE.sub(" ", token))
+
+
+def _calendar_date(year: Optional[str], month: int, day: Optional[int], reference: date) -> Optional[date]:
+    if not day:
+        return None
+    if year:
+        try:
+            return date(int(year), month, day)
+        except ValueError:
+            return None
+    return _upcoming(reference, month, day)
+
+
+def _resolve_match(match: "re.Match", reference: date) -> Optional[date]:
+    """Turn one scanner match into a calendar date"""
+    groups = match.groupdict()
+    try:
+        if groups['iso_y']:
+            return date(int(groups['iso_y']), int(groups['iso_m']), int(groups['iso_d']))
+
+        if groups['c_y']:
+            return date(int(groups['c_y']), int(groups['c_m']), int(groups['c_d']))
+
+        if groups['n_a']:
+            first, second = int(groups['n_a']), int(groups['n_b'])
+            year = int(groups['n_y'])
+            if year < 100:
+                year += 2000
+            # Day-first unless that cannot be a valid month/day
+            if first <= 12 < second:
+                day, month = second, first
+            else:
+                day, month = first, second
+            return date(year, month, day)
+
+        if groups['md_m']:
+            return _calendar_date(
+                groups['md_y'], MONTHS[groups['md_m'].lower()], _day_value(groups['md_d']), reference
+            )
+
+        if groups['dm_m']:
+            return _calendar_date(
+                groups['dm_y'], MONTHS[groups['dm_m'].lower()], _day_value(groups['dm_d']), reference
+            )
+    except ValueError:
+        return None
+
+    if groups['rel']:
+        rel = _WHITESPACE_RE.sub(" ", groups['rel'].lower())
+        if rel == "tomorrow":
+            return reference + timedelta(days=1)
+        if rel == "day after tomorrow":
+            return reference + timedelta(days=2)
+        return reference
+
+    if groups['wd']:
+        # "Friday", "this Friday", "next Friday" and "coming Friday" all mean the
+        # upcoming one - never today, never more than a week out
+        days_ahead = (WEEKDAYS[groups['wd'].lower()] - reference.weekday()) % 7 or 7
+        return reference + timedelta(days=days_ahead)
+
+    if groups['in_n']:
+        amount = groups['in_n'].lower()
+        count = int(amount) if amount.isdigit() else SMALL_NUMBERS.get(amount, 1)
+        if groups['in_u'].lower().startswith("week"):
+            count *= 7
+        return reference + timedelta(days=count)
+
+    if groups['nw']:
+        return reference + timedelta(days=7)
+
+    return None
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text.strip().lower())
+
+
+@lru_cache(maxsize=4096)
+def _resolve_cached(text: str, reference_ordinal: int) -> Optional[str]:
+    match = _DATE_RE.search(text)
+    if not match:
+        return None
+    resolved = _resolve_match(match, date.fromordinal(reference_ordinal))
+    return resolved.isoformat() if resolved else None
+
+
+def resolve_spoken_date(text: Optional[str], reference: Optional[date] = None) -> Optional[str]:
+    """
+    Resolve a single spoken or typed date to an ISO date string
+
+    Args:
+        text: The utterance, e.g. "December fifteenth", "next Friday", "20251228"
+        reference: Date that relative expressions and missing years are
+                   resolved against (defaults to today)
+
+    Returns:
+        "YYYY-MM-DD", or None if no date could be recognised
+    """
+    if not text:
+        return None
+    reference = reference or date.today()
+    return _resolve_cached(_normalize(text), reference.toordinal())
+
+
+def find_spoken_dates(
+    text: str,
+    reference: Optional[date] = None,
+    strict: bool = True
+) -> List[Tuple[str, str]]:
+    """
+    Find every date mentioned in a block of conversation text
+
+    Args:
+        text: Transcript text to scan
+        reference: Date relative expressions are resolved against (defaults to today)
+        strict: Skip ambiguous small-talk forms ("today", a bare "Friday") that
+                show up in greetings far more often than in travel requests
+
+    Returns:
+        List of (matched text, ISO date) tuples in order of appearance
+    """
+    if not text:
+        return []
+    reference = reference or date.today()
+    reference_ordinal = reference.toordinal()
+
+    found = []
+    for match in _DATE_RE.finditer(text):
+        if strict:
+            rel = match.group('rel')
+            if rel and rel.lower() in ("today", "tonight"):
+                continue
+            if match.group('wd') and not match.group('wd_mod'):
+                continue
+        raw = match.group(0)
+        resolved = _resolve_cached(_normalize(raw), reference_ordinal)
+        if resolved:
+            found.append((raw, resolved))
+    return found
+
+
+def cache_info():
+    """Hit/miss statistics of the resolution memo"""
+    return _resolve_cached.cache_info()
+
+
+def clear_cache() -> None:
+    """Drop all memoised resolutions"""
+    _resolve_cached.cache_clear()
+
+
+if __name__ == "__main__":
+    today = date.today()
+    for sample in ["December fifteenth", "next Friday", "20251228", "15/03/2025",
+                   "the 3rd of March", "jan 15", "tomorrow", "in two weeks"]:
+        print(f"{sample!r:>24} -> {resolve_spoken_date(sample, today)}")
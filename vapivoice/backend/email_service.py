@@ -3,8 +3,10 @@ Email Service - Send emails using SMTP
 """
 
 import os
+import time
 import logging
 import smtplib
+import threading
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Optional, List, Dict
@@ -18,8 +20,49 @@ try:
 except ImportError:
     pass
 
+from backend.metrics import SMTP_SEND_SECONDS, SMTP_SENDS
+from backend.tracing import tracer
+from backend.lifecycle import LazyService
+
 logger = logging.getLogger(__name__)
 
+# Bound once so recording a send is just an increment
+_SMTP_SENT = SMTP_SENDS.labels("sent")
+_SMTP_NOT_CONFIGURED = SMTP_SENDS.labels("not_configured")
+_SMTP_AUTH_FAILED = SMTP_SENDS.labels("auth_error")
+_SMTP_FAILED = SMTP_SENDS.labels("smtp_error")
+_SMTP_ERROR = SMTP_SENDS.labels("error")
+
+# Background delivery state for health checks: emails queued but not yet
+# attempted, and the outcome of the most recent attempt
+_delivery_lock = threading.Lock()
+_delivery: Dict = {"pending": 0, "last_result": None, "last_result_at": None, "consecutive_failures": 0}
+
+
+def email_enqueued() -> None:
+    """Call when an email send is scheduled as a background task"""
+    with _delivery_lock:
+        _delivery["pending"] += 1
+
+
+def email_dequeued() -> None:
+    """Call when a scheduled email send has finished (either way)"""
+    with _delivery_lock:
+        _delivery["pending"] = max(0, _delivery["pending"] - 1)
+
+
+def _record_delivery(result: str) -> None:
+    with _delivery_lock:
+        _delivery["last_result"] = result
+        _delivery["last_result_at"] = time.time()
+        _delivery["consecutive_failures"] = 0 if result == "sent" else _delivery["consecutive_failures"] + 1
+
+
+def delivery_status() -> Dict:
+    """Snapshot of pending emails and the last SMTP result"""
+    with _delivery_lock:
+        return dict(_delivery)
+
 
 class EmailService:
     """Service for sending emails via SMTP"""
@@ -43,6 +86,7 @@ class EmailService:
             logger.warning("SMTP_PASSWORD not configured - emails will not be sent!")
     
     
+    @tracer.traced("smtp.send")
     def send_email(
         self,
         to_email: str,
@@ -62,9 +106,12 @@ class EmailService:
         Returns:
             bool: True if sent successfully
         """
+        start = time.perf_counter()
         try:
             if not self.smtp_password:
                 logger.error(" SMTP_PASSWORD not configured")
+                _SMTP_NOT_CONFIGURED.inc()
+                _record_delivery("not_configured")
                 return False
             
             # Create message
@@ -95,6 +142,9 @@ class EmailService:
                 server.send_message(msg)
                 
                 logger.info(f" Email sent successfully to {to_email}")
+                SMTP_SEND_SECONDS.observe(time.perf_counter() - start)
+                _SMTP_SENT.inc()
+                _record_delivery("sent")
                 return True
         
         except smtplib.SMTPAuthenticationError as e:
@@ -102,13 +152,22 @@ class EmailService:
             logger.error(f"SMTP Username: {self.smtp_username}")
             logger.error(f"SMTP Host: {self.smtp_host}:{self.smtp_port}")
             logger.error(f"SMTP Password configured: {'Yes' if self.smtp_password else 'No'}")
+            SMTP_SEND_SECONDS.observe(time.perf_counter() - start)
+            _SMTP_AUTH_FAILED.inc()
+            _record_delivery("auth_error")
             return False
         except smtplib.SMTPException as e:
             logger.error(f"SMTP error: {e}", exc_info=True)
+            SMTP_SEND_SECONDS.observe(time.perf_counter() - start)
+            _SMTP_FAILED.inc()
+            _record_delivery("smtp_error")
             return False
         except Exception as e:
             logger.error(f"Error sending email: {e}", exc_info=True)
             logger.error(f"Error type: {type(e).__name__}")
+            SMTP_SEND_SECONDS.observe(time.perf_counter() - start)
+            _SMTP_ERROR.inc()
+            _record_delivery("error")
             return False
     
     
@@ -665,6 +724,6 @@ class EmailService:
         return html
 
 
-# Create global instance
-smtp_email_service = EmailService()
+# Create global instance (built on first use or at warm-up)
+smtp_email_service = LazyService("smtp_email_service", EmailService)
 
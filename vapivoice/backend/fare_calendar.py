@@ -0,0 +1,184 @@
+"""
+Fare Calendar - Lowest fare per day over a date range for a route
+Schedules repeat weekly (a leg flies on the days in its Mon..Sun mask), so
+the per-route per-day minimum fare is precomputed once per catalogue
+snapshot as a 7-entry array indexed by weekday. A range query tiles that
+week and takes one slice, whatever the range length. Routes without direct
+flights are priced from the cheapest connection on each weekday, computed
+once and kept with the calendar.
+"""
+
+import os
+import re
+import calendar
+import logging
+import threading
+from array import array
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from backend.connections import RouteGraph
+from backend.date_parser import resolve_spoken_date, MONTHS, DAY_WORDS
+
+logger = logging.getLogger(__name__)
+
+# Longest range one query may cover
+MAX_CALENDAR_DAYS = int(os.getenv("VAPI_FARE_CALENDAR_MAX_DAYS", "92"))
+
+# Days either side of the date for "around the 20th"
+DEFAULT_FLEX_DAYS = 3
+
+# Connection-priced routes kept per calendar
+MAX_CONNECTION_ROUTES = 4096
+
+NO_FARE = float("inf")
+
+_BARE_DAY_RE = re.compile(r"^(?:around |about |on )?(?:the )?(\d{1,2})(?:st|nd|rd|th)?$")
+
+# (fares by weekday, flights by weekday, stops of the cheapest option)
+WeekFares = Tuple[array, array, int]
+
+
+class FareCalendar:
+    """Per-route weekday fare minima over one route graph"""
+
+    def __init__(self, graph: RouteGraph):
+        self.graph = graph
+        self.routes: Dict[Tuple[int, int], WeekFares] = {}
+        for a, routes in enumerate(graph.out_routes):
+            for b, (_, edges) in routes.items():
+                # Few distinct day masks per route: reduce by mask, then spread over weekdays
+                by_mask: Dict[int, List[float]] = {}
+                for edge in edges:
+                    price = graph.price[edge]
+                    entry = by_mask.get(graph.days[edge])
+                    if entry is None:
+                        by_mask[graph.days[edge]] = [price, 1]
+                    else:
+                        entry[0] = min(entry[0], price)
+                        entry[1] += 1
+                fares = array("d", [NO_FARE] * 7)
+                counts = array("H", [0] * 7)
+                for days, (price, count) in by_mask.items():
+                    for weekday in range(7):
+                        if days >> weekday & 1:
+                            counts[weekday] += count
+                            fares[weekday] = min(fares[weekday], price)
+                self.routes[(a, b)] = (fares, counts, 0)
+        self._connections: Dict[Tuple[int, int], WeekFares] = {}
+        self._lock = threading.Lock()
+        logger.info(f"Fare calendar built for {len(self.routes)} routes")
+
+    def _connection_week(self, a: int, b: int, origin: str, destination: str) -> Optional[WeekFares]:
+        """Weekday minima from the cheapest 1-2 stop itinerary, computed once per route"""
+        key = (a, b)
+        week = self._connections.get(key)
+        if week is not None:
+            return week if week[2] >= 0 else None
+        fares = array("d", [NO_FARE] * 7)
+        counts = array("H", [0] * 7)
+        stops = -1
+        # Any reference Monday works: only the weekday matters
+        monday = date(2024, 1, 1)
+        for weekday in range(7):
+            search = self.graph.search(origin, destination, (monday + timedelta(days=weekday)).isoformat(), k=1, rank_by="price")
+            if search["itineraries"]:
+                best = search["itineraries"][0]
+                fares[weekday] = best["price"]
+                counts[weekday] = 1
+                stops = max(stops, len(best["legs"]) - 1)
+        week = (fares, counts, stops)
+        with self._lock:
+            if len(self._connections) >= MAX_CONNECTION_ROUTES:
+                self._connections.clear()
+            self._connections[key] = week
+        return week if stops >= 0 else None
+
+    def week(self, origin: str, destination: str) -> Optional[WeekFares]:
+        a, b = self.graph.airports.get(origin), self.graph.airports.get(destination)
+        if a is None or b is None or a == b:
+            return None
+        week = self.routes.get((a, b))
+        if week is not None:
+            return week
+        return self._connection_week(a, b, origin, destination)
+
+    def query(self, origin: str, destination: str, start: date, days: int) -> Optional[Tuple[List[float], List[int], int]]:
+        """
+        (fare per day, flights per day, stops) for days starting at start;
+        a day without flights has fare NO_FARE. None when the route has no
+        flights at all.
+        """
+        week = self.week(origin, destination)
+        if week is None:
+            return None
+        fares, counts, stops = week
+        offset = start.weekday()
+        repeats = (offset + days) // 7 + 1
+        return (
+            (fares * repeats)[offset:offset + days].tolist(),
+            (counts * repeats)[offset:offset + days].tolist(),
+            stops
+        )
+
+
+def _resolve_day(text: str, reference: date) -> Optional[date]:
+    """A spoken date, or a bare day of month ("the 20th") in the next month that has it"""
+    resolved = resolve_spoken_date(text, reference)
+    if resolved:
+        return date.fromisoformat(resolved)
+    spoken = " ".join(text.lower().split())
+    match = _BARE_DAY_RE.match(spoken)
+    day = int(match.group(1)) if match else DAY_WORDS.get(re.sub(r"^(?:around |about |on )?(?:the )?", "", spoken))
+    if not day:
+        return None
+    year, month = reference.year, reference.month
+    for _ in range(13):
+        if day <= calendar.monthrange(year, month)[1] and date(year, month, day) >= reference:
+            return date(year, month, day)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return None
+
+
+def calendar_window(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    month: Optional[str] = None,
+    flex_days: Optional[int] = None,
+    reference: Optional[date] = None
+) -> Tuple[date, date]:
+    """
+    Date range for a fare-calendar request
+
+    "cheapest in December" -> month="December" (the rest of the month when it
+    is the current one); "around the 20th" -> start="the 20th" with
+    flex_days either side; start/end -> that range. Spoken dates are
+    resolved like search_flights dates.
+    """
+    reference = reference or date.today()
+    if month and not start:
+        number = MONTHS.get(str(month).strip().lower())
+        if number is None:
+            raise ValueError(f"Unknown month: {month}")
+        year = reference.year if number >= reference.month else reference.year + 1
+        first = max(date(year, number, 1), reference)
+        return first, date(year, number, calendar.monthrange(year, number)[1])
+
+    if not start:
+        raise ValueError("A start date or month is required")
+    start_date = _resolve_day(str(start), reference)
+    if start_date is None:
+        raise ValueError(f"Could not understand the date: {start}")
+
+    if end:
+        end_date = _resolve_day(str(end), reference)
+        if end_date is None:
+            raise ValueError(f"Could not understand the date: {end}")
+    else:
+        flex = DEFAULT_FLEX_DAYS if flex_days is None else int(flex_days)
+        start_date, end_date = start_date - timedelta(days=flex), start_date + timedelta(days=flex)
+
+    start_date = max(start_date, reference)
+    if end_date < start_date:
+        raise ValueError("The end date is before the start date")
+    return start_date, end_date
@@ -0,0 +1,391 @@
+"""
+Flight Inventory - Columnar flight schedule read through mmap
+Flight legs are stored column by column in one binary file: fixed-width
+numeric arrays plus a string dictionary (airlines, flight numbers, codes),
+rows sorted by route with a route index for binary search. The file is
+mapped read-only, so every uvicorn worker on a host shares the same page
+cache copy instead of holding millions of dicts each; only the rows of the
+searched route are turned into dicts.
+
+Build a file from the built-in mock data or a JSON-lines export:
+    python -m backend.flight_inventory build flights.vfi --from-mock
+    python -m backend.flight_inventory build flights.vfi --from-jsonl legs.jsonl
+then start the server with VAPI_FLIGHT_INVENTORY=flights.vfi.
+"""
+
+import os
+import sys
+import json
+import mmap
+import time
+import logging
+import functools
+import threading
+from array import array
+from datetime import date
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+
+from backend.mock_flights import MockFlightsDatabase
+from backend.itineraries import clock_minutes, duration_minutes
+from backend.connections import Leg, ALL_DAYS, DAY_MINUTES
+
+logger = logging.getLogger(__name__)
+
+# Path to a built inventory file; unset means the in-memory mock database
+FLIGHT_INVENTORY_PATH = os.getenv("VAPI_FLIGHT_INVENTORY")
+
+MAGIC = b"VFLTINV1"
+FORMAT_VERSION = 1
+
+# Column name -> array typecode. Strings are uint32 indexes into the string
+# table; times and durations are minutes; days is a Mon..Sun bitmask.
+ROW_COLUMNS = (
+    ("id", "I"),
+    ("airline", "I"),
+    ("flight_number", "I"),
+    ("origin_code", "I"),
+    ("dest_code", "I"),
+    ("dep_minutes", "H"),
+    ("arr_minutes", "H"),
+    ("duration_minutes", "H"),
+    ("stops", "B"),
+    ("price", "I"),
+    ("currency", "I"),
+    ("cabin_class", "I"),
+    ("seats_available", "H"),
+    ("baggage_checked", "I"),
+    ("baggage_cabin", "I"),
+    ("days", "B"),
+)
+ROUTE_COLUMNS = (("route_key", "I"), ("route_start", "I"), ("route_end", "I"))
+
+class InventoryFormatError(ValueError):
+    """The file is not a flight inventory this version can read"""
+
+
+def _clock(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+# "HH:MM" for every minute of the day, indexed by minutes
+_CLOCK = [_clock(minutes) for minutes in range(24 * 60)]
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+# Writing
+
+def write_inventory(path: str, flights: Iterable[Dict[str, Any]], source: str = "") -> Dict[str, Any]:
+    """
+    Write flight dicts (the MockFlightsDatabase shape) as a columnar file
+
+    The file is written beside the target and renamed into place, so
+    readers never map a half-written file.
+    """
+    strings: Dict[str, int] = {}
+
+    def intern(value: Any) -> int:
+        value = str(value)
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    rows = []
+    for flight in flights:
+        origin_code = flight["from"]["code"]
+        dest_code = flight["to"]["code"]
+        baggage = flight.get("baggage") or {}
+        rows.append((
+            f"{origin_code}-{dest_code}",
+            clock_minutes(flight["from"]["time"]),
+            (
+                intern(flight["id"]),
+                intern(flight.get("airline", "")),
+                intern(flight.get("flight_number", "")),
+                intern(origin_code),
+                intern(dest_code),
+                clock_minutes(flight["from"]["time"]),
+                clock_minutes(flight["to"]["time"]),
+                duration_minutes(flight.get("duration", "")),
+                int(flight.get("stops", 0)),
+                int(round(flight.get("price", 0))),
+                intern(flight.get("currency", "INR")),
+                intern(flight.get("cabin_class", "Economy")),
+                int(flight.get("seats_available", 0)),
+                intern(baggage.get("checked", "")),
+                intern(baggage.get("cabin", "")),
+                int(flight.get("days", ALL_DAYS))
+            )
+        ))
+    rows.sort(key=lambda row: (row[0], row[1]))
+
+    columns = {name: array(typecode) for name, typecode in ROW_COLUMNS + ROUTE_COLUMNS}
+    row_names = [name for name, _ in ROW_COLUMNS]
+    for position, (route_key, _, values) in enumerate(rows):
+        for name, value in zip(row_names, values):
+            columns[name].append(value)
+        if not columns["route_key"] or columns["route_key"][-1] != strings.get(route_key):
+            columns["route_key"].append(intern(route_key))
+            columns["route_start"].append(position)
+            columns["route_end"].append(position)
+        columns["route_end"][-1] = position + 1
+
+    string_offsets = array("Q", [0])
+    blob = bytearray()
+    for value in strings:
+        blob += value.encode("utf-8")
+        string_offsets.append(len(blob))
+
+    # Sections follow the header, each 8-byte aligned
+    sections: List[Tuple[str, bytes]] = [(name, columns[name].tobytes()) for name, _ in ROW_COLUMNS + ROUTE_COLUMNS]
+    sections.append(("string_offsets", string_offsets.tobytes()))
+    sections.append(("string_data", bytes(blob)))
+
+    header: Dict[str, Any] = {
+        "version": FORMAT_VERSION,
+        "byteorder": sys.byteorder,
+        "rows": len(rows),
+        "routes": len(columns["route_key"]),
+        "strings": len(strings),
+        "built_at": time.time(),
+        "source": source,
+        "sections": {}
+    }
+    types = dict(ROW_COLUMNS + ROUTE_COLUMNS, string_offsets="Q", string_data="B")
+    # Offsets depend on the header length and vice versa; size it with
+    # generous placeholder offsets first
+    placeholder = dict(header, sections={name: [types[name], 10 ** 15, len(data)] for name, data in sections})
+    offset = _align(len(MAGIC) + 4 + len(json.dumps(placeholder).encode()))
+    for name, data in sections:
+        header["sections"][name] = [types[name], offset, len(data)]
+        offset = _align(offset + len(data))
+    header_bytes = json.dumps(header).encode()
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header_bytes).to_bytes(4, "little"))
+        f.write(header_bytes)
+        for name, data in sections:
+            f.seek(header["sections"][name][1])
+            f.write(data)
+        f.truncate(max(offset, f.tell()))
+    os.replace(tmp_path, path)
+    logger.info(f"Wrote flight inventory {path}: {len(rows)} legs, {header['routes']} routes, {len(strings)} strings")
+    return header
+
+
+# Reading
+
+class ColumnarFlightInventory(MockFlightsDatabase):
+    """
+    MockFlightsDatabase backed by a memory-mapped columnar file
+
+    Keeps the search_flights contract (including dynamic flights for
+    routes not in the file); only the storage differs.
+    """
+
+    def __init__(self, path: str = FLIGHT_INVENTORY_PATH):
+        if not path:
+            raise ValueError("No flight inventory path given (set VAPI_FLIGHT_INVENTORY)")
+        self.path = path
+        self.flights_db: Dict[str, List[Dict[str, Any]]] = {}
+        self._graph = None
+        self._fares = None
+        self._index = None
+        self._graph_lock = threading.Lock()
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._load_header()
+        except Exception:
+            self._file.close()
+            raise
+        # Decoded strings are few (airlines, codes, units) apart from ids;
+        # keep the hot ones per process
+        self._string = functools.lru_cache(maxsize=4096)(self._decode_string)
+        logger.info(
+            f" Columnar flight inventory mapped: {self.rows} legs, {self.route_count} routes "
+            f"({self.size_bytes / 1e6:.1f} MB, {path})"
+        )
+
+    def _load_header(self) -> None:
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise InventoryFormatError(f"{self.path} is not a flight inventory file")
+        header_len = int.from_bytes(self._map[len(MAGIC):len(MAGIC) + 4], "little")
+        start = len(MAGIC) + 4
+        self.header = json.loads(self._map[start:start + header_len])
+        if self.header.get("version") != FORMAT_VERSION:
+            raise InventoryFormatError(f"Unsupported inventory version {self.header.get('version')}")
+        if self.header.get("byteorder") != sys.byteorder:
+            raise InventoryFormatError(f"Inventory was built on a {self.header.get('byteorder')}-endian host")
+        self.rows = self.header["rows"]
+        self.route_count = self.header["routes"]
+        self.size_bytes = len(self._map)
+
+        self._view = memoryview(self._map)
+        self._columns: Dict[str, memoryview] = {}
+        for name, (typecode, offset, length) in self.header["sections"].items():
+            self._columns[name] = self._view[offset:offset + length].cast(typecode)
+        self._string_offsets = self._columns["string_offsets"]
+        self._string_data = self._columns["string_data"]
+
+    def close(self) -> None:
+        """Unmap the file (searches in flight on other threads must have finished)"""
+        self._string.cache_clear()
+        for column in self._columns.values():
+            column.release()
+        self._view.release()
+        self._columns = {}
+        self._map.close()
+        self._file.close()
+
+    def _decode_string(self, index: int) -> str:
+        return bytes(self._string_data[self._string_offsets[index]:self._string_offsets[index + 1]]).decode("utf-8")
+
+    def _find_route(self, route_key: str) -> Optional[Tuple[int, int]]:
+        """Binary search the route index; returns the (start, end) row range"""
+        # UTF-8 byte order matches str order, so compare raw bytes without decoding
+        target = route_key.encode("utf-8")
+        keys = self._columns["route_key"]
+        offsets = self._string_offsets
+        data = self._string_data
+        low, high = 0, self.route_count
+        while low < high:
+            middle = (low + high) // 2
+            index = keys[middle]
+            if data[offsets[index]:offsets[index + 1]].tobytes() < target:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.route_count:
+            index = keys[low]
+            if data[offsets[index]:offsets[index + 1]].tobytes() == target:
+                return self._columns["route_start"][low], self._columns["route_end"][low]
+        return None
+
+    def _route_rows(self, start: int, end: int, days_mask: int) -> List[Dict[str, Any]]:
+        """
+        Materialise rows [start, end) operating on days_mask
+
+        Works a column slice at a time (memoryview.tolist) rather than cell
+        by cell; only low-cardinality strings go through the decode cache,
+        ids are decoded directly so they don't evict airlines and codes.
+        """
+        c = self._columns
+        days = c["days"][start:end].tolist()
+        keep = None if all(d & days_mask for d in days) else [i for i, d in enumerate(days) if d & days_mask]
+
+        def column(name: str) -> List[int]:
+            values = c[name][start:end].tolist()
+            return values if keep is None else [values[i] for i in keep]
+
+        s = self._string
+        decode = self._decode_string
+        return [
+            {
+                "id": decode(flight_id),
+                "airline": s(airline),
+                "flight_number": s(flight_number),
+                "from": {"code": s(origin), "time": _CLOCK[dep]},
+                "to": {"code": s(dest), "time": _CLOCK[arr]},
+                "duration": f"{duration // 60}h {duration % 60}m",
+                "stops": stops,
+                "price": price,
+                "currency": s(currency),
+                "cabin_class": s(cabin_class),
+                "seats_available": seats,
+                "baggage": {"checked": s(checked), "cabin": s(cabin)}
+            }
+            for (flight_id, airline, flight_number, origin, dest, dep, arr, duration,
+                 stops, price, currency, cabin_class, seats, checked, cabin) in zip(
+                column("id"), column("airline"), column("flight_number"), column("origin_code"),
+                column("dest_code"), column("dep_minutes"), column("arr_minutes"), column("duration_minutes"),
+                column("stops"), column("price"), column("currency"), column("cabin_class"),
+                column("seats_available"), column("baggage_checked"), column("baggage_cabin")
+            )
+        ]
+
+    def _route_flights(self, origin_code: str, dest_code: str, departure_date: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        span = self._find_route(f"{origin_code}-{dest_code}")
+        if span is None:
+            return None
+        days_mask = ALL_DAYS
+        if departure_date:
+            try:
+                days_mask = 1 << date.fromisoformat(departure_date).weekday()
+            except ValueError:
+                pass
+        return self._route_rows(span[0], span[1], days_mask)
+
+    def _graph_legs(self) -> Iterable[Leg]:
+        """Every row for the route graph, read column-wise; refs are row numbers"""
+        c = self._columns
+        s = self._string
+        for row, (origin, dest, dep, arr, duration, price, days) in enumerate(zip(
+            c["origin_code"].tolist(), c["dest_code"].tolist(), c["dep_minutes"].tolist(), c["arr_minutes"].tolist(),
+            c["duration_minutes"].tolist(), c["price"].tolist(), c["days"].tolist()
+        )):
+            yield s(origin), s(dest), dep, duration or (arr - dep) % DAY_MINUTES, price, days, row
+
+    def _flight_refs(self) -> Iterable[Tuple[str, int]]:
+        """(flight id, row) of every row"""
+        decode = self._decode_string
+        for row, flight_id in enumerate(self._columns["id"].tolist()):
+            yield decode(flight_id), row
+
+    def _graph_flight(self, ref: int) -> Dict[str, Any]:
+        return self._route_rows(ref, ref + 1, ALL_DAYS)[0]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "rows": self.rows,
+            "routes": self.route_count,
+            "strings": self.header["strings"],
+            "size_bytes": self.size_bytes,
+            "built_at": self.header.get("built_at"),
+            "source": self.header.get("source")
+        }
+
+
+def read_jsonl(path: str) -> Iterable[Dict[str, Any]]:
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or inspect a columnar flight inventory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Write an inventory file")
+    build.add_argument("output")
+    source = build.add_mutually_exclusive_group(required=True)
+    source.add_argument("--from-mock", action="store_true", help="Use the built-in mock routes")
+    source.add_argument("--from-jsonl", help="One flight dict per line, MockFlightsDatabase shape")
+    info = commands.add_parser("info", help="Print an inventory header")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "build":
+        if args.from_mock:
+            flights = (f for route in MockFlightsDatabase().flights_db.values() for f in route)
+            header = write_inventory(args.output, flights, source="mock")
+        else:
+            header = write_inventory(args.output, read_jsonl(args.from_jsonl), source=args.from_jsonl)
+        print(json.dumps({k: v for k, v in header.items() if k != "sections"}, indent=2))
+    else:
+        inventory = ColumnarFlightInventory(args.path)
+        print(json.dumps(inventory.stats(), indent=2))
+        inventory.close()
+
+
+if __name__ == "__main__":
+    main()
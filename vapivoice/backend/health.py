@@ -0,0 +1,139 @@
+"""
+Health - Liveness and readiness probes with dependency checks
+Liveness only says the process and event loop answer. Readiness runs the
+registered dependency checks (bookings database, email delivery, call/card
+cache pressure, event-loop lag) and reports each as pass / warn / fail; any
+fail makes the instance not ready so the orchestrator stops routing to it.
+Results are cached for HEALTH_CACHE_SECONDS so frequent probes stay cheap.
+"""
+
+import os
+import time
+import asyncio
+import logging
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from backend.loop_monitor import loop_monitor
+
+logger = logging.getLogger(__name__)
+
+# How long a completed round of checks is reused
+HEALTH_CACHE_SECONDS = float(os.getenv("VAPI_HEALTH_CACHE_SECONDS", "3"))
+
+# A single check taking longer than this counts as failed
+CHECK_TIMEOUT_SECONDS = float(os.getenv("VAPI_HEALTH_CHECK_TIMEOUT", "2"))
+
+# Thresholds (warn, fail)
+DB_LATENCY_MS = (float(os.getenv("VAPI_HEALTH_DB_WARN_MS", "50")), float(os.getenv("VAPI_HEALTH_DB_FAIL_MS", "500")))
+EMAIL_QUEUE_DEPTH = (int(os.getenv("VAPI_HEALTH_EMAIL_QUEUE_WARN", "10")), int(os.getenv("VAPI_HEALTH_EMAIL_QUEUE_FAIL", "50")))
+CACHE_FILL_RATIO = (float(os.getenv("VAPI_HEALTH_CACHE_WARN", "0.8")), float(os.getenv("VAPI_HEALTH_CACHE_FAIL", "0.95")))
+LOOP_LAG_MS = (float(os.getenv("VAPI_HEALTH_LAG_WARN_MS", "100")), float(os.getenv("VAPI_HEALTH_LAG_FAIL_MS", "500")))
+
+PASS = "pass"
+WARN = "warn"
+FAIL = "fail"
+
+_SEVERITY = {PASS: 0, WARN: 1, FAIL: 2}
+
+
+def grade(value: float, thresholds: tuple) -> str:
+    """pass / warn / fail for a value against (warn, fail) thresholds"""
+    warn, fail = thresholds
+    if value >= fail:
+        return FAIL
+    if value >= warn:
+        return WARN
+    return PASS
+
+
+def worst(*statuses: str) -> str:
+    """Most severe of several statuses"""
+    return max(statuses, key=_SEVERITY.__getitem__)
+
+
+async def measure_loop_lag() -> float:
+    """Seconds between scheduling a callback and the loop running it"""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    scheduled = loop.time()
+    loop.call_soon(lambda: future.done() or future.set_result(loop.time()))
+    return (await future) - scheduled
+
+
+class HealthChecker:
+    """
+    Registry of named async checks with a short-lived result cache
+
+    A check returns a dict with at least "status" (pass/warn/fail); an
+    exception or timeout is reported as fail. Concurrent probes share one
+    in-flight round instead of each hitting the database.
+    """
+
+    def __init__(self, cache_seconds: float = HEALTH_CACHE_SECONDS, timeout: float = CHECK_TIMEOUT_SECONDS):
+        self.cache_seconds = cache_seconds
+        self.timeout = timeout
+        self._checks: Dict[str, Callable[[], Awaitable[Dict[str, Any]]]] = {}
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def register(self, name: str, check: Callable[[], Awaitable[Dict[str, Any]]]) -> None:
+        self._checks[name] = check
+
+    def check(self, name: str) -> Callable:
+        """Decorator form of register"""
+        def decorator(func: Callable[[], Awaitable[Dict[str, Any]]]) -> Callable:
+            self.register(name, func)
+            return func
+        return decorator
+
+    async def _run_one(self, name: str, check: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(check(), self.timeout)
+        except asyncio.TimeoutError:
+            result = {"status": FAIL, "error": f"timed out after {self.timeout}s"}
+        except Exception as e:
+            result = {"status": FAIL, "error": f"{type(e).__name__}: {e}"}
+        result["check_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        if result["status"] != PASS:
+            logger.warning(f"Health check {name}: {result}")
+        return result
+
+    async def run(self, force: bool = False) -> Dict[str, Any]:
+        """Run all checks (or return the cached round)"""
+        if not force and self._result is not None and time.monotonic() - self._checked_at < self.cache_seconds:
+            return self._result
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Another probe may have refreshed the result while we waited
+            if not force and self._result is not None and time.monotonic() - self._checked_at < self.cache_seconds:
+                return self._result
+            names = list(self._checks)
+            results = await asyncio.gather(*(self._run_one(name, self._checks[name]) for name in names))
+            checks = dict(zip(names, results))
+            self._result = {
+                "status": worst(PASS, *(result["status"] for result in results)),
+                "checks": checks,
+                "checked_at": time.time()
+            }
+            self._checked_at = time.monotonic()
+            return self._result
+
+    def names(self) -> List[str]:
+        return list(self._checks)
+
+
+health_checker = HealthChecker()
+
+
+@health_checker.check("event_loop")
+async def _check_event_loop() -> Dict[str, Any]:
+    # Prefer the watchdog's recent p99: a probe's own lag misses stalls that
+    # ended before it ran
+    if loop_monitor.running and loop_monitor.lags:
+        lag_ms = loop_monitor.lag_percentiles()["0.99"] * 1000
+        return {"status": grade(lag_ms, LOOP_LAG_MS), "lag_p99_ms": round(lag_ms, 3)}
+    lag_ms = (await measure_loop_lag()) * 1000
+    return {"status": grade(lag_ms, LOOP_LAG_MS), "lag_ms": round(lag_ms, 3)}
@@ -0,0 +1,220 @@
+"""
+Itineraries - Round-trip pairing of outbound and return flights
+Finds the k cheapest (or best-ranked) outbound/return pairs without building
+the cartesian product: both legs are sorted by their own score and pairs are
+expanded best-first from a heap, starting at (cheapest, cheapest). Pair-level
+rules (minimum turnaround at the destination, same-airline preference) only
+ever add to a pair's score or rule it out, so a pair can be emitted as soon
+as nothing left on the frontier could beat it.
+"""
+
+import os
+import re
+import heapq
+import functools
+import logging
+from datetime import date
+from typing import Dict, Any, List, Optional, Tuple, Callable
+
+logger = logging.getLogger(__name__)
+
+RANK_BY = ("price", "best")
+SAME_AIRLINE_MODES = (None, "prefer", "require")
+
+# Shortest stay at the destination before the return departs
+MIN_TURNAROUND_MINUTES = int(os.getenv("VAPI_MIN_TURNAROUND_MINUTES", "180"))
+
+# "best" ranking prices time and stops in fare currency units
+MINUTE_COST = 15
+STOP_COST = 2500
+
+# Added to a pair flying two different airlines when same_airline="prefer"
+AIRLINE_SWITCH_COST = 1500
+
+# Upper bound on pairs looked at per search; keeps worst cases (most pairs
+# ruled out) bounded, at the price of a possibly non-optimal tail
+MAX_PAIRS_EXAMINED = int(os.getenv("VAPI_MAX_PAIRS_EXAMINED", "200000"))
+
+_DURATION = re.compile(r"(?:(\d+)\s*h)?\s*(?:(\d+)\s*m)?")
+
+
+# Few distinct values (one per minute of the day / per duration label)
+@functools.lru_cache(maxsize=2048)
+def clock_minutes(clock: str) -> int:
+    """Minutes after midnight for "HH:MM" """
+    hours, _, minutes = clock.partition(":")
+    return int(hours) * 60 + int(minutes or 0)
+
+
+@functools.lru_cache(maxsize=2048)
+def duration_minutes(text: str) -> int:
+    """Minutes for "5h 45m" style durations (0 when unparseable)"""
+    match = _DURATION.fullmatch(text.strip())
+    if not match or not any(match.groups()):
+        return 0
+    return int(match.group(1) or 0) * 60 + int(match.group(2) or 0)
+
+
+def leg_score(flight: Dict[str, Any], rank_by: str = "price") -> float:
+    score = float(flight.get("price") or 0)
+    if rank_by == "best":
+        score += duration_minutes(flight.get("duration", "")) * MINUTE_COST + int(flight.get("stops") or 0) * STOP_COST
+    return score
+
+
+def _day_minute(day: Optional[str]) -> Optional[int]:
+    try:
+        return date.fromisoformat(day).toordinal() * 1440 if day else None
+    except ValueError:
+        return None
+
+
+def _leg_times(flight: Dict[str, Any], day_start: Optional[int]) -> Tuple[Optional[int], Optional[int]]:
+    """Absolute (departure, arrival) minutes, or (None, None) without a date"""
+    if day_start is None:
+        return None, None
+    try:
+        departure = day_start + clock_minutes(flight["from"]["time"])
+    except (KeyError, TypeError, ValueError):
+        return None, None
+    flown = duration_minutes(flight.get("duration", ""))
+    if not flown:
+        # No duration: arrival clock time, rolling over midnight if needed
+        arrival_clock = clock_minutes(flight.get("to", {}).get("time", "00:00"))
+        flown = (arrival_clock - (departure - day_start)) % 1440
+    return departure, departure + flown
+
+
+def _best_pairs(
+    outbound: List[Tuple[float, int]],
+    inbound: List[Tuple[float, int]],
+    k: int,
+    pair_cost: Callable[[int, int], Optional[float]],
+    budget: int
+) -> Tuple[List[Tuple[float, int, int]], int, bool]:
+    """
+    Lazy best-first walk over outbound x inbound (each sorted by score)
+
+    Returns up to k (score, outbound_index, inbound_index), pairs examined,
+    and whether the walk stopped on the budget before proving optimality.
+    """
+    if not outbound or not inbound or k <= 0:
+        return [], 0, False
+    frontier = [(outbound[0][0] + inbound[0][0], 0, 0)]
+    seen = {(0, 0)}
+    ready: List[Tuple[float, int, int]] = []
+    results: List[Tuple[float, int, int]] = []
+    examined = 0
+    while frontier and len(results) < k:
+        if examined >= budget:
+            break
+        base, i, j = heapq.heappop(frontier)
+        examined += 1
+        for ni, nj in ((i + 1, j), (i, j + 1)):
+            if ni < len(outbound) and nj < len(inbound) and (ni, nj) not in seen:
+                seen.add((ni, nj))
+                heapq.heappush(frontier, (outbound[ni][0] + inbound[nj][0], ni, nj))
+        extra = pair_cost(outbound[i][1], inbound[j][1])
+        if extra is not None:
+            heapq.heappush(ready, (base + extra, outbound[i][1], inbound[j][1]))
+        # Every unexplored pair scores at least the frontier minimum
+        bound = frontier[0][0] if frontier else float("inf")
+        while ready and ready[0][0] <= bound and len(results) < k:
+            results.append(heapq.heappop(ready))
+    truncated = bool(frontier) and len(results) < k
+    while ready and len(results) < k:
+        results.append(heapq.heappop(ready))
+    return results, examined, truncated
+
+
+def top_round_trips(
+    outbound: List[Dict[str, Any]],
+    inbound: List[Dict[str, Any]],
+    departure_date: Optional[str] = None,
+    return_date: Optional[str] = None,
+    k: int = 5,
+    rank_by: str = "price",
+    same_airline: Optional[str] = None,
+    min_turnaround_minutes: int = MIN_TURNAROUND_MINUTES,
+    max_pairs: int = MAX_PAIRS_EXAMINED
+) -> Dict[str, Any]:
+    """
+    Best k round-trip itineraries from outbound and return flight lists
+
+    Args:
+        rank_by: "price" (total fare) or "best" (fare plus time and stops)
+        same_airline: None, "prefer" (penalise switching) or "require"
+        min_turnaround_minutes: minimum gap between landing and the return
+            departure (checked when both dates are known)
+    """
+    if rank_by not in RANK_BY:
+        raise ValueError(f"rank_by must be one of {RANK_BY}")
+    if same_airline not in SAME_AIRLINE_MODES:
+        raise ValueError(f"same_airline must be one of {SAME_AIRLINE_MODES}")
+
+    out_day, ret_day = _day_minute(departure_date), _day_minute(return_date)
+    out_times = [_leg_times(f, out_day) for f in outbound]
+    ret_times = [_leg_times(f, ret_day) for f in inbound]
+    airlines_out = [f.get("airline") for f in outbound]
+    airlines_ret = [f.get("airline") for f in inbound]
+
+    def pair_cost(i: int, j: int) -> Optional[float]:
+        arrival = out_times[i][1]
+        departure = ret_times[j][0]
+        if arrival is not None and departure is not None and departure - arrival < min_turnaround_minutes:
+            return None
+        if airlines_out[i] != airlines_ret[j]:
+            if same_airline == "require":
+                return None
+            if same_airline == "prefer":
+                return AIRLINE_SWITCH_COST
+        return 0.0
+
+    def ranked(flights: List[Dict[str, Any]], indexes: Optional[List[int]] = None) -> List[Tuple[float, int]]:
+        indexes = range(len(flights)) if indexes is None else indexes
+        return sorted((leg_score(flights[i], rank_by), i) for i in indexes)
+
+    # Cheap exit when no return leaves late enough after any arrival
+    arrivals = [a for _, a in out_times if a is not None]
+    departures = [d for d, _ in ret_times if d is not None]
+    if arrivals and departures and max(departures) - min(arrivals) < min_turnaround_minutes:
+        pairs, examined, truncated = [], 0, False
+    elif same_airline == "require":
+        # Walk each airline's pairs separately instead of discarding mixed ones
+        pairs, examined, truncated = [], 0, False
+        for airline in set(airlines_out) & set(airlines_ret):
+            group_pairs, group_examined, group_truncated = _best_pairs(
+                ranked(outbound, [i for i, a in enumerate(airlines_out) if a == airline]),
+                ranked(inbound, [j for j, a in enumerate(airlines_ret) if a == airline]),
+                k, pair_cost, max(1, max_pairs - examined)
+            )
+            pairs = heapq.nsmallest(k, pairs + group_pairs)
+            examined += group_examined
+            truncated = truncated or group_truncated
+    else:
+        pairs, examined, truncated = _best_pairs(ranked(outbound), ranked(inbound), k, pair_cost, max_pairs)
+
+    itineraries = []
+    for rank, (score, i, j) in enumerate(pairs, start=1):
+        out_flight, ret_flight = outbound[i], inbound[j]
+        arrival, departure = out_times[i][1], ret_times[j][0]
+        itineraries.append({
+            "rank": rank,
+            "outbound": out_flight,
+            "return": ret_flight,
+            "total_price": (out_flight.get("price") or 0) + (ret_flight.get("price") or 0),
+            "currency": out_flight.get("currency", "INR"),
+            "same_airline": out_flight.get("airline") == ret_flight.get("airline"),
+            "turnaround_minutes": departure - arrival if arrival is not None and departure is not None else None,
+            "score": round(score, 2)
+        })
+
+    if truncated:
+        logger.warning(f"Round-trip search stopped after {examined} pairs; results may not be optimal")
+    return {
+        "itineraries": itineraries,
+        "rank_by": rank_by,
+        "same_airline": same_airline,
+        "pairs_examined": examined,
+        "truncated": truncated
+    }
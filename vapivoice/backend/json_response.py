@@ -0,0 +1,103 @@
+"""
+JSON Response - Fast JSON encoding for API responses
+Uses orjson, then msgspec, when installed and falls back to the stdlib json
+module. Also lets already-encoded fragments (e.g. cached flight/hotel cards)
+be spliced into a response body without re-encoding them.
+"""
+
+import json
+import logging
+from typing import Any, Dict
+
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+# Pick the fastest available encoder
+try:
+    import orjson
+
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def _encode(content: Any) -> bytes:
+        return orjson.dumps(content, option=_ORJSON_OPTIONS)
+
+    json_backend = "orjson"
+except ImportError:
+    try:
+        import msgspec
+
+        _msgspec_encoder = msgspec.json.Encoder()
+        _encode = _msgspec_encoder.encode
+        json_backend = "msgspec"
+    except ImportError:
+        def _encode(content: Any) -> bytes:
+            return json.dumps(
+                content,
+                ensure_ascii=False,
+                allow_nan=False,
+                separators=(",", ":"),
+            ).encode("utf-8")
+
+        json_backend = "json"
+
+logger.info(f"JSON encoder: {json_backend}")
+
+
+def encode_json(content: Any) -> bytes:
+    """
+    Encode content to compact UTF-8 JSON bytes
+
+    Falls back to the stdlib encoder (stringifying unknown types) when the fast
+    backend rejects a value, so a stray Decimal or datetime never turns a
+    response into a 500.
+    """
+    try:
+        return _encode(content)
+    except (TypeError, ValueError, OverflowError):
+        return json.dumps(
+            content,
+            ensure_ascii=False,
+            separators=(",", ":"),
+            default=str,
+        ).encode("utf-8")
+
+
+class JSONFragment:
+    """Already-encoded JSON value that is copied into a response verbatim"""
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+
+
+def encode_with_fragments(content: Dict[str, Any]) -> bytes:
+    """
+    Encode a top-level dict whose values may be JSONFragment instances
+
+    Plain values are encoded once; fragments are appended as raw bytes.
+    """
+    fragments = [(key, value.raw) for key, value in content.items() if isinstance(value, JSONFragment)]
+    if not fragments:
+        return encode_json(content)
+
+    plain = {key: value for key, value in content.items() if not isinstance(value, JSONFragment)}
+    parts = [encode_json(plain)[:-1]]  # drop the closing brace
+    for key, raw in fragments:
+        parts.append(b"," if len(parts) > 1 or plain else b"")
+        parts.append(encode_json(key))
+        parts.append(b":")
+        parts.append(raw)
+    parts.append(b"}")
+    return b"".join(parts)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the fastest available encoder"""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, dict):
+            return encode_with_fragments(content)
+        return encode_json(content)
+
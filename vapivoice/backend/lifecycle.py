@@ -0,0 +1,140 @@
+"""
+Lifecycle - Lazy service construction and startup warm-up
+Services (mock databases, BookingService, EmailService) are wrapped in
+LazyService proxies so importing server.py does no I/O. Each one is built on
+first use, or by the warm-up task the FastAPI lifespan starts in the
+background, and readiness reports once every registered service is built.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, Any, List, Optional, Callable
+
+from backend.loop_monitor import loop_monitor, LOOP_MONITOR_ENABLED
+
+logger = logging.getLogger(__name__)
+
+# Reference point for time-to-ready (module import is early in server startup)
+PROCESS_START = time.time()
+
+# Build services at import time (the old behaviour); useful for comparisons
+EAGER_INIT = os.getenv("VAPI_EAGER_INIT", "0").lower() in ("1", "true", "yes")
+
+# Start warm-up from the lifespan hook instead of waiting for first use
+WARMUP_ON_STARTUP = os.getenv("VAPI_WARMUP_ON_STARTUP", "1").lower() not in ("0", "false", "no")
+
+
+class LazyService:
+    """
+    Proxy that builds the wrapped service on first attribute access
+
+    Call sites keep using the module-level name (flight_api.search_flights)
+    unchanged. Construction is guarded by a lock so concurrent first requests
+    (event loop plus threadpool) build it once.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any]):
+        self._name = name
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+        self._init_ms: Optional[float] = None
+        self._error: Optional[str] = None
+        _registry.append(self)
+        if EAGER_INIT:
+            self._resolve()
+
+    def _resolve(self) -> Any:
+        instance = self._instance
+        if instance is not None:
+            return instance
+        with self._lock:
+            if self._instance is None:
+                start = time.perf_counter()
+                try:
+                    self._instance = self._factory()
+                except Exception as e:
+                    self._error = f"{type(e).__name__}: {e}"
+                    logger.error(f"Failed to initialize {self._name}: {e}", exc_info=True)
+                    raise
+                self._init_ms = round((time.perf_counter() - start) * 1000, 2)
+                self._error = None
+                logger.info(f"Initialized {self._name} in {self._init_ms}ms")
+            return self._instance
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._resolve(), attr)
+
+    def _status(self) -> Dict[str, Any]:
+        return {"initialized": is_initialized(self), "init_ms": self._init_ms, "error": self._error}
+
+
+_registry: List[LazyService] = []
+
+_warmup: Dict[str, Any] = {"status": "cold", "started_at": None, "finished_at": None, "error": None}
+
+
+def warm_up() -> Dict[str, Any]:
+    """Build every registered service (blocking)"""
+    _warmup.update(status="warming", started_at=time.time(), error=None)
+    try:
+        for service in list(_registry):
+            service._resolve()
+    except Exception as e:
+        _warmup.update(status="failed", finished_at=time.time(), error=str(e))
+        raise
+    _warmup.update(status="ready", finished_at=time.time())
+    logger.info(f"Warm-up complete {round((_warmup['finished_at'] - PROCESS_START) * 1000)}ms after start")
+    return readiness()
+
+
+async def warm_up_async() -> None:
+    """Run warm-up off the event loop so requests are accepted meanwhile"""
+    try:
+        await asyncio.to_thread(warm_up)
+    except Exception:
+        # Already recorded in readiness; services retry on first use
+        pass
+
+
+def is_initialized(service: LazyService) -> bool:
+    """
+    Whether a proxy's service has been built (without building it). A
+    function rather than a proxy attribute: attributes the proxy doesn't
+    define are forwarded to the service.
+    """
+    return service._instance is not None
+
+
+def is_ready() -> bool:
+    return all(is_initialized(service) for service in _registry)
+
+
+def readiness() -> Dict[str, Any]:
+    """Warm-up state and per-service construction timings"""
+    ready = is_ready()
+    finished = _warmup["finished_at"]
+    return {
+        "ready": ready,
+        "warmup": _warmup["status"] if not ready or _warmup["status"] != "cold" else "lazy",
+        "warmup_error": _warmup["error"],
+        "time_to_ready_ms": round((finished - PROCESS_START) * 1000, 1) if finished and ready else None,
+        "uptime_seconds": round(time.time() - PROCESS_START, 1),
+        "services": {service._name: service._status() for service in _registry}
+    }
+
+
+@asynccontextmanager
+async def lifespan(app: Any):
+    """FastAPI lifespan: start the loop monitor and background warm-up, accept requests immediately"""
+    if LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+    task = asyncio.create_task(warm_up_async()) if WARMUP_ON_STARTUP else None
+    yield
+    if task is not None and not task.done():
+        task.cancel()
+    await loop_monitor.stop()
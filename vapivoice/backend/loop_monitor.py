@@ -0,0 +1,236 @@
+"""
+Loop Monitor - Event-loop lag watchdog and blocking-call detector
+A ticker task on the event loop sleeps TICK_INTERVAL_SECONDS at a time and
+records how late each wake-up was (the loop lag). A watchdog thread watches
+the ticker's heartbeat; when the loop has not come back for longer than
+BLOCK_THRESHOLD_MS it captures the loop thread's Python stack and the route
+of the request task that is running, so sync SQLite / smtplib / regex work
+inside `async def` handlers shows up with a name and a stack.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from typing import Dict, Any, List, Optional, Callable
+
+from backend.metrics import EVENT_LOOP_LAG_SECONDS, EVENT_LOOP_BLOCKS, Gauge
+
+logger = logging.getLogger(__name__)
+
+LOOP_MONITOR_ENABLED = os.getenv("VAPI_LOOP_MONITOR", "1").lower() not in ("0", "false", "no")
+
+# Seconds between ticker wake-ups
+TICK_INTERVAL_SECONDS = float(os.getenv("VAPI_LOOP_TICK_INTERVAL", "0.05"))
+
+# A stall longer than this is recorded as a blocking call
+BLOCK_THRESHOLD_MS = float(os.getenv("VAPI_BLOCK_THRESHOLD_MS", "100"))
+
+# Lag samples kept for percentiles (at 20 ticks/s, ~50s of history)
+LAG_WINDOW = int(os.getenv("VAPI_LOOP_LAG_WINDOW", "1000"))
+
+# Blocking events kept for /debug/blocking
+MAX_BLOCK_EVENTS = int(os.getenv("VAPI_MAX_BLOCK_EVENTS", "100"))
+
+# Frames kept per captured stack (innermost last)
+STACK_LIMIT = 40
+
+NO_ROUTE = "(no request)"
+
+PERCENTILES = (0.5, 0.9, 0.99)
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LoopMonitor:
+    """
+    Lag ticker plus blocking-call watchdog for one event loop
+
+    Request tasks are mapped to their ASGI scope by LoopMonitorMiddleware, so
+    a capture can name the route even though it is taken from another thread.
+    """
+
+    def __init__(
+        self,
+        interval: float = TICK_INTERVAL_SECONDS,
+        threshold_ms: float = BLOCK_THRESHOLD_MS,
+        window: int = LAG_WINDOW,
+        max_events: int = MAX_BLOCK_EVENTS
+    ):
+        self.interval = interval
+        self.threshold = threshold_ms / 1000
+        self.lags: deque = deque(maxlen=window)
+        self.events: deque = deque(maxlen=max_events)
+        self.by_route: Dict[str, Dict[str, Any]] = {}
+        self.active_scopes: Dict[Any, Dict[str, Any]] = {}
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat = time.monotonic()
+        self._pending: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._ticker: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._ticker is not None and not self._ticker.done()
+
+    # Lifecycle (call from the event loop)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop_event.clear()
+        self._ticker = self.loop.create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info(f"Loop monitor started (tick {self.interval * 1000:.0f}ms, block threshold {self.threshold * 1000:.0f}ms)")
+
+    async def stop(self) -> None:
+        self._stop_event.set()
+        if self._ticker is not None:
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+            self._ticker = None
+
+    # Ticker (event loop)
+
+    async def _tick(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._heartbeat = now
+            self.lags.append(lag)
+            EVENT_LOOP_LAG_SECONDS.observe(lag)
+            if self._pending is not None:
+                self._finish_block(lag)
+
+    def _finish_block(self, lag: float) -> None:
+        with self._lock:
+            event, self._pending = self._pending, None
+        if event is None:
+            return
+        event["duration_ms"] = round(max(lag, self.threshold) * 1000, 2)
+        stats = self.by_route.setdefault(event["route"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "last_stack": None})
+        stats["count"] += 1
+        stats["total_ms"] += event["duration_ms"]
+        if event["duration_ms"] >= stats["max_ms"]:
+            stats["max_ms"] = event["duration_ms"]
+            stats["last_stack"] = event["stack"]
+        EVENT_LOOP_BLOCKS.labels(event["route"]).inc()
+        logger.warning(
+            f"Event loop blocked {event['duration_ms']}ms in {event['route']} at "
+            f"{event['stack'][-1] if event['stack'] else '?'}"
+        )
+
+    # Watchdog (own thread)
+
+    def _watch(self) -> None:
+        poll = max(self.threshold / 4, 0.005)
+        while not self._stop_event.wait(poll):
+            stalled = time.monotonic() - self._heartbeat
+            if stalled < self.threshold + self.interval or self._pending is not None:
+                continue
+            event = self._capture(stalled)
+            if event is not None:
+                with self._lock:
+                    self._pending = event
+                self.events.append(event)
+
+    def _capture(self, stalled: float) -> Optional[Dict[str, Any]]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+        stack = [
+            f"{entry.filename}:{entry.lineno} in {entry.name}"
+            for entry in traceback.extract_stack(frame, limit=STACK_LIMIT)
+        ]
+        return {
+            "route": self._current_route(),
+            "detected_after_ms": round(stalled * 1000, 2),
+            "duration_ms": None,
+            "stack": stack,
+            "at": time.time()
+        }
+
+    def _current_route(self) -> str:
+        # current_task only reads a dict keyed by loop, so it is safe here
+        try:
+            task = asyncio.current_task(self.loop)
+        except RuntimeError:
+            return NO_ROUTE
+        scope = self.active_scopes.get(task)
+        if scope is None:
+            return NO_ROUTE
+        route = getattr(scope.get("route"), "path", None) or scope.get("path", "?")
+        return f"{scope.get('method', 'GET')} {route}"
+
+    # Reporting
+
+    def lag_percentiles(self) -> Dict[str, float]:
+        """Lag over the recent window, in seconds"""
+        ordered = sorted(self.lags)
+        return {str(q): _percentile(ordered, q) for q in PERCENTILES}
+
+    def report(self, limit: int = 20) -> Dict[str, Any]:
+        percentiles = self.lag_percentiles()
+        routes = sorted(self.by_route.items(), key=lambda kv: kv[1]["total_ms"], reverse=True)
+        return {
+            "running": self.running,
+            "tick_interval_ms": self.interval * 1000,
+            "block_threshold_ms": self.threshold * 1000,
+            "lag_ms": {f"p{int(float(q) * 100)}": round(v * 1000, 3) for q, v in percentiles.items()},
+            "lag_samples": len(self.lags),
+            "routes": [
+                {"route": route, "count": s["count"], "total_ms": round(s["total_ms"], 2),
+                 "max_ms": s["max_ms"], "worst_stack": s["last_stack"]}
+                for route, s in routes
+            ],
+            "recent": list(reversed(self.events))[:limit]
+        }
+
+
+loop_monitor = LoopMonitor()
+
+Gauge(
+    "event_loop_lag_window_seconds",
+    "Event-loop lag percentiles over the recent tick window",
+    loop_monitor.lag_percentiles,
+    ("quantile",)
+)
+
+
+class LoopMonitorMiddleware:
+    """ASGI middleware mapping the running request task to its scope"""
+
+    def __init__(self, app: Any, monitor: LoopMonitor = loop_monitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        task = asyncio.current_task()
+        self.monitor.active_scopes[task] = scope
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.active_scopes.pop(task, None)
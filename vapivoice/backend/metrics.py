@@ -0,0 +1,387 @@
+"""
+Metrics - Prometheus-style counters, histograms and gauges
+Instruments are plain Python objects with fixed buckets. Writes are a list
+index increment and a float add, relying on the GIL instead of a lock; a lock
+is only taken the first time a label combination is seen. Scrapes render the
+Prometheus text exposition format for GET /metrics.
+"""
+
+import time
+import logging
+import threading
+import functools
+from bisect import bisect_left
+from typing import Dict, Any, List, Optional, Callable, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Request/tool latencies (seconds)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Event-loop lag is usually well under a millisecond
+LAG_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# SMTP round trips are slower (connect + STARTTLS + login + send)
+SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Label combinations per metric before new ones are folded into "other".
+# Guards against unbounded cardinality from untrusted values (event types, paths).
+MAX_LABEL_SETS = 200
+OVERFLOW_LABEL = "other"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_string(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self) -> None:
+        self._metrics: List[Any] = []
+
+    def register(self, metric: Any) -> None:
+        self._metrics.append(metric)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            try:
+                metric.collect(lines)
+            except Exception as e:
+                # A failing gauge callback must not take the whole scrape down
+                logger.error(f"Error collecting metric {metric.name}: {e}")
+        lines.append("")
+        return "\n".join(lines)
+
+
+REGISTRY = Registry()
+
+
+class _CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _HistogramValue:
+    __slots__ = ("_upper", "counts", "sum")
+
+    def __init__(self, upper: Tuple[float, ...]) -> None:
+        self._upper = upper
+        self.counts = [0] * (len(upper) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self._upper, value)] += 1
+        self.sum += value
+
+
+class _LabelledMetric:
+    """Base for metrics whose values are split by label values"""
+
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[Registry] = None
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._new_child()
+            self._children[()] = self._default
+        (registry or REGISTRY).register(self)
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Any:
+        """Child for a label combination; bind it once for hot paths"""
+        child = self._children.get(values)
+        if child is None:
+            child = self._create(values)
+        return child
+
+    def _create(self, values: Tuple[str, ...]) -> Any:
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+        with self._lock:
+            child = self._children.get(values)
+            if child is None:
+                if len(self._children) >= MAX_LABEL_SETS:
+                    values = (OVERFLOW_LABEL,) * len(values)
+                    child = self._children.get(values)
+                if child is None:
+                    child = self._new_child()
+                    self._children[values] = child
+        return child
+
+    def _header(self, lines: List[str]) -> None:
+        lines.append(f"# HELP {self.name} {self.documentation}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+
+
+class Counter(_LabelledMetric):
+    """Monotonic counter"""
+
+    kind = "counter"
+
+    def _new_child(self) -> _CounterValue:
+        return _CounterValue()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.value += amount
+
+    def value(self, *labels: str) -> float:
+        child = self._children.get(labels)
+        return child.value if child is not None else 0.0
+
+    def collect(self, lines: List[str]) -> None:
+        self._header(lines)
+        for values, child in list(self._children.items()):
+            lines.append(f"{self.name}{_label_string(self.labelnames, values)} {_format_value(child.value)}")
+
+
+class Histogram(_LabelledMetric):
+    """Fixed-bucket histogram (cumulative buckets are computed at scrape time)"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Optional[Registry] = None
+    ):
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def collect(self, lines: List[str]) -> None:
+        self._header(lines)
+        bounds = self.buckets + (float("inf"),)
+        for values, child in list(self._children.items()):
+            counts = list(child.counts)
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_string(self.labelnames, values, le)} {cumulative}")
+            label_str = _label_string(self.labelnames, values)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{label_str} {cumulative}")
+
+
+class Gauge:
+    """
+    Gauge read from a callback at scrape time
+
+    The callback returns a number, or a dict mapping label values (a string or
+    tuple of strings) to numbers when labelnames are given. Nothing is
+    recorded on the request path.
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Any],
+        labelnames: Sequence[str] = (),
+        registry: Optional[Registry] = None
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+        (registry or REGISTRY).register(self)
+
+    def collect(self, lines: List[str]) -> None:
+        value = self.callback()
+        lines.append(f"# HELP {self.name} {self.documentation}")
+        lines.append(f"# TYPE {self.name} {self.kind}")
+        if not self.labelnames:
+            lines.append(f"{self.name} {_format_value(float(value))}")
+            return
+        for labels, sample in value.items():
+            if not isinstance(labels, tuple):
+                labels = (labels,)
+            lines.append(f"{self.name}{_label_string(self.labelnames, labels)} {_format_value(float(sample))}")
+
+
+def timed(histogram_value: _HistogramValue) -> Callable:
+    """Decorator observing a function's wall time into a bound histogram child"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram_value.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# Application metrics
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template",
+    ("method", "route")
+)
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status code",
+    ("method", "route", "status")
+)
+
+VAPI_TOOL_SECONDS = Histogram(
+    "vapi_tool_duration_seconds",
+    "Vapi tool-call webhook latency by tool name",
+    ("tool",)
+)
+
+VAPI_WEBHOOK_EVENTS = Counter(
+    "vapi_webhook_events_total",
+    "Vapi webhook events received by type",
+    ("event",)
+)
+
+CARD_CACHE_LOOKUPS = Counter(
+    "card_cache_lookups_total",
+    "Flight/hotel card polls by kind and result (hit or miss)",
+    ("kind", "result")
+)
+
+QUOTE_CACHE_LOOKUPS = Counter(
+    "quote_cache_lookups_total",
+    "Booking price-quote lookups by kind and result (hit, miss, expired)",
+    ("kind", "result")
+)
+
+BOOKING_CACHE_LOOKUPS = Counter(
+    "booking_cache_lookups_total",
+    "Booking status lookups served from the decoded-record cache (hit) or the database (miss)",
+    ("result",)
+)
+
+SMTP_SEND_SECONDS = Histogram(
+    "smtp_send_duration_seconds",
+    "SMTP send latency (connect to delivery)",
+    buckets=SLOW_BUCKETS
+)
+
+SMTP_SENDS = Counter(
+    "smtp_sends_total",
+    "SMTP send attempts by result",
+    ("result",)
+)
+
+SQLITE_QUERY_SECONDS = Histogram(
+    "sqlite_query_duration_seconds",
+    "BookingService SQLite operation latency",
+    ("operation",)
+)
+
+SEAT_HOLD_EVENTS = Counter(
+    "seat_hold_events_total",
+    "Seat inventory operations by outcome (held, sold_out, confirmed, released, expired)",
+    ("outcome",)
+)
+
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between a scheduled event-loop tick and when it ran",
+    buckets=LAG_BUCKETS
+)
+
+EVENT_LOOP_BLOCKS = Counter(
+    "event_loop_blocks_total",
+    "Times the event loop was blocked past the threshold, by route",
+    ("route",)
+)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency and status counts
+
+    Routes are labelled by their template (/api/flight-cards/{call_id}), not
+    the raw path. Endpoints that handle a Vapi tool call set
+    request.state.vapi_tool so the same timing also lands in
+    vapi_tool_duration_seconds.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "GET")
+            HTTP_REQUEST_SECONDS.labels(method, path).observe(elapsed)
+            HTTP_REQUESTS.labels(method, path, str(status[0])).inc()
+
+            state = scope.get("state")
+            tool = state.get("vapi_tool") if isinstance(state, dict) else None
+            if tool:
+                VAPI_TOOL_SECONDS.labels(tool).observe(elapsed)
+
+
+def render_metrics() -> str:
+    """Prometheus text exposition of every registered metric"""
+    return REGISTRY.render()
@@ -3,17 +3,27 @@ Mock Flights Database - Always returns flights for testing
 Static flight data that always works, no external API required
 """
 
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple, Iterable
 from datetime import datetime, timedelta
 import logging
+import threading
+
+from backend.itineraries import top_round_trips
+from backend.connections import RouteGraph, Leg, flight_leg, MAX_STOPS, DAY_MINUTES
+from backend.fare_calendar import FareCalendar, MAX_CALENDAR_DAYS, NO_FARE
 
 logger = logging.getLogger(__name__)
 
 class MockFlightsDatabase:
     """Static flight database with guaranteed flight availability"""
     
-    def __init__(self):
-        self.flights_db = self._initialize_flights()
+    def __init__(self, flights_db: Dict[str, List[Dict[str, Any]]] = None):
+        # flights_db (route key -> flights) replaces the built-in routes, e.g. when loaded from a file
+        self.flights_db = flights_db if flights_db is not None else self._initialize_flights()
+        self._graph = None
+        self._fares = None
+        self._index = None
+        self._graph_lock = threading.Lock()
         logger.info(" Mock Flights Database initialized")
     
     def _initialize_flights(self) -> Dict[str, List[Dict[str, Any]]]:
@@ -282,6 +292,222 @@ class MockFlightsDatabase:
         }
         return city_mappings.get(city.lower(), city.upper())
     
+    def _route_flights(self, origin_code: str, dest_code: str, departure_date: str = None) -> List[Dict[str, Any]]:
+        """Flights stored for a route, or None when the route is unknown"""
+        route_key = f"{origin_code}-{dest_code}"
+        if route_key not in self.flights_db:
+            return None
+        # Copies: search_flights adds per-search fields, the stored flights stay untouched
+        return [dict(flight) for flight in self.flights_db[route_key]]
+    
+    def _graph_legs(self) -> Iterable[Leg]:
+        """Every stored leg for the route graph; refs are (route key, position)"""
+        for route_key, flights in self.flights_db.items():
+            for position, flight in enumerate(flights):
+                yield flight_leg(flight, (route_key, position))
+    
+    def _graph_flight(self, ref: Any) -> Dict[str, Any]:
+        route_key, position = ref
+        return dict(self.flights_db[route_key][position])
+    
+    def _flight_refs(self) -> Iterable[Tuple[str, Any]]:
+        """(flight id, graph ref) of every stored leg"""
+        for route_key, flights in self.flights_db.items():
+            for position, flight in enumerate(flights):
+                yield flight["id"], (route_key, position)
+    
+    def flight_index(self) -> Dict[str, Any]:
+        """Flight id -> graph ref of every stored leg, built on first use"""
+        if self._index is None:
+            with self._graph_lock:
+                if self._index is None:
+                    self._index = dict(self._flight_refs())
+        return self._index
+    
+    def route_graph(self) -> RouteGraph:
+        """Route graph over the stored legs, built on first use"""
+        if self._graph is None:
+            with self._graph_lock:
+                if self._graph is None:
+                    self._graph = RouteGraph(self._graph_legs())
+        return self._graph
+    
+    def fare_calendar(self) -> FareCalendar:
+        """Weekday fare minima per route, built with the route graph"""
+        if self._fares is None:
+            graph = self.route_graph()
+            with self._graph_lock:
+                if self._fares is None:
+                    self._fares = FareCalendar(graph)
+        return self._fares
+    
+    def search_fare_calendar(self, origin: str, destination: str, start_date: str, end_date: str) -> Dict[str, Any]:
+        """
+        Lowest fare per day from start_date to end_date (inclusive, ISO dates)
+        for a route, with the cheapest day picked out
+        """
+        origin_code = self._normalize_city(origin)
+        dest_code = self._normalize_city(destination)
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+        days = (end - start).days + 1
+        if days < 1:
+            raise ValueError("end_date is before start_date")
+        if days > MAX_CALENDAR_DAYS:
+            raise ValueError(f"Fare calendar covers at most {MAX_CALENDAR_DAYS} days")
+        
+        logger.info(f" Fare calendar: {origin} ({origin_code}) → {destination} ({dest_code}), {start_date} to {end_date}")
+        result = self.fare_calendar().query(origin_code, dest_code, start, days)
+        if result is None:
+            return {
+                "success": False,
+                "message": f"No scheduled flights from {origin} to {destination}",
+                "calendar": [],
+                "cheapest": None
+            }
+        fares, counts, stops = result
+        calendar = [
+            {
+                "date": (start + timedelta(days=i)).isoformat(),
+                "min_fare": fare if fare != NO_FARE else None,
+                "flights": count
+            }
+            for i, (fare, count) in enumerate(zip(fares, counts))
+        ]
+        priced = [day for day in calendar if day["min_fare"] is not None]
+        cheapest = min(priced, key=lambda day: day["min_fare"]) if priced else None
+        message = f"No flights from {origin} to {destination} between {start_date} and {end_date}"
+        if cheapest:
+            message = f"Cheapest fare from {origin} to {destination} between {start_date} and {end_date} is ₹{cheapest['min_fare']:,.0f} on {cheapest['date']}"
+        return {
+            "success": cheapest is not None,
+            "origin": origin,
+            "destination": destination,
+            "start_date": start_date,
+            "end_date": end_date,
+            "currency": "INR",
+            "stops": stops,
+            "calendar": calendar,
+            "cheapest": cheapest,
+            "message": message
+        }
+    
+    def _connecting_flight(self, itinerary: Dict[str, Any]) -> Dict[str, Any]:
+        """One flight-shaped dict for a connection, with its legs under "segments" """
+        segments = []
+        for ref, (departure, arrival) in zip(itinerary["legs"], itinerary["times"]):
+            segment = self._graph_flight(ref)
+            segment["day_offset"] = departure // DAY_MINUTES
+            segments.append(segment)
+        first, last = segments[0], segments[-1]
+        elapsed = itinerary["arrival"] - itinerary["departure"]
+        return {
+            "id": "+".join(segment["id"] for segment in segments),
+            "airline": " / ".join(dict.fromkeys(segment.get("airline", "") for segment in segments)),
+            "flight_number": " / ".join(segment.get("flight_number", "") for segment in segments),
+            "from": {"code": first["from"]["code"], "time": first["from"]["time"]},
+            "to": {"code": last["to"]["code"], "time": f"{itinerary['arrival'] % DAY_MINUTES // 60:02d}:{itinerary['arrival'] % 60:02d}"},
+            "duration": f"{elapsed // 60}h {elapsed % 60}m",
+            "stops": len(segments) - 1 + sum(int(segment.get("stops") or 0) for segment in segments),
+            "price": sum(segment.get("price") or 0 for segment in segments),
+            "currency": first.get("currency", "INR"),
+            "cabin_class": first.get("cabin_class", "Economy"),
+            "seats_available": min(segment.get("seats_available", 0) for segment in segments),
+            "baggage": first.get("baggage", {}),
+            "arrival_day_offset": itinerary["arrival"] // DAY_MINUTES,
+            "layovers": [{"airport": airport, "minutes": minutes} for airport, minutes in itinerary["layovers"]],
+            "segments": segments
+        }
+    
+    def search_connections(
+        self,
+        origin: str,
+        destination: str,
+        departure_date: str = None,
+        k: int = 5,
+        max_stops: int = MAX_STOPS,
+        rank_by: str = "price"
+    ) -> Dict[str, Any]:
+        """
+        One- and two-stop itineraries over the stored routes (direct flights
+        included), ranked by total fare ("price") or door-to-door time
+        ("duration")
+        """
+        origin_code = self._normalize_city(origin)
+        dest_code = self._normalize_city(destination)
+        search = self.route_graph().search(origin_code, dest_code, departure_date, k=k, max_stops=max_stops, rank_by=rank_by)
+        flights = [self._connecting_flight(itinerary) for itinerary in search.pop("itineraries")]
+        return {
+            "success": bool(flights),
+            "flights": flights,
+            "connection_search": search,
+            "message": f"Found {len(flights)} itineraries from {origin} to {destination}" if flights
+                       else f"No connections from {origin} to {destination} within {max_stops} stops"
+        }
+    
+    def get_flight(self, flight_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Flight by id ("BLR-JED-001") through the id index; a connection id
+        ("BLR-DXB-001+DXB-JED-002") gives the connection with its segments,
+        and ids of generated flights resolve to the same generated flight.
+        None when unknown.
+        """
+        ref = self.flight_index().get(flight_id)
+        if ref is not None:
+            return self._graph_flight(ref)
+        if "+" in flight_id:
+            segments = [self.get_flight(segment_id) for segment_id in flight_id.split("+")]
+            return None if None in segments else self._segments_flight(segments)
+        parts = flight_id.split("-")
+        if len(parts) < 3 or self._route_flights(parts[0], parts[1]) is not None:
+            return None
+        flights = self._generate_dynamic_flights(parts[0], parts[1], parts[0], parts[1])
+        return next((flight for flight in flights if flight["id"] == flight_id), None)
+    
+    def _segments_flight(self, segments: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """A connection rebuilt from its segment flights (no layover timing)"""
+        first, last = segments[0], segments[-1]
+        return {
+            "id": "+".join(segment["id"] for segment in segments),
+            "airline": " / ".join(dict.fromkeys(segment.get("airline", "") for segment in segments)),
+            "flight_number": " / ".join(segment.get("flight_number", "") for segment in segments),
+            "from": {"code": first["from"]["code"], "time": first["from"]["time"]},
+            "to": {"code": last["to"]["code"], "time": last["to"]["time"]},
+            "stops": len(segments) - 1 + sum(int(segment.get("stops") or 0) for segment in segments),
+            "price": sum(segment.get("price") or 0 for segment in segments),
+            "currency": first.get("currency", "INR"),
+            "cabin_class": first.get("cabin_class", "Economy"),
+            "seats_available": min(segment.get("seats_available", 0) for segment in segments),
+            "segments": segments
+        }
+    
+    def _leg_flights(self, origin: str, destination: str, origin_code: str, dest_code: str, travel_date: str,
+                     max_stops: int = MAX_STOPS) -> List[Dict[str, Any]]:
+        """Flights for one direction, stamped with the searched date and city names"""
+        # Check if route exists in database, then connections over known routes, then generate dynamic flights
+        flights = self._route_flights(origin_code, dest_code, travel_date)
+        if flights is None and max_stops > 0:
+            connections = self.route_graph().search(origin_code, dest_code, travel_date, k=6, max_stops=max_stops)
+            if connections["itineraries"]:
+                logger.info(f" Route {origin_code}-{dest_code} served by {len(connections['itineraries'])} connections")
+                flights = [self._connecting_flight(itinerary) for itinerary in connections["itineraries"]]
+        if flights is None:
+            logger.warning(f" Route {origin_code}-{dest_code} not in mock database - generating dynamic flights")
+            flights = self._generate_dynamic_flights(origin, destination, origin_code, dest_code)
+        
+        # Add the travel date to each flight
+        for flight in flights:
+            flight["date"] = travel_date
+            flight["departure_date"] = travel_date
+            
+            # Add dynamic fields
+            flight["origin"] = origin
+            flight["destination"] = destination
+            flight["departure_time"] = flight["from"]["time"]
+            flight["arrival_time"] = flight["to"]["time"]
+            flight["flight_id"] = flight["id"]
+        return flights
+    
     def search_flights(
         self,
         origin: str,
@@ -289,11 +515,21 @@ class MockFlightsDatabase:
         departure_date: str,
         return_date: str = None,
         passengers: int = 1,
-        cabin_class: str = "economy"
+        cabin_class: str = "economy",
+        max_itineraries: int = 5,
+        rank_by: str = "price",
+        same_airline: str = None,
+        max_stops: int = MAX_STOPS
     ) -> Dict[str, Any]:
         """
         Search for flights in the mock database
         Always returns flights for supported routes
+        
+        With return_date, also returns the return leg and the top
+        max_itineraries round-trip pairs ranked by total price ("price") or
+        price plus time and stops ("best"); same_airline may be "prefer" or
+        "require". Routes with no direct flights are served by connections of
+        up to max_stops stops before falling back to generated flights.
         """
         try:
             # Normalize city names
@@ -302,34 +538,30 @@ class MockFlightsDatabase:
             route_key = f"{origin_code}-{dest_code}"
             
             logger.info(f" Mock DB Search: {origin} ({origin_code}) → {destination} ({dest_code})")
-            logger.info(f"📅 Date: {departure_date}, Passengers: {passengers}, Class: {cabin_class}")
-            
-            # Check if route exists in database, if not generate dynamic flights
-            if route_key not in self.flights_db:
-                logger.warning(f" Route {route_key} not in mock database - generating dynamic flights")
-                flights = self._generate_dynamic_flights(origin, destination, origin_code, dest_code)
-            else:
-                # Get flights for this route
-                flights = self.flights_db[route_key].copy()
-            
-            # Add the departure date to each flight
-            for flight in flights:
-                flight["date"] = departure_date
-                flight["departure_date"] = departure_date
-                
-                # Add dynamic fields
-                flight["origin"] = origin
-                flight["destination"] = destination
-                flight["departure_time"] = flight["from"]["time"]
-                flight["arrival_time"] = flight["to"]["time"]
-                flight["flight_id"] = flight["id"]
+            logger.info(f"📅 Date: {departure_date}, Return: {return_date}, Passengers: {passengers}, Class: {cabin_class}")
             
+            flights = self._leg_flights(origin, destination, origin_code, dest_code, departure_date, max_stops)
             logger.info(f" Found {len(flights)} flights for route {route_key}")
+            message = f"Found {len(flights)} flights from {origin} to {destination}"
             
-            return {
+            return_flights: List[Dict[str, Any]] = []
+            itineraries: List[Dict[str, Any]] = []
+            pairing = None
+            if return_date:
+                return_flights = self._leg_flights(destination, origin, dest_code, origin_code, return_date, max_stops)
+                pairing = top_round_trips(
+                    flights, return_flights, departure_date, return_date,
+                    k=max_itineraries, rank_by=rank_by, same_airline=same_airline
+                )
+                itineraries = pairing.pop("itineraries")
+                logger.info(f" Found {len(return_flights)} return flights, {len(itineraries)} round trips")
+                message += f", {len(return_flights)} return flights and {len(itineraries)} round-trip options"
+            
+            result = {
                 "success": True,
                 "outbound_flights": flights,
-                "return_flights": [],
+                "return_flights": return_flights,
+                "itineraries": itineraries,
                 "search_criteria": {
                     "origin": origin,
                     "destination": destination,
@@ -339,8 +571,11 @@ class MockFlightsDatabase:
                     "cabin_class": cabin_class
                 },
                 "data_source": "mock_db",
-                "message": f"Found {len(flights)} flights from {origin} to {destination}"
+                "message": message
             }
+            if pairing is not None:
+                result["itinerary_search"] = pairing
+            return result
             
         except Exception as e:
             logger.error(f" Error in mock flight search: {e}")
@@ -349,6 +584,7 @@ class MockFlightsDatabase:
                 "message": "Error searching flights",
                 "outbound_flights": [],
                 "return_flights": [],
+                "itineraries": [],
                 "error": str(e),
                 "data_source": "mock_db"
             }
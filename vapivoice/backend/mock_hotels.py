@@ -12,8 +12,9 @@ logger = logging.getLogger(__name__)
 class MockHotelsDatabase:
     """Mock database with pre-defined hotel data for Saudi Arabia cities"""
     
-    def __init__(self):
-        self.hotels_data = {
+    def __init__(self, hotels_data: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        # hotels_data (city -> hotels) replaces the built-in cities, e.g. when loaded from a file
+        self.hotels_data = hotels_data if hotels_data is not None else {
             "Riyadh": [
                 {
                     "id": "hotel_riyadh_001",
@@ -212,10 +213,14 @@ class MockHotelsDatabase:
                 }
             ]
         }
+        # Hotel id -> hotel across all cities
+        self.hotels_by_id: Dict[str, Dict[str, Any]] = {
+            hotel["id"]: hotel for hotels in self.hotels_data.values() for hotel in hotels
+        }
         logger.info(" Mock Hotels Database initialized")
         logger.info(f"📊 Available cities: {list(self.hotels_data.keys())}")
         for city, hotels in self.hotels_data.items():
-            logger.info(f"   - {city}: {len(hotels)} hotels")
+            logger.debug(f"   - {city}: {len(hotels)} hotels")
     
     def search_hotels(self, city: str) -> Dict[str, Any]:
         """
@@ -243,7 +248,7 @@ class MockHotelsDatabase:
                 logger.info(f" Available cities: {', '.join(self.hotels_data.keys())}")
                 return {
                     "success": False,
-                    "message": f"Hotels for '{city}' not found. Available: Riyadh, Jeddah, Al-Ula, Abha, Dammam",
+                    "message": f"Hotels for '{city}' not found. Available: {', '.join(self.hotels_data.keys())}",
                     "hotels": []
                 }
             
@@ -268,19 +273,12 @@ class MockHotelsDatabase:
     
     def get_hotel_details(self, hotel_id: str) -> Optional[Dict[str, Any]]:
         """Get details for a specific hotel"""
-        try:
-            for city_hotels in self.hotels_data.values():
-                for hotel in city_hotels:
-                    if hotel["id"] == hotel_id:
-                        logger.info(f" Found hotel: {hotel['name']}")
-                        return hotel
-            
+        hotel = self.hotels_by_id.get(hotel_id)
+        if hotel is None:
             logger.warning(f" Hotel '{hotel_id}' not found")
             return None
-            
-        except Exception as e:
-            logger.error(f" Error getting hotel details: {e}")
-            return None
+        logger.info(f" Found hotel: {hotel['name']}")
+        return hotel
     
     def get_all_cities(self) -> List[str]:
         """Get list of all available cities"""
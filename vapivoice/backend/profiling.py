@@ -0,0 +1,242 @@
+"""
+Profiling - Opt-in statistical profiling of individual requests
+A request is profiled when it carries the X-Profile header (matching
+VAPI_PROFILE_TOKEN when one is set) or is picked by VAPI_PROFILE_SAMPLE_RATE.
+A background thread samples the Python stacks of the event loop thread (and of
+any busy worker thread, for sync endpoints) and the result is written as a
+collapsed-stack file that flamegraph.pl and speedscope both open.
+
+The middleware is only installed when VAPI_PROFILING=1, so there is no
+per-request cost at all when profiling is off.
+"""
+
+import os
+import re
+import sys
+import time
+import uuid
+import random
+import logging
+import threading
+from collections import Counter, deque
+from typing import Dict, Any, List, Optional, Callable
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("VAPI_PROFILING", "0").lower() in ("1", "true", "yes")
+
+# Where collapsed-stack files are written
+PROFILE_DIR = os.getenv("VAPI_PROFILE_DIR", "profiles")
+
+# Fraction of requests profiled without the header (0 = header only)
+PROFILE_SAMPLE_RATE = float(os.getenv("VAPI_PROFILE_SAMPLE_RATE", "0"))
+
+# When set, X-Profile must carry this value
+PROFILE_TOKEN = os.getenv("VAPI_PROFILE_TOKEN")
+
+PROFILE_HEADER = b"x-profile"
+
+# Seconds between stack samples
+SAMPLE_INTERVAL_SECONDS = float(os.getenv("VAPI_PROFILE_INTERVAL", "0.005"))
+
+# Captures kept on disk and listed by the admin endpoint
+MAX_CAPTURES = int(os.getenv("VAPI_PROFILE_MAX_CAPTURES", "50"))
+
+# Leaf frames of a parked worker thread - these are not work
+_IDLE_FILES = ("threading.py", "queue.py", "selectors.py", "concurrent/futures/thread.py")
+
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9]+")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", "?")
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}:{frame.f_lineno}"
+
+
+class StackSampler(threading.Thread):
+    """Samples stacks of a target thread (plus busy worker threads) into collapsed-stack counts"""
+
+    def __init__(self, target_thread_id: int, interval: float = SAMPLE_INTERVAL_SECONDS):
+        super().__init__(name="request-profiler", daemon=True)
+        self.target_thread_id = target_thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        while not self._stop_event.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_id != self.target_thread_id and frame.f_code.co_filename.endswith(_IDLE_FILES):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack.append(names.get(thread_id, str(thread_id)))
+                stack.reverse()
+                self.stacks[";".join(stack)] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join(timeout=1.0)
+
+
+class ProfileStore:
+    """Recent captures: collapsed-stack files on disk plus an in-memory index"""
+
+    def __init__(self, directory: str = PROFILE_DIR, max_captures: int = MAX_CAPTURES):
+        self.directory = directory
+        self.captures: deque = deque(maxlen=max_captures)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_id() -> str:
+        return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+    def save(
+        self,
+        capture_id: str,
+        method: str,
+        path: str,
+        duration: float,
+        status: int,
+        sampler: StackSampler
+    ) -> Dict[str, Any]:
+        os.makedirs(self.directory, exist_ok=True)
+        slug = _SAFE_NAME.sub("_", path).strip("_") or "root"
+        filename = os.path.join(self.directory, f"{capture_id}_{method}_{slug}.folded")
+        with open(filename, "w") as f:
+            for stack, count in sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+        capture = {
+            "id": capture_id,
+            "method": method,
+            "path": path,
+            "status": status,
+            "duration_ms": round(duration * 1000, 2),
+            "samples": sampler.samples,
+            "interval_ms": sampler.interval * 1000,
+            "file": filename,
+            "created_at": time.time()
+        }
+        with self._lock:
+            if len(self.captures) == self.captures.maxlen:
+                evicted = self.captures[0]
+                try:
+                    os.remove(evicted["file"])
+                except OSError:
+                    pass
+            self.captures.append(capture)
+        logger.info(f"Profiled {method} {path} in {capture['duration_ms']}ms ({sampler.samples} samples) -> {filename}")
+        return capture
+
+    def list(self) -> List[Dict[str, Any]]:
+        return list(reversed(self.captures))
+
+    def get(self, capture_id: str) -> Optional[Dict[str, Any]]:
+        for capture in self.captures:
+            if capture["id"] == capture_id:
+                return capture
+        return None
+
+    def read_collapsed(self, capture: Dict[str, Any]) -> str:
+        with open(capture["file"]) as f:
+            return f.read()
+
+
+def collapsed_to_speedscope(collapsed: str, name: str, interval_ms: float) -> Dict[str, Any]:
+    """Convert collapsed stacks to a speedscope 'sampled' profile document"""
+    frames: List[Dict[str, str]] = []
+    frame_index: Dict[str, int] = {}
+    samples: List[List[int]] = []
+    weights: List[float] = []
+    for line in collapsed.splitlines():
+        stack, _, count = line.rpartition(" ")
+        if not stack:
+            continue
+        indices = []
+        for label in stack.split(";"):
+            if label not in frame_index:
+                frame_index[label] = len(frames)
+                frames.append({"name": label})
+            indices.append(frame_index[label])
+        samples.append(indices)
+        weights.append(int(count) * interval_ms)
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "milliseconds",
+            "startValue": 0,
+            "endValue": sum(weights),
+            "samples": samples,
+            "weights": weights
+        }],
+        "exporter": "vapivoice.profiling"
+    }
+
+
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling requests selected by header or sampling rate
+
+    Only one request is profiled at a time; the loop thread is shared, so
+    other requests running concurrently also show up in the samples.
+    """
+
+    def __init__(self, app: Any, store: ProfileStore = profile_store, sample_rate: float = PROFILE_SAMPLE_RATE):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self._busy = threading.Lock()
+
+    def _wants_profile(self, scope: Dict[str, Any]) -> bool:
+        for name, value in scope.get("headers", ()):
+            if name == PROFILE_HEADER:
+                if PROFILE_TOKEN:
+                    return value.decode("latin-1") == PROFILE_TOKEN
+                return value not in (b"", b"0", b"false")
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not self._wants_profile(scope) or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = StackSampler(threading.get_ident())
+        capture_id = self.store.new_id()
+        status = [500]
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                # Tell the caller where to fetch the capture
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", capture_id.encode())]
+            await send(message)
+
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            self._busy.release()
+            self.store.save(
+                capture_id, scope.get("method", "GET"), scope.get("path", "/"),
+                time.perf_counter() - start, status[0], sampler
+            )
@@ -0,0 +1,143 @@
+"""
+Quotes - Short-lived price quotes for the flights and hotels shown on cards
+When a search result is rendered as a card, the booking data for it (price
+included) is recorded here under its id - and, for flights, its travel
+date, since the same flight is shown for many dates. create_booking reads
+the quote back, so the amount saved is the one the caller was shown even if the
+catalogue is reloaded in between, and the booking path never re-runs a
+search. Quotes expire after QUOTE_TTL_SECONDS; the booking then falls back
+to the current catalogue entry.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+from backend.metrics import QUOTE_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+QUOTE_TTL_SECONDS = float(os.getenv("VAPI_QUOTE_TTL_SECONDS", "900"))
+
+# Least recently quoted entries are dropped beyond this
+MAX_QUOTES = int(os.getenv("VAPI_MAX_QUOTES", "50000"))
+
+QUOTE_KINDS = ("flight", "hotel")
+
+_PRICE_RE = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+_lookups = {
+    (kind, result): QUOTE_CACHE_LOOKUPS.labels(kind, result)
+    for kind in QUOTE_KINDS
+    for result in ("hit", "miss", "expired")
+}
+
+
+def flight_quote(flight: Dict[str, Any], travel_date: Optional[str] = None) -> Dict[str, Any]:
+    """Booking data for a flight (search result or catalogue entry)"""
+    travel_date = travel_date or flight.get("departure_date") or flight.get("date") or ""
+    origin, destination = flight.get("from", {}), flight.get("to", {})
+    quote = {
+        "flight_id": flight["id"],
+        "airline": flight.get("airline"),
+        "flight_number": flight.get("flight_number"),
+        "route": f"{origin.get('code')}-{destination.get('code')}",
+        "departure": f"{travel_date} {origin.get('time', '')}".strip(),
+        "arrival": f"{travel_date} {destination.get('time', '')}".strip(),
+        "duration": flight.get("duration"),
+        "stops": flight.get("stops", 0),
+        "cabin_class": flight.get("cabin_class"),
+        "price": flight.get("price", 0),
+        "currency": flight.get("currency", "INR")
+    }
+    if flight.get("segments"):
+        quote["segments"] = [segment["id"] for segment in flight["segments"]]
+    return quote
+
+
+def hotel_quote(hotel: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Booking data for a hotel; the price is the lowest nightly rate in its
+    price text ("SAR 800-1,500/night" -> 800 SAR)
+    """
+    text = str(hotel.get("price", ""))
+    match = _PRICE_RE.search(text)
+    currency = text[:match.start()].strip() if match else ""
+    return {
+        "hotel_id": hotel["id"],
+        "hotel_name": hotel.get("name"),
+        "location": hotel.get("location"),
+        "city": hotel.get("city"),
+        "stars": hotel.get("stars"),
+        "price": float(match.group().replace(",", "")) if match else 0,
+        "price_text": text,
+        "currency": currency or "INR"
+    }
+
+
+class QuoteCache:
+    """
+    Booking data by (kind, item id, travel date) with a TTL; hotels and
+    undated flights use an empty date
+
+    One global LRU rather than per call: a booking request carries only the
+    item id, and the same flight shown to two callers has one price anyway.
+    """
+
+    def __init__(self, ttl: float = QUOTE_TTL_SECONDS, max_entries: int = MAX_QUOTES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, kind: str, item_id: str, quote: Dict[str, Any], travel_date: Optional[str] = None) -> None:
+        key = (kind, item_id, travel_date or "")
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, quote)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def quote_flights(self, flights: List[Dict[str, Any]]) -> None:
+        for flight in flights:
+            if flight.get("id"):
+                travel_date = flight.get("departure_date") or flight.get("date")
+                self.put("flight", flight["id"], flight_quote(flight), travel_date)
+
+    def quote_hotels(self, hotels: List[Dict[str, Any]]) -> None:
+        for hotel in hotels:
+            if hotel.get("id"):
+                self.put("hotel", hotel["id"], hotel_quote(hotel))
+
+    def get(self, kind: str, item_id: str, travel_date: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        The quote for an item on a travel date, or None when there is none
+        or it has expired
+        """
+        key = (kind, item_id, travel_date or "")
+        entry = self._entries.get(key)
+        if entry is None:
+            _lookups[(kind, "miss")].inc()
+            return None
+        if entry[0] < time.monotonic():
+            with self._lock:
+                # Only drop it if it wasn't re-quoted meanwhile
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            _lookups[(kind, "expired")].inc()
+            return None
+        _lookups[(kind, "hit")].inc()
+        return dict(entry[1])
+
+    def clear(self) -> int:
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+        return count
@@ -0,0 +1,78 @@
+"""
+Booking References - Collision-free, checksummed booking reference codes
+A reference encodes the booking's sequence number, so two bookings can never
+get the same one. It is 7 Crockford base-32 characters plus 1 check
+character, which keeps the 8-character shape of the old random codes.
+The sequence number is scrambled with an invertible multiply before it is
+encoded, so consecutive bookings don't get look-alike codes. Crockford's
+alphabet leaves out I, L, O and U, so references read out over the phone
+are harder to mishear. The Luhn mod-32 check character catches any single
+mistyped character and most swapped pairs before the database is queried.
+"""
+
+from typing import Optional
+
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+BASE = len(ALPHABET)
+
+PAYLOAD_LENGTH = 7
+REFERENCE_LENGTH = PAYLOAD_LENGTH + 1
+
+# 32^7 sequence numbers; the multiplier is odd, so it is a bijection mod 2^35
+SPACE = BASE ** PAYLOAD_LENGTH
+_MULTIPLIER = 0x5DEECE66D
+_OFFSET = 0x2F3A9C71B
+_INVERSE = pow(_MULTIPLIER, -1, SPACE)
+
+_VALUES = {char: value for value, char in enumerate(ALPHABET)}
+# Spoken/typed look-alikes map onto their Crockford digit
+_VALUES.update({"O": 0, "I": 1, "L": 1})
+
+
+def _luhn_sum(values, double_first: bool) -> int:
+    total = 0
+    factor = 2 if double_first else 1
+    for value in reversed(values):
+        addend = factor * value
+        total += addend // BASE + addend % BASE
+        factor = 3 - factor
+    return total
+
+
+def encode(sequence: int) -> str:
+    """Reference for a sequence number (1 <= sequence < 32^7)"""
+    if not 0 < sequence < SPACE:
+        raise ValueError(f"Booking sequence {sequence} out of range")
+    number = (sequence * _MULTIPLIER + _OFFSET) % SPACE
+    values = []
+    for _ in range(PAYLOAD_LENGTH):
+        number, digit = divmod(number, BASE)
+        values.append(digit)
+    values.reverse()
+    check = (BASE - _luhn_sum(values, double_first=True) % BASE) % BASE
+    return "".join(ALPHABET[value] for value in values) + ALPHABET[check]
+
+
+def normalize(reference: str) -> Optional[str]:
+    """
+    Canonical form of a spoken/typed reference (upper case, no spaces or
+    dashes, look-alikes mapped), or None when its check character is wrong
+    """
+    cleaned = "".join(reference.split()).replace("-", "").upper()
+    if len(cleaned) != REFERENCE_LENGTH or any(char not in _VALUES for char in cleaned):
+        return None
+    values = [_VALUES[char] for char in cleaned]
+    if _luhn_sum(values, double_first=False) % BASE:
+        return None
+    return "".join(ALPHABET[value] for value in values)
+
+
+def decode(reference: str) -> Optional[int]:
+    """Sequence number of a valid reference, else None"""
+    canonical = normalize(reference)
+    if canonical is None:
+        return None
+    number = 0
+    for char in canonical[:PAYLOAD_LENGTH]:
+        number = number * BASE + _VALUES[char]
+    return (number - _OFFSET) * _INVERSE % SPACE
@@ -0,0 +1,327 @@
+"""
+Seat Inventory - Concurrency-safe seat holds, confirmations and releases
+Seats are counted per flight and travel date. A hold takes seats off the
+count at once and gives them back unless it is confirmed (turned into a
+sale by create_booking) or released before it expires. Counts are guarded
+by striped locks - one of LOCK_STRIPES locks picked by hashing the flight
+key - so bookings on different flights don't queue behind each other while
+check-and-decrement on one flight stays atomic. Expiry uses a hashed timer
+wheel that is advanced by the operations themselves, so no reaper thread
+is needed and an expired hold costs O(1) to find.
+
+Counts live in this process (the backend runs a single uvicorn worker);
+the starting count for a flight comes from its seats_available.
+"""
+
+import os
+import math
+import time
+import secrets
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Callable
+
+from backend.metrics import SEAT_HOLD_EVENTS
+
+logger = logging.getLogger(__name__)
+
+# How long a hold keeps its seats without being confirmed
+HOLD_TTL_SECONDS = float(os.getenv("VAPI_SEAT_HOLD_SECONDS", "600"))
+
+LOCK_STRIPES = int(os.getenv("VAPI_SEAT_LOCK_STRIPES", "64"))
+
+# Timer wheel resolution and size (one rotation = TICK * SLOTS seconds;
+# longer holds just wait extra rotations)
+WHEEL_TICK_SECONDS = 1.0
+WHEEL_SLOTS = 512
+
+MAX_SEATS_PER_HOLD = 9
+
+_HELD = SEAT_HOLD_EVENTS.labels("held")
+_SOLD_OUT = SEAT_HOLD_EVENTS.labels("sold_out")
+_CONFIRMED = SEAT_HOLD_EVENTS.labels("confirmed")
+_RELEASED = SEAT_HOLD_EVENTS.labels("released")
+_EXPIRED = SEAT_HOLD_EVENTS.labels("expired")
+
+
+def flight_keys(flight_id: str, travel_date: Optional[str]) -> List[str]:
+    """
+    Inventory keys for a flight id; a connection ("A+B") holds every
+    segment, all keyed by the itinerary's travel date
+    """
+    return [f"{segment}@{travel_date or ''}" for segment in flight_id.split("+")]
+
+
+class TimerWheel:
+    """
+    Hashed timer wheel: schedule and cancel are O(1); advance visits only
+    the slots for the ticks that have passed since the last call
+    """
+
+    def __init__(self, tick: float = WHEEL_TICK_SECONDS, slots: int = WHEEL_SLOTS, now: Optional[float] = None):
+        self.tick = tick
+        self.slots: List[Dict[str, float]] = [{} for _ in range(slots)]
+        self._where: Dict[str, int] = {}
+        self._current = int((time.monotonic() if now is None else now) / tick)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def schedule(self, key: str, deadline: float) -> None:
+        with self._lock:
+            # Rounded up, so the slot is only visited once the deadline has
+            # passed; never into a slot already passed (a whole rotation's wait)
+            slot = max(math.ceil(deadline / self.tick), self._current + 1) % len(self.slots)
+            self.slots[slot][key] = deadline
+            self._where[key] = slot
+
+    def cancel(self, key: str) -> None:
+        with self._lock:
+            slot = self._where.pop(key, None)
+            if slot is not None:
+                self.slots[slot].pop(key, None)
+
+    def advance(self, now: Optional[float] = None) -> List[str]:
+        """Keys whose deadline has passed; they are removed from the wheel"""
+        now = time.monotonic() if now is None else now
+        target = int(now / self.tick)
+        if target <= self._current:
+            return []
+        expired = []
+        with self._lock:
+            # More than one rotation behind: every slot is visited once
+            first = max(self._current + 1, target - len(self.slots) + 1)
+            for tick in range(first, target + 1):
+                slot = self.slots[tick % len(self.slots)]
+                if not slot:
+                    continue
+                due = [key for key, deadline in slot.items() if deadline <= now]
+                for key in due:
+                    del slot[key]
+                    del self._where[key]
+                expired.extend(due)
+            self._current = target
+        return expired
+
+
+class SeatHold:
+    __slots__ = ("hold_id", "flight_id", "travel_date", "keys", "seats", "expires_at", "created_at")
+
+    def __init__(self, hold_id: str, flight_id: str, travel_date: Optional[str], keys: List[str], seats: int, expires_at: float):
+        self.hold_id = hold_id
+        self.flight_id = flight_id
+        self.travel_date = travel_date
+        self.keys = keys
+        self.seats = seats
+        self.expires_at = expires_at
+        self.created_at = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "hold_id": self.hold_id,
+            "flight_id": self.flight_id,
+            "travel_date": self.travel_date,
+            "seats": self.seats,
+            "expires_in_seconds": max(0, round(self.expires_at - time.monotonic()))
+        }
+
+
+class SeatInventory:
+    """
+    Seat counts per flight key with atomic hold / confirm / release
+
+    capacity(flight_id) gives the starting seat count of a segment (None
+    for unknown flights); it is read the first time a key is touched.
+    """
+
+    def __init__(
+        self,
+        capacity: Callable[[str], Optional[int]],
+        stripes: int = LOCK_STRIPES,
+        hold_ttl: float = HOLD_TTL_SECONDS,
+        wheel: Optional[TimerWheel] = None
+    ):
+        self.capacity = capacity
+        self.hold_ttl = hold_ttl
+        self._locks = [threading.Lock() for _ in range(max(1, stripes))]
+        self._available: Dict[str, int] = {}
+        self._held: Dict[str, int] = {}
+        self._sold: Dict[str, int] = {}
+        self._holds: Dict[str, SeatHold] = {}
+        self._wheel = wheel if wheel is not None else TimerWheel()
+
+    def _stripes(self, keys: List[str]) -> List[threading.Lock]:
+        # Acquire in one global order so multi-segment holds can't deadlock
+        return [self._locks[i] for i in sorted({hash(key) % len(self._locks) for key in keys})]
+
+    def _acquire(self, keys: List[str]) -> List[threading.Lock]:
+        locks = self._stripes(keys)
+        for lock in locks:
+            lock.acquire()
+        return locks
+
+    @staticmethod
+    def _release_locks(locks: List[threading.Lock]) -> None:
+        for lock in reversed(locks):
+            lock.release()
+
+    def _load(self, key: str) -> Optional[int]:
+        """Seats left for key (caller holds its stripe); None if the flight is unknown"""
+        available = self._available.get(key)
+        if available is None:
+            seats = self.capacity(key.rsplit("@", 1)[0])
+            if seats is None:
+                return None
+            available = self._available[key] = max(0, int(seats))
+        return available
+
+    def expire_due(self, now: Optional[float] = None) -> int:
+        """Release holds past their expiry; returns how many"""
+        expired = 0
+        for hold_id in self._wheel.advance(now):
+            if self._give_back(hold_id, _EXPIRED):
+                expired += 1
+        if expired:
+            logger.info(f"Released {expired} expired seat holds")
+        return expired
+
+    def hold(self, flight_id: str, travel_date: Optional[str] = None, seats: int = 1, ttl: Optional[float] = None) -> Dict[str, Any]:
+        """Take seats off the count for ttl seconds (HOLD_TTL_SECONDS by default)"""
+        if not 1 <= seats <= MAX_SEATS_PER_HOLD:
+            return {"success": False, "error": f"Seats per hold must be between 1 and {MAX_SEATS_PER_HOLD}"}
+        self.expire_due()
+        keys = flight_keys(flight_id, travel_date)
+        locks = self._acquire(keys)
+        try:
+            counts = [self._load(key) for key in keys]
+            if None in counts:
+                return {"success": False, "error": "Flight not found"}
+            if min(counts) < seats:
+                _SOLD_OUT.inc()
+                return {"success": False, "error": "Not enough seats left", "seats_left": min(counts)}
+            for key in keys:
+                self._available[key] -= seats
+                self._held[key] = self._held.get(key, 0) + seats
+            hold = SeatHold(secrets.token_hex(8), flight_id, travel_date, keys, seats,
+                            time.monotonic() + (self.hold_ttl if ttl is None else ttl))
+            self._holds[hold.hold_id] = hold
+            seats_left = min(counts) - seats
+        finally:
+            self._release_locks(locks)
+        self._wheel.schedule(hold.hold_id, hold.expires_at)
+        _HELD.inc()
+        return {"success": True, **hold.to_dict(), "seats_left": seats_left}
+
+    def confirm(
+        self,
+        hold_id: str,
+        flight_id: Optional[str] = None,
+        travel_date: Optional[str] = None,
+        seats: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Turn a live hold into sold seats. When flight_id is given, the hold
+        must also be for that flight, travel_date and (if given) seat count;
+        a hold that doesn't match is left in place.
+        """
+        self.expire_due()
+        hold = self._holds.get(hold_id)
+        if hold is None:
+            return {"success": False, "error": "Seat hold not found or expired"}
+        expired = False
+        locks = self._acquire(hold.keys)
+        try:
+            # Re-check under the lock: expiry or a release may have won the race
+            if self._holds.get(hold_id) is not hold:
+                return {"success": False, "error": "Seat hold not found or expired"}
+            if flight_id is not None and (hold.flight_id, hold.travel_date) != (flight_id, travel_date):
+                return {"success": False, "error": "Seat hold is for a different flight or date"}
+            if seats is not None and hold.seats != seats:
+                return {"success": False, "error": f"Seat hold is for {hold.seats} seats, not {seats}"}
+            del self._holds[hold_id]
+            # Past its expiry but not yet swept by the wheel: it can't be sold
+            expired = hold.expires_at < time.monotonic()
+            for key in hold.keys:
+                self._held[key] -= hold.seats
+                if expired:
+                    self._available[key] += hold.seats
+                else:
+                    self._sold[key] = self._sold.get(key, 0) + hold.seats
+        finally:
+            self._release_locks(locks)
+        self._wheel.cancel(hold_id)
+        if expired:
+            _EXPIRED.inc()
+            return {"success": False, "error": "Seat hold not found or expired"}
+        _CONFIRMED.inc()
+        return {"success": True, "hold_id": hold_id, "flight_id": hold.flight_id, "travel_date": hold.travel_date, "seats": hold.seats}
+
+    def release(self, hold_id: str) -> Dict[str, Any]:
+        """Give a hold's seats back before it expires"""
+        if not self._give_back(hold_id, _RELEASED):
+            return {"success": False, "error": "Seat hold not found or expired"}
+        self._wheel.cancel(hold_id)
+        return {"success": True, "hold_id": hold_id}
+
+    def _give_back(self, hold_id: str, outcome: Any) -> bool:
+        hold = self._holds.get(hold_id)
+        if hold is None:
+            return False
+        locks = self._acquire(hold.keys)
+        try:
+            if self._holds.pop(hold_id, None) is None:
+                return False
+            for key in hold.keys:
+                self._available[key] += hold.seats
+                self._held[key] -= hold.seats
+        finally:
+            self._release_locks(locks)
+        outcome.inc()
+        return True
+
+    def book(self, flight_id: str, travel_date: Optional[str] = None, seats: int = 1) -> Dict[str, Any]:
+        """Hold and confirm in one step (bookings made without a prior hold)"""
+        held = self.hold(flight_id, travel_date, seats)
+        if not held["success"]:
+            return held
+        return self.confirm(held["hold_id"])
+
+    def refund(self, flight_id: str, travel_date: Optional[str] = None, seats: int = 1) -> None:
+        """Return sold seats, e.g. when the booking they were confirmed for failed to save"""
+        keys = flight_keys(flight_id, travel_date)
+        locks = self._acquire(keys)
+        try:
+            for key in keys:
+                if key in self._available:
+                    self._available[key] += seats
+                    self._sold[key] = self._sold.get(key, 0) - seats
+        finally:
+            self._release_locks(locks)
+
+    def availability(self, flight_id: str, travel_date: Optional[str] = None) -> Dict[str, Any]:
+        self.expire_due()
+        keys = flight_keys(flight_id, travel_date)
+        locks = self._acquire(keys)
+        try:
+            counts = [self._load(key) for key in keys]
+            if None in counts:
+                return {"success": False, "error": "Flight not found"}
+            return {
+                "success": True,
+                "flight_id": flight_id,
+                "travel_date": travel_date,
+                "seats_available": min(counts),
+                "seats_held": max(self._held.get(key, 0) for key in keys),
+                "seats_sold": max(self._sold.get(key, 0) for key in keys)
+            }
+        finally:
+            self._release_locks(locks)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "flights_tracked": len(self._available),
+            "active_holds": len(self._holds),
+            "scheduled_expiries": len(self._wheel),
+            "lock_stripes": len(self._locks)
+        }
@@ -3,17 +3,22 @@ FastAPI Server - Main API server for the voice bot
 Handles webhooks from Vapi and provides REST endpoints for flights, hotels, and bookings
 """
 
+import io
 import os
+import re
 import sys
+import hmac
 import json
 import time
-from fastapi import FastAPI, Request, HTTPException, BackgroundTasks
+import asyncio
+import tempfile
+from fastapi import FastAPI, Request, Response, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import Dict, Any, List, Optional
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, Any, List, Optional, Iterator
 import logging
-from datetime import datetime
+from datetime import datetime, date
 
 # Setup logging first
 logging.basicConfig(level=logging.INFO)
@@ -22,27 +27,36 @@ logger = logging.getLogger(__name__)
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from backend.bookings import BookingService
-from backend.email_service import smtp_email_service
+from backend.bookings import BookingService, BULK_TOKEN
+from backend.booking_io import CONTENT_TYPES as BOOKING_CONTENT_TYPES, check_format as check_booking_format
+from backend.seat_inventory import SeatInventory, MAX_SEATS_PER_HOLD
+from backend.quotes import QuoteCache
+from backend.email_service import smtp_email_service, email_enqueued, email_dequeued, delivery_status
+from backend.date_parser import resolve_spoken_date, find_spoken_dates
+from backend.webhook_payload import read_webhook_payload, PayloadTooLargeError
+from backend.json_response import FastJSONResponse, JSONFragment, encode_json
+from backend.call_sessions import CallSessionStore, CARD_KINDS
+from backend.metrics import (
+    MetricsMiddleware, Gauge, CARD_CACHE_LOOKUPS, VAPI_WEBHOOK_EVENTS,
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, render_metrics
+)
+from backend.lifecycle import LazyService, lifespan, readiness, is_initialized
+from backend.health import (
+    health_checker, grade, worst, PASS, WARN, FAIL,
+    CHECK_TIMEOUT_SECONDS, DB_LATENCY_MS, EMAIL_QUEUE_DEPTH, CACHE_FILL_RATIO
+)
+from backend.tracing import tracer, memory_exporter, current_span, set_call_id, TracingMiddleware, TRACING_ENABLED
+from backend.loop_monitor import loop_monitor, LoopMonitorMiddleware, LOOP_MONITOR_ENABLED
+from backend.profiling import (
+    ProfilingMiddleware, profile_store, collapsed_to_speedscope, PROFILING_ENABLED, PROFILE_TOKEN
+)
 # from backend.openai_service import openai_service  # Disabled: Using Vapi for AI responses instead
 openai_service = None  # Placeholder - not needed for Vapi webhook
 
-# Import Mock Flights Database (Fallback)
-try:
-    from backend.mock_flights import MockFlightsDatabase
-    mock_db_available = True
-except ImportError:
-    mock_db_available = False
-    logger.error("Mock Flights Database not available - REQUIRED!")
-
-# Import Mock Hotels Database
-try:
-    from backend.mock_hotels import MockHotelsDatabase
-    mock_hotels_db_available = True
-    logger.info("Mock Hotels Database available")
-except ImportError:
-    mock_hotels_db_available = False
-    logger.error("Mock Hotels Database not available!")
+# Reloadable snapshots over the mock / file-backed databases
+from backend.catalogue import FlightCatalogue, HotelCatalogue, RELOAD_TOKEN as CATALOGUE_TOKEN
+from backend.itineraries import RANK_BY as ITINERARY_RANKINGS
+from backend.fare_calendar import calendar_window
 
 # MCP bridge removed - tools configured directly in Vapi dashboard
 
@@ -50,14 +64,32 @@ except ImportError:
 app = FastAPI(
     title="Travel.ai Voice Bot API",
     description="Backend API for Vapi voice bot integration",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan  # Builds services in the background after startup
 )
 
-# In-memory cache for flight cards (call_id -> cards)
-flight_cards_cache = {}
+# Per-call state (cards, live transcript, summary) for concurrent calls
+call_sessions = CallSessionStore()
 
-# In-memory cache for hotel cards (call_id -> cards)
-hotel_cards_cache = {}
+# Change versions of polled entries, exposed as ETags:
+# ("flight"|"hotel"|"summary", call_id), with call_id "latest" tracking the newest entry
+cache_versions = call_sessions.versions
+
+
+async def _conditional_response(request: Request, key: tuple, wait: float = 0) -> Optional[Response]:
+    """
+    Handle If-None-Match for a polled entry
+
+    Returns a bodiless 304 when the client's ETag is still current. With
+    wait > 0 the request is parked until the entry changes (or the wait
+    expires) first. Returns None when the caller should send the full body.
+    """
+    if not cache_versions.matches(key, request.headers.get("if-none-match")):
+        return None
+    if wait > 0 and await cache_versions.wait_for_change(key, cache_versions.version(key), wait):
+        return None
+    return Response(status_code=304, headers={"ETag": cache_versions.etag(key)})
 
 # CORS middleware
 app.add_middleware(
@@ -66,27 +98,103 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+# Opt-in request profiling (X-Profile header or sampling); not installed at all when off
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+    logger.info(f"Request profiling enabled - captures in {profile_store.directory}")
+
+# Root span per request; stage spans nest under it (see /debug/traces)
+if TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
+# Lets the loop watchdog name the route that blocked the event loop
+if LOOP_MONITOR_ENABLED:
+    app.add_middleware(LoopMonitorMiddleware)
+
+# Per-route / per-tool latency histograms (outermost, so it times everything)
+app.add_middleware(MetricsMiddleware)
+
+# Card poll outcomes, bound once per (kind, result)
+_card_lookups = {
+    (kind, result): CARD_CACHE_LOOKUPS.labels(kind, result)
+    for kind in CARD_KINDS
+    for result in ("hit", "miss", "not_modified")
+}
+
+
+def _card_hit_ratio() -> Dict[str, float]:
+    ratios = {}
+    for kind in CARD_KINDS:
+        hits = _card_lookups[(kind, "hit")].value + _card_lookups[(kind, "not_modified")].value
+        total = hits + _card_lookups[(kind, "miss")].value
+        ratios[kind] = hits / total if total else 0.0
+    return ratios
+
+
+# Store sizes are read at scrape time
+Gauge("card_cache_entries", "Calls holding cached cards, by kind", call_sessions.card_counts, ("kind",))
+Gauge("card_cache_hit_ratio", "Share of card polls served from cache (including 304s), by kind", _card_hit_ratio, ("kind",))
+Gauge("call_sessions_active", "Call sessions held in memory", lambda: len(call_sessions))
+Gauge("call_summaries_stored", "Call sessions holding an end-of-call summary", call_sessions.summary_count)
+
 # Initialize services - Use Mock databases only
-if mock_db_available:
-    logger.info("Using MOCK FLIGHTS DATABASE")
-    logger.info("Available routes: BLR->JED, BLR->RUH, BLR->DXB, BLR->CCU, MAA->DXB")
-    flight_api = MockFlightsDatabase()
-else:
-    logger.error("CRITICAL: Mock Flights Database not available!")
-    raise ImportError("MockFlightsDatabase must be available")
+logger.info("Using MOCK FLIGHTS DATABASE")
+logger.info("Available routes: BLR->JED, BLR->RUH, BLR->DXB, BLR->CCU, MAA->DXB")
+# VAPI_FLIGHT_INVENTORY loads flights from a file (.vfi columnar, .json, .jsonl)
+flight_api = LazyService("flight_api", FlightCatalogue)
 
 # Initialize hotels database - Use Mock database only
-if mock_hotels_db_available:
-    logger.info("Using MOCK HOTELS DATABASE")
-    logger.info("Available cities: Riyadh, Jeddah, Al-Ula, Abha, Dammam")
-    hotel_api = MockHotelsDatabase()
-else:
-    logger.error("CRITICAL: Mock Hotels Database not available!")
-    raise ImportError("MockHotelsDatabase must be available")
-
-booking_service = BookingService()
+logger.info("Using MOCK HOTELS DATABASE")
+logger.info("Available cities: Riyadh, Jeddah, Al-Ula, Abha, Dammam")
+# VAPI_HOTEL_CATALOGUE loads hotels from a JSON file
+hotel_api = LazyService("hotel_api", HotelCatalogue)
+
+# Live seat counts start from each flight's seats_available
+seat_inventory = SeatInventory(capacity=lambda flight_id: (flight_api.get_flight(flight_id) or {}).get("seats_available"))
+
+# Prices of the flights/hotels on the cards shown, for create_booking
+quote_cache = QuoteCache()
+
+# SQLite DDL runs on first use / warm-up, not at import
+booking_service = LazyService("booking_service", lambda: BookingService(
+    seats=seat_inventory, flights=flight_api, hotels=hotel_api, quotes=quote_cache
+))
+
+
+# Dependency checks behind /ready and /health (event-loop lag is built in)
+@health_checker.check("bookings_db")
+async def _check_bookings_db() -> Dict[str, Any]:
+    if not is_initialized(booking_service):
+        return {"status": WARN, "detail": "not initialized yet"}
+    latency_ms = await asyncio.to_thread(booking_service.ping, CHECK_TIMEOUT_SECONDS) * 1000
+    return {"status": grade(latency_ms, DB_LATENCY_MS), "latency_ms": round(latency_ms, 2)}
+
+
+@health_checker.check("email")
+async def _check_email() -> Dict[str, Any]:
+    state = delivery_status()
+    status = grade(state["pending"], EMAIL_QUEUE_DEPTH)
+    # SMTP trouble is reported but only the backlog fails readiness:
+    # calls are still served when confirmation emails can't go out
+    if state["last_result"] not in (None, "sent"):
+        status = worst(status, WARN)
+    return {"status": status, **state}
+
+
+@health_checker.check("card_cache")
+async def _check_card_cache() -> Dict[str, Any]:
+    sessions = len(call_sessions)
+    fill = sessions / call_sessions.max_sessions if call_sessions.max_sessions else 0.0
+    return {
+        "status": grade(fill, CACHE_FILL_RATIO),
+        "sessions": sessions,
+        "max_sessions": call_sessions.max_sessions,
+        "fill_ratio": round(fill, 4),
+        "card_entries": call_sessions.card_counts()
+    }
 
 
 # Rich Link Formatter - Generate Google Maps links
@@ -165,6 +273,7 @@ def rich_link_formatter(
 
 
 # Helper function to generate structured summary
+@tracer.traced("generate_structured_summary")
 def generate_structured_summary(transcript: List[Dict], booking_details: Optional[Dict] = None) -> str:
     """
     Generate a structured summary in the format:
@@ -183,8 +292,6 @@ def generate_structured_summary(transcript: List[Dict], booking_details: Optiona
                 return generate_summary_from_booking(booking_details)
             return "No conversation data available. Please complete a call to generate a summary."
         
-        import re
-        
         # Extract customer name from conversation
         customer_name = "Traveler"  # Default if not found
         
@@ -529,19 +636,22 @@ def generate_summary_from_booking(booking_details: Dict) -> str:
 
 
 # Helper function to extract booking details from conversation
-def extract_booking_from_transcript(transcript: List[Dict], summary: str) -> Optional[Dict]:
+@tracer.traced("extract_booking_from_transcript")
+def extract_booking_from_transcript(
+    transcript: List[Dict],
+    summary: str,
+    reference_date: Optional[date] = None
+) -> Optional[Dict]:
     """
     Extract booking details from the conversation transcript and summary.
     Looks for flight booking information in the assistant's messages.
+    Relative dates ("next Friday") are resolved against reference_date (the call date).
     """
     try:
         if not transcript:
             logger.warning(" Empty transcript provided to extract_booking_from_transcript")
             return None
         
-        import re
-        from datetime import datetime
-        
         booking_info = {
             "airline": None,
             "flight_number": None,
@@ -610,20 +720,9 @@ def extract_booking_from_transcript(transcript: List[Dict], summary: str) -> Opt
                     booking_info["destination"] = location_match.group(2).strip()
                     break
         
-        # Extract dates - handle multiple formats
-        # Patterns: "March 15", "15th March", "2025-03-15", "December fifteenth 2025", "15/03/2025"
-        date_patterns = [
-            r"\b(\d{1,2}(?:st|nd|rd|th)?\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)(?:\s+\d{4})?)\b",
-            r"\b((?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2}(?:st|nd|rd|th)?(?:\s+\d{4})?)\b",
-            r"\b(\d{2}/\d{2}/\d{4})\b",
-            r"\b(\d{4}-\d{2}-\d{2})\b",
-            r"\b((?:January|February|March|April|May|June|July|August|September|October|November|December)\s+(?:first|second|third|fourth|fifth|sixth|seventh|eighth|ninth|tenth|eleventh|twelfth|thirteenth|fourteenth|fifteenth|sixteenth|seventeenth|eighteenth|nineteenth|twentieth|twenty-first|twenty-second|twenty-third|twenty-fourth|twenty-fifth|twenty-sixth|twenty-seventh|twenty-eighth|twenty-ninth|thirtieth|thirty-first)(?:\s+\d{4})?)\b"
-        ]
-        
-        all_dates = []
-        for pattern in date_patterns:
-            found_dates = re.findall(pattern, conversation_text, re.IGNORECASE)
-            all_dates.extend(found_dates)
+        # Extract dates - resolved to ISO against the call date, in order of mention
+        # ("March 15", "15th March", "2025-03-15", "December fifteenth 2025", "15/03/2025", "next Friday")
+        all_dates = [iso for _, iso in find_spoken_dates(conversation_text, reference=reference_date)]
         
         if len(all_dates) >= 1:
             booking_info["departure_date"] = all_dates[0]
@@ -734,6 +833,15 @@ class BookingRequest(BaseModel):
     customer_phone: str
     customer_email: Optional[str] = None
     passenger_details: Optional[List[Dict]] = None
+    hold_id: Optional[str] = None
+    travel_date: Optional[str] = None
+    idempotency_key: Optional[str] = None
+
+
+class SeatHoldRequest(BaseModel):
+    flight_id: str
+    travel_date: Optional[str] = None
+    seats: int = Field(1, ge=1, le=MAX_SEATS_PER_HOLD)
 
 
 class ConversationTranscriptRequest(BaseModel):
@@ -755,10 +863,6 @@ class CallSummaryEmailRequest(BaseModel):
     booking_details: Optional[Dict] = None
 
 
-# Store call summaries in memory (in production, use Redis or database)
-call_summaries = {}
-latest_call_summary = None  # Store the most recent call summary as fallback
-
 # Helper function for email sending with error handling
 def _send_email_with_error_handling(
     user_email: str,
@@ -792,6 +896,8 @@ def _send_email_with_error_handling(
     except Exception as e:
         logger.error(f"Exception in email sending task: {e}", exc_info=True)
         logger.error(f"Email: {user_email}, Name: {user_name}")
+    finally:
+        email_dequeued()
 
 # API Endpoints
 
@@ -815,13 +921,23 @@ async def root():
 
 
 @app.get("/api/call-summary/{call_id}")
-async def get_call_summary(call_id: str):
-    """Get the call summary for a specific call ID"""
+async def get_call_summary(call_id: str, request: Request, wait: float = 0):
+    """
+    Get the call summary for a specific call ID
+    Supports If-None-Match (304) and long-polling with ?wait=<seconds>
+    """
     try:
-        if call_id in call_summaries:
-            return call_summaries[call_id]
+        key = ("summary", call_id)
+        not_modified = await _conditional_response(request, key, wait)
+        if not_modified is not None:
+            return not_modified
+        headers = {"ETag": cache_versions.etag(key)}
+        
+        summary = call_sessions.get_summary(call_id)
+        if summary is not None:
+            return FastJSONResponse(content=summary, headers=headers)
         else:
-            raise HTTPException(status_code=404, detail="Call summary not found")
+            raise HTTPException(status_code=404, detail="Call summary not found", headers=headers)
     except HTTPException:
         raise
     except Exception as e:
@@ -830,13 +946,23 @@ async def get_call_summary(call_id: str):
 
 
 @app.get("/api/call-summary-latest")
-async def get_latest_call_summary():
-    """Get the most recent call summary (fallback when call ID is not available)"""
+async def get_latest_call_summary(request: Request, wait: float = 0):
+    """
+    Get the most recent call summary (fallback when call ID is not available)
+    Supports If-None-Match (304) and long-polling with ?wait=<seconds>
+    """
     try:
+        key = ("summary", "latest")
+        not_modified = await _conditional_response(request, key, wait)
+        if not_modified is not None:
+            return not_modified
+        headers = {"ETag": cache_versions.etag(key)}
+        
+        latest_call_summary = call_sessions.latest_summary
         if latest_call_summary:
-            return latest_call_summary
+            return FastJSONResponse(content=latest_call_summary, headers=headers)
         else:
-            raise HTTPException(status_code=404, detail="No call summary available yet")
+            raise HTTPException(status_code=404, detail="No call summary available yet", headers=headers)
     except HTTPException:
         # Let HTTPException pass through (404 is expected)
         raise
@@ -845,25 +971,175 @@ async def get_latest_call_summary():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/live")
+async def liveness_check():
+    """Liveness probe: the process is up and the event loop answers"""
+    return {"status": "alive", "uptime_seconds": readiness()["uptime_seconds"]}
+
+
 @app.get("/health")
 async def health_check():
-    """Detailed health check"""
+    """
+    Detailed health report: service warm-up plus dependency checks
+    (bookings DB, email delivery, card cache, event-loop lag), cached for a
+    few seconds. Always 200 - use /ready for routing decisions.
+    """
+    report = await health_checker.run()
+    state = readiness()
+    status = {PASS: "healthy", WARN: "degraded", FAIL: "unhealthy"}[report["status"]]
+    return FastJSONResponse(content={
+        "status": status if state["ready"] else "starting",
+        "checks": report["checks"],
+        "checked_at": report["checked_at"],
+        "services": state["services"]
+    })
+
+
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: 200 once every lazily-built service is initialized
+    (by the startup warm-up or first use) and no dependency check fails,
+    503 otherwise
+    """
+    state = readiness()
+    report = await health_checker.run()
+    state["checks"] = report["checks"]
+    state["ready"] = state["ready"] and report["status"] != FAIL
+    return FastJSONResponse(content=state, status_code=200 if state["ready"] else 503)
+
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics: route/tool latency histograms, webhook event counts,
+    card cache size and hit ratio, session/summary store sizes, SMTP and
+    SQLite timings
+    """
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/debug/blocking")
+async def blocking_calls(limit: int = 20):
+    """
+    Event-loop lag percentiles and blocking calls caught by the watchdog:
+    per-route totals with the worst captured stack, plus recent events
+    """
+    return FastJSONResponse(content=loop_monitor.report(limit))
+
+
+_catalogues = {"flights": flight_api, "hotels": hotel_api}
+
+
+def _check_admin_token(request: Request, token: Optional[str], header: str, setting: str) -> None:
+    """
+    Admin endpoints are refused while their token setting is unset, and
+    otherwise need the token in the given header
+    """
+    if not token:
+        raise HTTPException(status_code=403, detail=f"Disabled ({setting} is not set)")
+    if not hmac.compare_digest(request.headers.get(header, ""), token):
+        raise HTTPException(status_code=403, detail=f"Invalid {header} header")
+
+
+@app.get("/admin/catalogue")
+async def catalogue_status():
+    """Current flight/hotel snapshot versions (services not yet built show as not loaded)"""
+    return FastJSONResponse(content={
+        kind: catalogue.status() if is_initialized(catalogue) else {"loaded": False}
+        for kind, catalogue in _catalogues.items()
+    })
+
+
+@app.post("/admin/catalogue/reload")
+async def reload_catalogue(request: Request, kind: str = "all"):
+    """
+    Rebuild flights and/or hotels (?kind=flights|hotels|all) from their data
+    files in a worker thread and swap the snapshot in; searches keep being
+    served from the previous snapshot until the swap
+    """
+    # Each reload re-parses the data files and rebuilds every index
+    _check_admin_token(request, CATALOGUE_TOKEN, "x-catalogue-token", "VAPI_CATALOGUE_TOKEN")
+    kinds = list(_catalogues) if kind == "all" else [kind]
+    if any(k not in _catalogues for k in kinds):
+        raise HTTPException(status_code=400, detail=f"kind must be one of: all, {', '.join(_catalogues)}")
+    results = {k: await asyncio.to_thread(_catalogues[k].reload) for k in kinds}
+    status_code = 200 if all(r["success"] for r in results.values()) else 500
+    return FastJSONResponse(content=results, status_code=status_code)
+
+
+@app.get("/debug/traces")
+async def list_traces(min_ms: float = 0, limit: int = 50, call_id: Optional[str] = None):
+    """
+    Recent request traces, slowest first
+    Filter with ?min_ms= (root duration) and ?call_id=
+    """
+    rows = [
+        row for row in memory_exporter.summaries()
+        if row["duration_ms"] >= min_ms and (call_id is None or row["call_id"] == call_id)
+    ]
+    rows.sort(key=lambda row: row["duration_ms"], reverse=True)
+    return FastJSONResponse(content={
+        "enabled": tracer.enabled,
+        "count": len(rows),
+        "traces": rows[:limit]
+    })
+
+
+@app.get("/debug/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """
+    All spans of one trace, in start order, with their depth in the tree
+    """
+    spans = memory_exporter.get(trace_id)
+    if spans is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    spans.sort(key=lambda span: span["start_ns"])
+    depth = {}
+    for span in spans:
+        span["depth"] = depth.get(span["parent_id"], -1) + 1
+        depth[span["span_id"]] = span["depth"]
+    return FastJSONResponse(content={"trace_id": trace_id, "spans": spans})
+
+
+def _check_profile_access(request: Request) -> None:
+    """Profiles expose code paths - guard them with VAPI_PROFILE_TOKEN when set"""
+    if PROFILE_TOKEN and request.headers.get("x-profile") != PROFILE_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid profile token")
+
+
+@app.get("/admin/profiles")
+async def list_profiles(request: Request):
+    """
+    List recent request profiles (newest first)
+    Send X-Profile: 1 (or the configured token) on a request to capture one
+    """
+    _check_profile_access(request)
+    return FastJSONResponse(content={
+        "enabled": PROFILING_ENABLED,
+        "profiles": profile_store.list()
+    })
+
+
+@app.get("/admin/profiles/{capture_id}")
+async def get_profile(capture_id: str, request: Request, format: str = "collapsed"):
+    """
+    Download a profile as collapsed stacks (flamegraph.pl / speedscope)
+    or as a speedscope JSON document with ?format=speedscope
+    """
+    _check_profile_access(request)
+    capture = profile_store.get(capture_id)
+    if capture is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
     try:
-        return {
-            "status": "healthy",
-            "services": {
-                "vapi": "connected",
-                "flight_api": "ready",
-                "hotel_api": "ready",
-                "booking_service": "ready"
-            }
-        }
-    except Exception as e:
-        logger.error(f"Error in health check: {e}", exc_info=True)
-        return {
-            "status": "error",
-            "error": str(e)
-        }
+        collapsed = profile_store.read_collapsed(capture)
+    except OSError:
+        raise HTTPException(status_code=404, detail="Profile file no longer exists")
+
+    if format == "speedscope":
+        name = f"{capture['method']} {capture['path']} ({capture['duration_ms']}ms)"
+        return FastJSONResponse(content=collapsed_to_speedscope(collapsed, name, capture["interval_ms"]))
+    return Response(content=collapsed, media_type="text/plain")
 
 
 @app.post("/test-booking-email")
@@ -926,6 +1202,87 @@ async def test_booking_email():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _round_trip_cards(itineraries: List[Dict[str, Any]], limit: int = 6) -> List[Dict[str, Any]]:
+    """Vapi cards for round-trip itineraries (one card per outbound/return pair)"""
+    cards = []
+    for itinerary in itineraries[:limit]:
+        outbound, inbound = itinerary["outbound"], itinerary["return"]
+        cards.append({
+            "title": f"{outbound.get('origin')} ⇄ {outbound.get('destination')}",
+            "subtitle": f"{outbound.get('airline')} {outbound.get('flight_number')} / {inbound.get('airline')} {inbound.get('flight_number')}",
+            "footer": (
+                f" Out {outbound.get('departure_date')} {outbound.get('departure_time')} |  "
+                f"Back {inbound.get('departure_date')} {inbound.get('departure_time')} |  ₹{itinerary['total_price']:,} total"
+            ),
+            "buttons": [
+                {
+                    "text": "Book Now ",
+                    "url": f"https://booking.example.com/round-trip/{outbound.get('id', 'default')}/{inbound.get('id', 'default')}"
+                }
+            ]
+        })
+    return cards
+
+
+def _quote_flight_cards(flight_results: Dict[str, Any], limit: int = 6) -> None:
+    """Record the prices of the flights on the cards just built (both legs of round trips)"""
+    itineraries = flight_results.get("itineraries") or []
+    if itineraries:
+        flights = [flight for itinerary in itineraries[:limit] for flight in (itinerary["outbound"], itinerary["return"])]
+    else:
+        flights = flight_results.get("outbound_flights", [])[:limit]
+    quote_cache.quote_flights(flights)
+
+
+def _round_trip_options(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """rank_by / same_airline tool arguments, with unknown values dropped"""
+    rank_by = str(parameters.get("rank_by") or "price").lower()
+    same_airline = parameters.get("same_airline")
+    if same_airline is True or str(same_airline).lower() in ("true", "yes", "prefer"):
+        same_airline = "prefer"
+    elif str(same_airline).lower() in ("require", "required", "only"):
+        same_airline = "require"
+    else:
+        same_airline = None
+    return {"rank_by": rank_by if rank_by in ITINERARY_RANKINGS else "price", "same_airline": same_airline}
+
+
+def _fare_calendar_cards(result: Dict[str, Any], limit: int = 6) -> List[Dict[str, Any]]:
+    """Vapi cards for the cheapest days of a fare calendar, cheapest first"""
+    days = sorted((day for day in result.get("calendar", []) if day["min_fare"] is not None), key=lambda day: day["min_fare"])
+    cards = []
+    for day in days[:limit]:
+        travel_date = datetime.strptime(day["date"], "%Y-%m-%d")
+        cards.append({
+            "title": f"{result.get('origin')} → {result.get('destination')}",
+            "subtitle": travel_date.strftime("%a %d %b %Y"),
+            "footer": f" From ₹{day['min_fare']:,.0f} |  {day['flights']} flights",
+            "buttons": [
+                {
+                    "text": "See Flights ",
+                    "url": f"https://booking.example.com/search/{result.get('origin')}/{result.get('destination')}/{day['date']}"
+                }
+            ]
+        })
+    return cards
+
+
+def _fare_calendar_search(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """Resolve the date window in tool/REST arguments and run the calendar query"""
+    start, end = calendar_window(
+        start=parameters.get("start_date") or parameters.get("date"),
+        end=parameters.get("end_date"),
+        month=parameters.get("month"),
+        flex_days=parameters.get("flex_days")
+    )
+    return flight_api.search_fare_calendar(
+        origin=parameters.get("origin", "").strip(),
+        destination=parameters.get("destination", "").strip(),
+        start_date=start.isoformat(),
+        end_date=end.isoformat()
+    )
+
+
 # Webhook Endpoint for Vapi
 
 @app.post("/webhook")
@@ -938,6 +1295,7 @@ async def vapi_function_webhook(request: Request):
     try:
         payload = await request.json()
         logger.info(f"📩 Received Vapi function call: {json.dumps(payload, indent=2)}")
+        request.state.vapi_tool = "search_flights"
         
         # Extract parameters - Vapi sends in "parameters" key or at top level
         params = payload.get("parameters", {}) or payload
@@ -945,6 +1303,7 @@ async def vapi_function_webhook(request: Request):
         origin = params.get('origin', '').strip()
         destination = params.get('destination', '').strip()
         departure_date = params.get('departure_date', '2025-12-20').strip()
+        return_date = params.get('return_date')
         
         # Fallback: Check nested 'arguments' if still empty
         if not origin and payload.get('arguments'):
@@ -954,9 +1313,14 @@ async def vapi_function_webhook(request: Request):
                     args = json.loads(args)
                 except:
                     args = {}
+            params = args
             origin = args.get('origin', '').strip()
             destination = args.get('destination', '').strip()
             departure_date = args.get('departure_date', '2025-12-20').strip()
+            return_date = args.get('return_date')
+        
+        if return_date:
+            return_date = resolve_spoken_date(str(return_date)) or return_date
         
         logger.info(f"Function call - Origin: {origin}, Destination: {destination}, Date: {departure_date}")
         logger.info(f"Payload keys: {list(payload.keys())}")
@@ -964,28 +1328,30 @@ async def vapi_function_webhook(request: Request):
         if not origin or not destination:
             logger.warning("Missing origin or destination")
             logger.warning(f"Full payload for debugging: {json.dumps(payload, indent=2)}")
-            return JSONResponse(content={
+            return FastJSONResponse(content={
                 "error": "missing_parameters",
                 "required": ["origin", "destination"]
             })
         
         # Search flights using flight API
-        flight_results = flight_api.search_flights(
-            origin=origin,
-            destination=destination,
-            departure_date=departure_date,
-            return_date=None,
-            passengers=1,
-            cabin_class='economy'
-        )
+        with tracer.start_span("search_flights", {"origin": origin, "destination": destination}):
+            flight_results = flight_api.search_flights(
+                origin=origin,
+                destination=destination,
+                departure_date=departure_date,
+                return_date=return_date,
+                passengers=1,
+                cabin_class='economy',
+                **_round_trip_options(params)
+            )
         
         if flight_results.get("success") and flight_results.get("outbound_flights"):
             flights = flight_results.get("outbound_flights", [])
             logger.info(f"Found {len(flights)} flights")
             
-            # Format flights as Vapi cards
-            cards = []
-            for flight in flights[:6]:  # Limit to 6 cards
+            # Format flights as Vapi cards (round trips replace one-way cards)
+            cards = _round_trip_cards(flight_results.get("itineraries") or [])
+            for flight in flights[:6] if not cards else []:  # Limit to 6 cards
                 card = {
                     "title": f"{flight.get('origin')} → {flight.get('destination')}",
                     "subtitle": f"{flight.get('airline')} | {flight.get('flight_number')}",
@@ -999,6 +1365,7 @@ async def vapi_function_webhook(request: Request):
                     ]
                 }
                 cards.append(card)
+            _quote_flight_cards(flight_results)
             
             # Vapi expects this format: { "cards": [...], "text": "..." }
             vapi_response = {
@@ -1008,20 +1375,21 @@ async def vapi_function_webhook(request: Request):
             
             #  Store cards in cache for frontend polling
             call_id = payload.get("call", {}).get("id") or payload.get("callId") or "latest"
-            flight_cards_cache[call_id] = {
+            call_sessions.set_cards(call_id, "flight", {
                 "cards": cards,
+                "cards_json": encode_json(cards),  # Pre-encoded once for frontend polling
                 "text": "",  # Empty - AI handles responses
                 "timestamp": time.time(),
                 "origin": origin,
                 "destination": destination
-            }
+            })
             logger.info(f"Cached {len(cards)} cards for call_id: {call_id}")
             
             logger.info(f"Returning {len(cards)} flight cards to Vapi")
-            return JSONResponse(content=vapi_response)
+            return FastJSONResponse(content=vapi_response)
         else:
             logger.warning(" No flights found")
-            return JSONResponse(content={
+            return FastJSONResponse(content={
                 "error": "no_flights_found",
                 "origin": origin,
                 "destination": destination,
@@ -1030,62 +1398,61 @@ async def vapi_function_webhook(request: Request):
             
     except Exception as e:
         logger.error(f"Error in Vapi function webhook: {e}", exc_info=True)
-        return JSONResponse(content={
+        return FastJSONResponse(content={
             "error": "search_failed",
             "message": str(e)
         }, status_code=500)
 
 
 @app.get("/api/flight-cards/{call_id}")
-async def get_flight_cards(call_id: str):
+async def get_flight_cards(call_id: str, request: Request, wait: float = 0):
     """
     Get cached flight cards for a specific call
     Frontend polls this endpoint to retrieve cards
+    Supports If-None-Match (304) and long-polling with ?wait=<seconds>
     """
     try:
+        key = ("flight", call_id)
+        not_modified = await _conditional_response(request, key, wait)
+        if not_modified is not None:
+            _card_lookups[("flight", "not_modified")].inc()
+            return not_modified
+        headers = {"ETag": cache_versions.etag(key)}
+        
         logger.info(f"Frontend polling for cards with call_id: {call_id}")
         
-        # If 'latest' is requested, return the most recent cache entry
-        if call_id == 'latest' and flight_cards_cache:
-            # Get the most recent entry (highest timestamp)
-            latest_entry = max(flight_cards_cache.items(), key=lambda x: x[1]["timestamp"])
-            latest_call_id, cache_data = latest_entry
-            age = time.time() - cache_data["timestamp"]
-            logger.info(f"Returning latest cached cards (call_id: {latest_call_id}, age: {age:.1f}s): {len(cache_data['cards'])} cards")
-            
-            return JSONResponse(content={
-                "success": True,
-                "cards": cache_data["cards"],
-                "text": cache_data["text"],
-                "cached_at": cache_data["timestamp"],
-                "age_seconds": age,
-                "actual_call_id": latest_call_id
-            })
-        elif call_id in flight_cards_cache:
-            cache_data = flight_cards_cache[call_id]
+        # 'latest' resolves to the most recent call that stored cards
+        found = call_sessions.get_cards(call_id, "flight")
+        if found:
+            _card_lookups[("flight", "hit")].inc()
+            actual_call_id, cache_data = found
             age = time.time() - cache_data["timestamp"]
             logger.info(f"Found cached cards (age: {age:.1f}s): {len(cache_data['cards'])} cards")
             
-            return JSONResponse(content={
+            content = {
                 "success": True,
-                "cards": cache_data["cards"],
+                "cards": JSONFragment(cache_data["cards_json"]),
                 "text": cache_data["text"],
                 "cached_at": cache_data["timestamp"],
                 "age_seconds": age
-            })
+            }
+            if call_id == 'latest':
+                content["actual_call_id"] = actual_call_id
+            return FastJSONResponse(content=content, headers=headers)
         else:
+            _card_lookups[("flight", "miss")].inc()
             logger.info(f"No cached cards found for call_id: {call_id}")
-            logger.info(f"Available call_ids in cache: {list(flight_cards_cache.keys())}")
+            logger.info(f"Calls with cards cached: {call_sessions.card_counts()['flight']}")
             
-            return JSONResponse(content={
+            return FastJSONResponse(content={
                 "success": False,
                 "cards": [],
                 "message": "No cards found for this call_id. Cards may not have been generated yet."
-            })
+            }, headers=headers)
             
     except Exception as e:
         logger.error(f"Error fetching flight cards: {e}", exc_info=True)
-        return JSONResponse(content={
+        return FastJSONResponse(content={
             "success": False,
             "cards": [],
             "error": str(e)
@@ -1093,93 +1460,102 @@ async def get_flight_cards(call_id: str):
 
 
 @app.post("/api/clear-cache")
-async def clear_cache():
+async def clear_cache(call_id: Optional[str] = None):
     """
-    Clear all cached cards (flight and hotel)
-    Called by frontend when a new call starts to ensure fresh state
+    Clear cached cards (flight and hotel)
+    Called by frontend when a new call starts to ensure fresh state.
+    With ?call_id= only that call's cards are dropped; without it, 'latest'
+    pollers are detached but other live calls keep their cards.
     """
     try:
         logger.info("")
         logger.info("" * 30)
-        logger.info("FRONTEND REQUESTED CACHE CLEAR")
+        logger.info(f"FRONTEND REQUESTED CACHE CLEAR (call_id: {call_id or 'latest'})")
         logger.info("" * 30)
         
-        flight_count = len(flight_cards_cache)
-        hotel_count = len(hotel_cards_cache)
+        cleared = call_sessions.clear_cards(call_id)
         
-        flight_cards_cache.clear()
-        hotel_cards_cache.clear()
-        
-        logger.info(f"Cleared {flight_count} flight cache entries")
-        logger.info(f"Cleared {hotel_count} hotel cache entries")
-        logger.info("All caches cleared - ready for fresh search")
+        logger.info(f"Cleared {cleared['flight']} flight cache entries")
+        logger.info(f"Cleared {cleared['hotel']} hotel cache entries")
+        logger.info("Caches cleared - ready for fresh search")
         logger.info("")
         
-        return JSONResponse(content={
+        return FastJSONResponse(content={
             "success": True,
-            "message": "All caches cleared",
+            "message": f"Caches cleared for call {call_id}" if call_id else "Latest caches cleared",
             "cleared": {
-                "flights": flight_count,
-                "hotels": hotel_count
+                "flights": cleared["flight"],
+                "hotels": cleared["hotel"]
             }
         })
     except Exception as e:
         logger.error(f"Error clearing cache: {e}", exc_info=True)
-        return JSONResponse(content={
+        return FastJSONResponse(content={
             "success": False,
             "error": str(e)
         }, status_code=500)
 
+@app.get("/api/call-sessions")
+async def list_call_sessions():
+    """
+    List live and recently ended call sessions (debugging aid)
+    """
+    sessions = call_sessions.list_sessions()
+    return FastJSONResponse(content={
+        "success": True,
+        "count": len(sessions),
+        "sessions": sessions
+    })
+
 @app.get("/api/hotel-cards/{call_id}")
-async def get_hotel_cards(call_id: str):
+async def get_hotel_cards(call_id: str, request: Request, wait: float = 0):
     """
     Get cached hotel cards for a specific call
     Frontend polls this endpoint to retrieve hotel cards
+    Supports If-None-Match (304) and long-polling with ?wait=<seconds>
     """
     try:
+        key = ("hotel", call_id)
+        not_modified = await _conditional_response(request, key, wait)
+        if not_modified is not None:
+            _card_lookups[("hotel", "not_modified")].inc()
+            return not_modified
+        headers = {"ETag": cache_versions.etag(key)}
+        
         logger.info(f"Frontend polling for hotel cards with call_id: {call_id}")
         
-        # If 'latest' is requested, return the most recent cache entry
-        if call_id == 'latest' and hotel_cards_cache:
-            # Get the most recent entry (highest timestamp)
-            latest_entry = max(hotel_cards_cache.items(), key=lambda x: x[1]["timestamp"])
-            latest_call_id, cache_data = latest_entry
-            age = time.time() - cache_data["timestamp"]
-            logger.info(f"Returning latest cached hotel cards (call_id: {latest_call_id}, age: {age:.1f}s): {len(cache_data['cards'])} cards")
-            
-            return JSONResponse(content={
-                "success": True,
-                "cards": cache_data["cards"],
-                "text": cache_data["text"],
-                "cached_at": cache_data["timestamp"],
-                "age_seconds": age,
-                "actual_call_id": latest_call_id
-            })
-        elif call_id in hotel_cards_cache:
-            cache_data = hotel_cards_cache[call_id]
+        # 'latest' resolves to the most recent call that stored cards
+        found = call_sessions.get_cards(call_id, "hotel")
+        if found:
+            _card_lookups[("hotel", "hit")].inc()
+            actual_call_id, cache_data = found
             age = time.time() - cache_data["timestamp"]
             logger.info(f"Found cached hotel cards (age: {age:.1f}s): {len(cache_data['cards'])} cards")
             
-            return JSONResponse(content={
+            content = {
                 "success": True,
-                "cards": cache_data["cards"],
+                "cards": JSONFragment(cache_data["cards_json"]),
                 "text": cache_data["text"],
                 "cached_at": cache_data["timestamp"],
                 "age_seconds": age
-            })
+            }
+            if call_id == 'latest':
+                content["actual_call_id"] = actual_call_id
+            return FastJSONResponse(content=content, headers=headers)
         else:
+            _card_lookups[("hotel", "miss")].inc()
             logger.info(f"No cached hotel cards found for call_id: {call_id}")
-            logger.info(f"Available call_ids in hotel cache: {list(hotel_cards_cache.keys())}")
+            logger.info(f"Calls with hotel cards cached: {call_sessions.card_counts()['hotel']}")
             
-            return JSONResponse(content={
+            return FastJSONResponse(content={
                 "success": False,
                 "cards": [],
                 "message": "No hotel cards found for this call_id. Cards may not have been generated yet."
-            })
+            }, headers=headers)
             
     except Exception as e:
         logger.error(f"Error fetching hotel cards: {e}", exc_info=True)
-        return JSONResponse(content={
+        return FastJSONResponse(content={
             "success": False,
             "cards": [],
             "error": str(e)
@@ -1209,7 +1585,21 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
     - speech.end: User stopped speaking
     """
     try:
-        payload = await request.json()
+        # Size-limited read; large end-of-call reports are stream-parsed and pruned
+        with tracer.start_span("webhook.read_payload"):
+            try:
+                payload = await read_webhook_payload(request)
+            except PayloadTooLargeError as e:
+                logger.warning(f" Rejected webhook body: {e}")
+                return FastJSONResponse(
+                    content={
+                        "received": False,
+                        "error": "payload_too_large",
+                        "status": "error"
+                    },
+                    status_code=413,
+                    media_type="application/json"
+                )
         
         # Vapi sends webhooks in different formats
         # Format 1: {"type": "call.ended", ...}
@@ -1218,6 +1608,9 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
         event_type = payload.get("type") or payload.get("event") or message.get("type")
         
         logger.info(f"Vapi webhook received: {event_type}")
+        VAPI_WEBHOOK_EVENTS.labels(event_type or "unknown").inc()
+        current_span().set_attribute("vapi.event", event_type or "unknown")
+        set_call_id(message.get("call", {}).get("id") or payload.get("callId") or payload.get("call_id"))
         logger.info(f"Full payload keys: {list(payload.keys())}")
         logger.info(f"Full payload: {json.dumps(payload, indent=2)[:500]}")  # Log first 500 chars
         
@@ -1278,6 +1671,7 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
             
             logger.info(f"Function: {function_name}")
             logger.info(f"Parameters: {parameters}")
+            request.state.vapi_tool = function_name or "unknown"
             logger.info(f"Full function_call: {json.dumps(function_call, indent=2) if function_call else 'Empty'}")
             
             # Handle search_flights function
@@ -1324,64 +1718,25 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
                     
                     logger.info(f"Normalized - Origin: {origin}, Destination: {destination}")
                     
-                    # Convert date format from YYYYMMDD to YYYY-MM-DD if needed
-                    if departure_date and len(departure_date) == 8 and departure_date.isdigit():
-                        # Convert 20251228 to 2025-12-28
-                        departure_date = f"{departure_date[0:4]}-{departure_date[4:6]}-{departure_date[6:8]}"
-                        logger.info(f"Converted date to: {departure_date}")
-                    
-                    # Handle natural language dates (e.g., "January 15", "jan 15")
-                    if departure_date and not departure_date[0:4].isdigit():
-                        logger.info(f"Processing natural language date: {departure_date}")
-                        
-                        # Month mapping
-                        month_map = {
-                            'january': '01', 'jan': '01',
-                            'february': '02', 'feb': '02',
-                            'march': '03', 'mar': '03',
-                            'april': '04', 'apr': '04',
-                            'may': '05',
-                            'june': '06', 'jun': '06',
-                            'july': '07', 'jul': '07',
-                            'august': '08', 'aug': '08',
-                            'september': '09', 'sep': '09',
-                            'october': '10', 'oct': '10',
-                            'november': '11', 'nov': '11',
-                            'december': '12', 'dec': '12'
-                        }
-                        
-                        import re
-                        from datetime import datetime
-                        
-                        # Try to extract month and day from natural language
-                        date_lower = departure_date.lower()
-                        day_match = re.search(r'\b(\d{1,2})\b', date_lower)
-                        month_match = None
-                        
-                        for month_name, month_num in month_map.items():
-                            if month_name in date_lower:
-                                month_match = month_num
-                                break
-                        
-                        if day_match and month_match:
-                            day = day_match.group(1).zfill(2)
-                            #  FIX: For January/Feb dates, use 2025. For other months, use 2026
-                            month_num = int(month_match)
-                            if month_num <= 2:  # January or February
-                                year = 2025
-                            else:
-                                year = 2026  # Use 2026 for months after February
-                            departure_date = f"{year}-{month_match}-{day}"
-                            logger.info(f" Converted natural date to: {departure_date}")
+                    # Resolve spoken/compact dates ("December fifteenth", "next Friday", "20251228")
+                    if departure_date:
+                        resolved_date = resolve_spoken_date(departure_date)
+                        if resolved_date:
+                            if resolved_date != departure_date:
+                                logger.info(f" Converted date '{departure_date}' to: {resolved_date}")
+                            departure_date = resolved_date
                         else:
-                            logger.warning(f" Could not parse natural language date: {departure_date}")
+                            logger.warning(f" Could not parse date: {departure_date}")
                             # Use default date
                             departure_date = "2025-12-20"
                             logger.info(f" Using default date: {departure_date}")
                     
+                    if return_date:
+                        return_date = resolve_spoken_date(str(return_date)) or return_date
+                    
                     if not origin or not destination:
                         logger.error(" Origin or destination is empty")
-                        return JSONResponse(content={
+                        return FastJSONResponse(content={
                             "results": [{
                                 "toolCallId": tool_call_id,
                                 "result": ""  # Empty - AI will ask for missing parameters from system prompt
@@ -1395,23 +1750,25 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
                     logger.info(f"Searching flights: {origin} -> {destination} on {departure_date}")
                     
                     # Search flights using flight API
-                    flight_results = flight_api.search_flights(
-                        origin=origin,
-                        destination=destination,
-                        departure_date=departure_date or "2025-12-20",
-                        return_date=return_date,
-                        passengers=passengers,
-                        cabin_class=cabin_class
-                    )
+                    with tracer.start_span("search_flights", {"origin": origin, "destination": destination}):
+                        flight_results = flight_api.search_flights(
+                            origin=origin,
+                            destination=destination,
+                            departure_date=departure_date or "2025-12-20",
+                            return_date=return_date,
+                            passengers=passengers,
+                            cabin_class=cabin_class,
+                            **_round_trip_options(parameters)
+                        )
                     
                     if flight_results.get("success"):
                         flights = flight_results.get("outbound_flights", [])
                         logger.info(f"Found {len(flights)} flights")
                         
                         #  CRITICAL: Return in VAPI's CARD FORMAT for native rendering in chat
-                        # Format flights as VAPI cards
-                        cards = []
-                        for flight in flights[:6]:  # Limit to 6 cards
+                        # Format flights as VAPI cards (round trips replace one-way cards)
+                        cards = _round_trip_cards(flight_results.get("itineraries") or [])
+                        for flight in flights[:6] if not cards else []:  # Limit to 6 cards
                             card = {
                                 "title": f"{flight.get('origin')} → {flight.get('destination')}",
                                 "subtitle": f"{flight.get('airline')} | {flight.get('flight_number')}",
@@ -1424,6 +1781,7 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
                                 ]
                             }
                             cards.append(card)
+                        _quote_flight_cards(flight_results)
                         
                         # Vapi expects "cards" at top level with "text" for the message
                         # Format: { "cards": [...], "text": "message" }
@@ -1438,18 +1796,19 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
                         
                         #  Store cards in cache for frontend polling
                         call_id = payload.get("call", {}).get("id") or message.get("call", {}).get("id") or payload.get("callId") or "latest"
-                        flight_cards_cache[call_id] = {
+                        call_sessions.set_cards(call_id, "flight", {
                             "cards": cards,
+                            "cards_json": encode_json(cards),  # Pre-encoded once for frontend polling
                             "text": vapi_response["text"],
                             "timestamp": time.time(),
                             "origin": origin,
                             "destination": destination
-                        }
+                        })
                         logger.info(f"Cached {len(cards)} cards for call_id: {call_id}")
                         
                         #  Return proper Vapi format with toolCallId and results
                         # Vapi expects result to be a STRING, not an object
-                        return JSONResponse(
+                        return FastJSONResponse(
                             content={
                                 "results": [{
                                     "toolCallId": tool_call_id,
@@ -1462,7 +1821,7 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
                         )
                     else:
                         logger.warning(" No flights found")
-                        return JSONResponse(
+                        return FastJSONResponse(
                             content={
                                 "results": [{
                                     "toolCallId": tool_call_id,
@@ -1475,7 +1834,64 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
                         
                 except Exception as e:
                     logger.error(f"Error in search_flights function: {e}", exc_info=True)
-                    return JSONResponse(
+                    return FastJSONResponse(
+                        content={
+                            "results": [{
+                                "toolCallId": tool_call_id,
+                                "result": ""  # Empty - AI will handle error response from system prompt
+                            }]
+                        },
+                        status_code=200,
+                        media_type="application/json"
+                    )
+            
+            # Handle fare_calendar function ("cheapest in December", "around the 20th")
+            elif function_name == "fare_calendar":
+                try:
+                    # "Bengaluru BLR" -> "Bengaluru", as for search_flights
+                    for key in ("origin", "destination"):
+                        value = str(parameters.get(key) or "").strip()
+                        parameters[key] = value.split()[0] if " " in value else value
+                    if not parameters["origin"] or not parameters["destination"]:
+                        logger.error(" Origin or destination is empty")
+                        return FastJSONResponse(content={
+                            "results": [{
+                                "toolCallId": tool_call_id,
+                                "result": ""  # Empty - AI will ask for missing parameters from system prompt
+                            }]
+                        })
+                    
+                    with tracer.start_span("fare_calendar", {"origin": parameters["origin"], "destination": parameters["destination"]}):
+                        calendar_results = _fare_calendar_search(parameters)
+                    logger.info(calendar_results.get("message"))
+                    
+                    cards = _fare_calendar_cards(calendar_results)
+                    if cards:
+                        call_id = payload.get("call", {}).get("id") or message.get("call", {}).get("id") or payload.get("callId") or "latest"
+                        call_sessions.set_cards(call_id, "flight", {
+                            "cards": cards,
+                            "cards_json": encode_json(cards),  # Pre-encoded once for frontend polling
+                            "text": "",
+                            "timestamp": time.time(),
+                            "origin": calendar_results.get("origin"),
+                            "destination": calendar_results.get("destination")
+                        })
+                    
+                    return FastJSONResponse(
+                        content={
+                            "results": [{
+                                "toolCallId": tool_call_id,
+                                "result": "",  # Empty - AI will generate response from system prompt
+                                "cards": cards
+                            }]
+                        },
+                        status_code=200,
+                        media_type="application/json"
+                    )
+                
+                except Exception as e:
+                    logger.error(f"Error in fare_calendar function: {e}", exc_info=True)
+                    return FastJSONResponse(
                         content={
                             "results": [{
                                 "toolCallId": tool_call_id,
@@ -1501,7 +1917,7 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
                     
                     if not city:
                         logger.error("City parameter is empty")
-                        return JSONResponse(
+                        return FastJSONResponse(
                             content={
                                 "results": [{
                                     "toolCallId": tool_call_id,
@@ -1512,11 +1928,12 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
                     
                     # Search hotels using hotel API
                     logger.info(f"Searching hotels in: {city}")
-                    hotel_results = hotel_api.search_hotels(city)
+                    with tracer.start_span("search_hotels", {"city": city}):
+                        hotel_results = hotel_api.search_hotels(city)
                     
                     if not hotel_results.get("success"):
                         logger.warning(f"No hotels found for: {city}")
-                        return JSONResponse(
+                        return FastJSONResponse(
                             content={
                                 "results": [{
                                     "toolCallId": tool_call_id,
@@ -1544,6 +1961,7 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
                             ]
                         }
                         cards.append(card)
+                    quote_cache.quote_hotels(hotels[:6])
                     
                     # Vapi expects "cards" at top level with "text" for the message
                     vapi_response = {
@@ -1556,16 +1974,17 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
                     
                     #  Store cards in cache for frontend polling
                     call_id = payload.get("call", {}).get("id") or message.get("call", {}).get("id") or payload.get("callId") or "latest"
-                    hotel_cards_cache[call_id] = {
+                    call_sessions.set_cards(call_id, "hotel", {
                         "cards": cards,
+                        "cards_json": encode_json(cards),  # Pre-encoded once for frontend polling
                         "text": vapi_response["text"],
                         "timestamp": time.time(),
                         "city": city
-                    }
+                    })
                     logger.info(f"Cached {len(cards)} hotel cards for call_id: {call_id}")
                     
                     #  Return proper Vapi format with toolCallId and results
-                    return JSONResponse(
+                    return FastJSONResponse(
                         content={
                             "results": [{
                                 "toolCallId": tool_call_id,
@@ -1579,7 +1998,7 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
                         
                 except Exception as e:
                     logger.error(f"Error in search_hotels function: {e}", exc_info=True)
-                    return JSONResponse(
+                    return FastJSONResponse(
                         content={
                             "results": [{
                                 "toolCallId": tool_call_id,
@@ -1592,7 +2011,7 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
             
             else:
                 logger.warning(f"Unknown function: {function_name}")
-                return JSONResponse(
+                return FastJSONResponse(
                     content={
                         "results": [{
                             "toolCallId": tool_call_id,
@@ -1608,92 +2027,100 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
             call_id = payload.get('callId') or payload.get('call_id') or message.get('call', {}).get('id')
             logger.info(f"Call started: {call_id}")
             
-            #  CRITICAL: Clear flight AND hotel cards cache for this call to ensure fresh start
-            logger.info(" Clearing flight and hotel cards cache for new call")
-            flight_cards_cache.clear()
-            hotel_cards_cache.clear()
-            logger.info(" Both caches cleared - widget will start empty")
+            #  Fresh session for this call - other live calls keep their cards
+            call_sessions.start(call_id or "latest")
+            logger.info(" Call session started - widget will start empty")
             
         elif event_type == "call.ended" or event_type == "end-of-call-report":
             logger.info(f"Call ended: {payload.get('callId')}")
             
-            # Extract conversation data - handle both formats
-            call_id = payload.get("callId") or payload.get("call_id") or message.get("call", {}).get("id") or message.get("callId") or message.get("id")
-            call_data = payload.get("data", {})
-            metadata = payload.get("metadata", {})
-            
-            # For end-of-call-report format
-            if event_type == "end-of-call-report":
-                message_data = payload.get("message", {})
-                analysis = message_data.get("analysis", {})
-                artifact = message_data.get("artifact", {})
-                call_obj = message_data.get("call", {})
+            with tracer.start_span("webhook.normalise_payload", {"vapi.event": event_type}):
+                # Extract conversation data - handle both formats
+                call_id = payload.get("callId") or payload.get("call_id") or message.get("call", {}).get("id") or message.get("callId") or message.get("id")
+                call_data = payload.get("data", {})
+                metadata = payload.get("metadata", {})
+            
+                # For end-of-call-report format
+                if event_type == "end-of-call-report":
+                    message_data = payload.get("message", {})
+                    analysis = message_data.get("analysis", {})
+                    artifact = message_data.get("artifact", {})
+                    call_obj = message_data.get("call", {})
                 
-                summary = analysis.get("summary", "No summary available")
-                transcript = artifact.get("messages", [])
+                    summary = analysis.get("summary", "No summary available")
+                    transcript = artifact.get("messages", [])
                 
-                # Try multiple sources for call duration (in seconds)
-                call_duration = (
-                    message_data.get("duration") or 
-                    message_data.get("endedAt") or
-                    call_obj.get("duration") or
-                    call_obj.get("endedAt")
-                )
+                    # Try multiple sources for call duration (in seconds)
+                    call_duration = (
+                        message_data.get("duration") or 
+                        message_data.get("endedAt") or
+                        call_obj.get("duration") or
+                        call_obj.get("endedAt")
+                    )
                 
-                # Get timestamp - handle Unix timestamp in milliseconds
-                timestamp_raw = message_data.get("timestamp") or message_data.get("createdAt") or call_obj.get("createdAt")
+                    # Get timestamp - handle Unix timestamp in milliseconds
+                    timestamp_raw = message_data.get("timestamp") or message_data.get("createdAt") or call_obj.get("createdAt")
                 
-                logger.info(f"📊 End-of-call report: {len(transcript)} messages")
-                logger.info(f" Call duration (raw): {call_duration} (type: {type(call_duration).__name__})")
-                logger.info(f"📅 Timestamp (raw): {timestamp_raw}")
-            else:
-                # Original format
-                summary = call_data.get("summary", "No summary available")
-                transcript = call_data.get("transcript", [])
+                    logger.info(f"📊 End-of-call report: {len(transcript)} messages")
+                    logger.info(f" Call duration (raw): {call_duration} (type: {type(call_duration).__name__})")
+                    logger.info(f"📅 Timestamp (raw): {timestamp_raw}")
+                else:
+                    # Original format
+                    summary = call_data.get("summary", "No summary available")
+                    transcript = call_data.get("transcript", [])
                 
-                # Try multiple sources for call duration
-                call_duration = call_data.get("duration") or call_data.get("endedAt")
+                    # Try multiple sources for call duration
+                    call_duration = call_data.get("duration") or call_data.get("endedAt")
                 
-                # Get timestamp
-                timestamp_raw = call_data.get("timestamp") or call_data.get("createdAt") or payload.get("timestamp")
+                    # Get timestamp
+                    timestamp_raw = call_data.get("timestamp") or call_data.get("createdAt") or payload.get("timestamp")
                 
-                logger.info(f"📊 Call ended: {len(transcript) if transcript else 0} messages")
-                logger.info(f" Call duration (raw): {call_duration} (type: {type(call_duration).__name__})")
-                logger.info(f"📅 Timestamp (raw): {timestamp_raw}")
-            
-            # Convert Unix timestamp (milliseconds) to readable date format
-            timestamp = None
-            if timestamp_raw:
-                try:
-                    # If it's a large number, it's likely Unix timestamp in milliseconds
-                    if isinstance(timestamp_raw, (int, float)) and timestamp_raw > 1000000000000:
-                        # Convert milliseconds to seconds
-                        timestamp_seconds = timestamp_raw / 1000
-                        # Format as readable date
-                        from datetime import datetime
-                        dt = datetime.fromtimestamp(timestamp_seconds)
-                        timestamp = dt.strftime("%B %d, %Y at %I:%M %p")
-                    elif isinstance(timestamp_raw, (int, float)):
-                        # Already in seconds
-                        from datetime import datetime
-                        dt = datetime.fromtimestamp(timestamp_raw)
-                        timestamp = dt.strftime("%B %d, %Y at %I:%M %p")
-                    else:
-                        # Already a string, use as is
-                        timestamp = str(timestamp_raw)
+                    logger.info(f"📊 Call ended: {len(transcript) if transcript else 0} messages")
+                    logger.info(f" Call duration (raw): {call_duration} (type: {type(call_duration).__name__})")
+                    logger.info(f"📅 Timestamp (raw): {timestamp_raw}")
+            
+                # Fall back to the transcript fragments collected while the call was live
+                session = call_sessions.get(call_id) if call_id else None
+                if not transcript and session is not None and session.transcript:
+                    transcript = list(session.transcript)
+                    logger.info(f"📊 Using {len(transcript)} live transcript messages from call session")
+            
+                # Convert Unix timestamp (milliseconds) to readable date format
+                timestamp = None
+                call_date = None  # Reference date for resolving relative dates in the transcript
+                if timestamp_raw:
+                    try:
+                        # If it's a large number, it's likely Unix timestamp in milliseconds
+                        if isinstance(timestamp_raw, (int, float)) and timestamp_raw > 1000000000000:
+                            # Convert milliseconds to seconds
+                            timestamp_seconds = timestamp_raw / 1000
+                            # Format as readable date
+                            dt = datetime.fromtimestamp(timestamp_seconds)
+                            timestamp = dt.strftime("%B %d, %Y at %I:%M %p")
+                            call_date = dt.date()
+                        elif isinstance(timestamp_raw, (int, float)):
+                            # Already in seconds
+                            dt = datetime.fromtimestamp(timestamp_raw)
+                            timestamp = dt.strftime("%B %d, %Y at %I:%M %p")
+                            call_date = dt.date()
+                        else:
+                            # Already a string, use as is
+                            timestamp = str(timestamp_raw)
                     
-                    logger.info(f"📅 Timestamp (formatted): {timestamp}")
-                except Exception as e:
-                    logger.warning(f"Could not format timestamp: {e}")
-                    timestamp = str(timestamp_raw) if timestamp_raw else None
+                        logger.info(f"📅 Timestamp (formatted): {timestamp}")
+                    except Exception as e:
+                        logger.warning(f"Could not format timestamp: {e}")
+                        timestamp = str(timestamp_raw) if timestamp_raw else None
             
-            # Get user email and name
-            user_email = metadata.get("user_email") or call_data.get("customer_email")
-            user_name = metadata.get("user_name") or call_data.get("customer_name", "Traveler")
+                # Get user email and name
+                user_email = metadata.get("user_email") or call_data.get("customer_email")
+                user_name = metadata.get("user_name") or call_data.get("customer_name", "Traveler")
             
-            # Log extracted metadata
-            logger.info(f" Session ID: {call_id}")
-            logger.info(f"📅 Timestamp: {timestamp}")
+                # Log extracted metadata
+                logger.info(f" Session ID: {call_id}")
+                logger.info(f"📅 Timestamp: {timestamp}")
+            
+            set_call_id(call_id)
             
             # Extract booking details from transcript or metadata
             booking_details = None
@@ -1705,7 +2132,7 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
                 logger.info(f" Booking details found in call_data")
             else:
                 # Try to extract from transcript messages
-                booking_details = extract_booking_from_transcript(transcript, summary)
+                booking_details = extract_booking_from_transcript(transcript, summary, reference_date=call_date)
                 if booking_details:
                     logger.info(f" Booking details extracted from transcript")
             
@@ -1743,17 +2170,15 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
                 "call_id": call_id
             }
             
-            # Store with call ID if available
-            if call_id:
-                call_summaries[call_id] = summary_data
-                logger.info(f" Stored summary for call ID: {call_id}")
-            else:
-                logger.warning(f" No call ID found, using fallback storage")
-            
-            # Always store as latest (fallback for when call ID is missing)
-            global latest_call_summary
-            latest_call_summary = summary_data
-            logger.info(f" Stored as latest call summary (fallback)")
+            # Store with call ID if available; always stored as latest (fallback for when call ID is missing)
+            with tracer.start_span("summary.store"):
+                call_sessions.set_summary(call_id, summary_data)
+                if call_id:
+                    call_sessions.end(call_id)
+                    logger.info(f" Stored summary for call ID: {call_id}")
+                else:
+                    logger.warning(f" No call ID found, using fallback storage")
+                logger.info(f" Stored as latest call summary (fallback)")
             
             # Send email in background - check if booking is confirmed
             booking_confirmed = booking_details and (
@@ -1761,8 +2186,9 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
                 booking_details.get("booking_id") is not None
             )
             
+            email_enqueued()
             background_tasks.add_task(
-                _send_email_with_error_handling,
+                tracer.bind(_send_email_with_error_handling, "email.send_call_summary"),
                 user_email,
                 user_name,
                 structured_summary,
@@ -1789,6 +2215,12 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
                 "call_id": call_id
             }
             
+        elif event_type == "transcript":
+            # Live transcript fragments - keep the final ones on the call session
+            if message.get("transcriptType") == "final" and message.get("transcript"):
+                call_id = message.get("call", {}).get("id") or payload.get("callId") or "latest"
+                call_sessions.add_transcript_fragment(call_id, message.get("role", "user"), message["transcript"])
+            
         elif event_type == "message.received":
             message = payload.get("message", {})
             logger.info(f" Message: {message}")
@@ -1801,7 +2233,7 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
         
         # Send acknowledgment - ensure proper JSONResponse for all cases
         logger.info(f" Webhook processed successfully: {event_type}")
-        return JSONResponse(
+        return FastJSONResponse(
             content={
                 "received": True,
                 "event": event_type,
@@ -1814,7 +2246,7 @@ async def vapi_webhook(request: Request, background_tasks: BackgroundTasks):
     except Exception as e:
         logger.error(f" Error handling Vapi webhook: {e}")
         logger.error(f" Traceback:", exc_info=True)
-        return JSONResponse(
+        return FastJSONResponse(
             content={
                 "received": False,
                 "error": str(e),
@@ -1961,8 +2393,11 @@ async def search_flights_direct(request: Dict[str, Any]):
             origin=origin,
             destination=destination,
             departure_date=departure_date,
+            return_date=request.get("return_date"),
             passengers=request.get("passengers", 1),
-            cabin_class=request.get("cabin_class", "economy")
+            cabin_class=request.get("cabin_class", "economy"),
+            max_itineraries=int(request.get("max_itineraries", 5)),
+            **_round_trip_options(request)
         )
         
         logger.info(f" Direct search returned: {len(flight_results.get('outbound_flights', []))} flights")
@@ -1971,7 +2406,10 @@ async def search_flights_direct(request: Dict[str, Any]):
             "success": flight_results.get("success", False),
             "message": flight_results.get("message", ""),
             "flights": flight_results.get("outbound_flights", []),
-            "total": len(flight_results.get("outbound_flights", []))
+            "return_flights": flight_results.get("return_flights", []),
+            "itineraries": flight_results.get("itineraries", []),
+            "total": len(flight_results.get("outbound_flights", [])),
+            "catalogue_version": flight_results.get("catalogue_version")
         }
         
     except Exception as e:
@@ -1983,6 +2421,43 @@ async def search_flights_direct(request: Dict[str, Any]):
         }
 
 
+@app.post("/api/search-connections")
+async def search_connections(request: Dict[str, Any]):
+    """
+    One- and two-stop itineraries over the inventory's route graph
+    rank_by is "price" (total fare) or "duration" (departure to arrival)
+    """
+    origin = request.get("origin")
+    destination = request.get("destination")
+    if not origin or not destination:
+        return {"success": False, "message": "Origin and destination are required", "flights": []}
+    try:
+        return flight_api.search_connections(
+            origin=origin,
+            destination=destination,
+            departure_date=request.get("departure_date", "2025-12-20"),
+            k=int(request.get("max_results", 5)),
+            max_stops=int(request.get("max_stops", 2)),
+            rank_by=request.get("rank_by", "price")
+        )
+    except ValueError as e:
+        return {"success": False, "message": str(e), "flights": []}
+
+
+@app.post("/api/fare-calendar")
+async def fare_calendar(request: Dict[str, Any]):
+    """
+    Lowest fare per day for a route over a date range
+    Give start_date/end_date, a date with flex_days either side, or a month
+    """
+    if not request.get("origin") or not request.get("destination"):
+        return {"success": False, "message": "Origin and destination are required", "calendar": []}
+    try:
+        return _fare_calendar_search(request)
+    except ValueError as e:
+        return {"success": False, "message": str(e), "calendar": []}
+
+
 @app.post("/api/vapi-search-flights")
 async def vapi_search_flights(request: Dict[str, Any]):
     """
@@ -2049,12 +2524,11 @@ async def vapi_search_flights(request: Dict[str, Any]):
 
 @app.get("/api/flight/{flight_id}")
 async def get_flight_details(flight_id: str):
-    """Get flight details"""
-    try:
-        details = flight_api.get_flight_details(flight_id)
-        return details
-    except Exception as e:
+    """Get flight details (id index lookup; connection ids like "A+B" included)"""
+    details = flight_api.get_flight(flight_id)
+    if details is None:
         raise HTTPException(status_code=404, detail="Flight not found")
+    return details
 
 
 # Hotel Endpoints
@@ -2084,11 +2558,10 @@ async def search_hotels(request: HotelSearchRequest):
 @app.get("/api/hotel/{hotel_id}")
 async def get_hotel_details(hotel_id: str):
     """Get hotel details"""
-    try:
-        details = hotel_api.get_hotel_details(hotel_id)
-        return details
-    except Exception as e:
+    details = hotel_api.get_hotel_details(hotel_id)
+    if details is None:
         raise HTTPException(status_code=404, detail="Hotel not found")
+    return details
 
 
 @app.post("/api/rich-link")
@@ -2121,8 +2594,15 @@ async def generate_rich_link(request: Dict[str, Any]):
 # Booking Endpoints
 
 @app.post("/api/create-booking")
-async def create_booking(request: BookingRequest):
-    """Create a new booking"""
+async def create_booking(request: BookingRequest, http_request: Request):
+    """
+    Create a new booking
+
+    Send an Idempotency-Key header (or idempotency_key field) to make retries
+    safe: a repeat of the same request replays the first response (with an
+    Idempotent-Replayed: true header); the same key with a different request
+    is rejected with 422.
+    """
     try:
         logger.info(f" Creating {request.booking_type} booking")
         
@@ -2131,9 +2611,16 @@ async def create_booking(request: BookingRequest):
             item_id=request.item_id,
             customer_phone=request.customer_phone,
             customer_email=request.customer_email,
-            passenger_details=request.passenger_details
+            passenger_details=request.passenger_details,
+            hold_id=request.hold_id,
+            travel_date=request.travel_date,
+            idempotency_key=http_request.headers.get("idempotency-key") or request.idempotency_key
         )
         
+        if result.get("idempotency_conflict"):
+            return FastJSONResponse(content=result, status_code=422)
+        if result.get("idempotent_replay"):
+            return FastJSONResponse(content=result, headers={"Idempotent-Replayed": "true"})
         return result
         
     except Exception as e:
@@ -2141,6 +2628,34 @@ async def create_booking(request: BookingRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/seat-holds")
+async def create_seat_hold(request: SeatHoldRequest):
+    """Hold seats on a flight while the caller confirms (pass hold_id to /api/create-booking)"""
+    result = seat_inventory.hold(request.flight_id, request.travel_date, request.seats)
+    if not result["success"]:
+        status = 404 if result["error"] == "Flight not found" else 409
+        return FastJSONResponse(content=result, status_code=status)
+    return result
+
+
+@app.delete("/api/seat-holds/{hold_id}")
+async def release_seat_hold(hold_id: str):
+    """Give held seats back"""
+    result = seat_inventory.release(hold_id)
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
+
+@app.get("/api/seats/{flight_id}")
+async def get_seat_availability(flight_id: str, travel_date: Optional[str] = None):
+    """Live seat count for a flight on a date"""
+    result = seat_inventory.availability(flight_id, travel_date)
+    if not result["success"]:
+        raise HTTPException(status_code=404, detail=result["error"])
+    return result
+
+
 @app.get("/api/booking-status")
 async def get_booking_status(booking_reference: str):
     """Get booking status"""
@@ -2159,15 +2674,139 @@ async def get_booking_status(booking_reference: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _booking_page_chunks(customer_phone: str, page: Dict[str, Any]) -> Iterator[bytes]:
+    """A customer bookings page as JSON, one booking per chunk"""
+    yield b'{"customer_phone":' + encode_json(customer_phone) + b',"bookings":['
+    for i, booking in enumerate(page["bookings"]):
+        yield (b"," if i else b"") + encode_json(booking)
+    yield b'],"next_cursor":' + encode_json(page["next_cursor"]) + b"}"
+
+
 @app.get("/api/customer-bookings/{customer_phone}")
-async def get_customer_bookings(customer_phone: str):
-    """Get all bookings for a customer"""
+async def get_customer_bookings(
+    customer_phone: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    status: Optional[str] = None
+):
+    """
+    A customer's bookings, newest first, one page at a time: pass the
+    returned next_cursor as ?cursor= for the next page (null on the last)
+    """
+    page = booking_service.get_customer_bookings(customer_phone, limit=limit, cursor=cursor, status=status)
+    if not page["success"]:
+        status_code = 400 if page["error"] == "Invalid cursor" else 500
+        raise HTTPException(status_code=status_code, detail=page["error"])
+    return StreamingResponse(_booking_page_chunks(customer_phone, page), media_type="application/json")
+
+
+def _check_bulk_access(request: Request) -> None:
+    """
+    Bulk exports carry every customer's details and imports write bookings,
+    so both are refused unless VAPI_BULK_TOKEN is set and sent as X-Bulk-Token
+    """
+    _check_admin_token(request, BULK_TOKEN, "x-bulk-token", "VAPI_BULK_TOKEN")
+
+
+def _bulk_format(request: Request, format: Optional[str]) -> str:
+    """?format=, else the Content-Type (text/csv means CSV), else NDJSON"""
+    if not format:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
     try:
-        bookings = booking_service.get_customer_bookings(customer_phone)
-        return {"bookings": bookings}
-    except Exception as e:
-        logger.error(f" Error fetching customer bookings: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+        return check_booking_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/admin/bookings/export")
+async def export_bookings(
+    request: Request,
+    format: str = "ndjson",
+    status: Optional[str] = None,
+    booking_type: Optional[str] = None,
+    since: Optional[str] = None
+):
+    """
+    Stream bookings (with passengers) as NDJSON or CSV, oldest first;
+    filter by status, booking_type and created_at >= since
+    """
+    _check_bulk_access(request)
+    fmt = _bulk_format(request, format)
+    # A sync generator: Starlette pulls each batch in a worker thread
+    chunks = booking_service.export_bookings(fmt, status=status, booking_type=booking_type, since=since)
+    return StreamingResponse(
+        chunks,
+        media_type=BOOKING_CONTENT_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="bookings.{fmt}"'}
+    )
+
+
+@app.post("/admin/bookings/import")
+async def import_bookings(request: Request, format: Optional[str] = None):
+    """
+    Bulk-load bookings from an NDJSON or CSV body (same shape as the
+    export). The body is spooled to a temp file as it arrives and loaded in
+    batched transactions off the event loop; existing bookings are skipped.
+    """
+    _check_bulk_access(request)
+    fmt = _bulk_format(request, format)
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        text = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+        try:
+            result = await asyncio.to_thread(booking_service.import_bookings, text, fmt)
+        finally:
+            text.detach()
+    return FastJSONResponse(content=result, status_code=200 if result["success"] else 400)
+
+
+@app.get("/api/booking-changes")
+async def get_booking_changes(request: Request, offset: int = 0, limit: int = 500):
+    """
+    Booking status changes with seq > offset, oldest first; pass the
+    returned next_offset back as ?offset= to keep reading. Like the bulk
+    export, it needs X-Bulk-Token and is refused while VAPI_BULK_TOKEN is unset.
+    """
+    _check_bulk_access(request)
+    changes = await asyncio.to_thread(booking_service.changes.read, max(offset, 0), max(1, min(limit, 1000)))
+    next_offset = changes[-1]["seq"] if changes else max(offset, 0)
+    return FastJSONResponse(content={"changes": changes, "next_offset": next_offset})
+
+
+async def _booking_change_events(request: Request, offset: int):
+    """Server-Sent Events for each change after offset, with keep-alives while idle"""
+    feed = booking_service.changes
+    while not await request.is_disconnected():
+        changes = await feed.poll(offset)
+        if not changes:
+            # Also keeps proxies from closing an idle stream
+            yield b": keep-alive\n\n"
+            continue
+        for change in changes:
+            offset = change["seq"]
+            yield b"id: %d\nevent: booking_status\ndata: " % offset + encode_json(change) + b"\n\n"
+
+
+@app.get("/api/booking-changes/stream")
+async def stream_booking_changes(request: Request, offset: Optional[int] = None):
+    """
+    Booking status changes as Server-Sent Events (event: booking_status,
+    id: seq). Starts after ?offset=, else after the browser's Last-Event-ID
+    on reconnect, else at the current end of the log.
+    """
+    _check_bulk_access(request)
+    last_event_id = request.headers.get("last-event-id")
+    if offset is None and last_event_id and last_event_id.isdigit():
+        offset = int(last_event_id)
+    if offset is None:
+        offset = await asyncio.to_thread(booking_service.changes.latest)
+    return StreamingResponse(
+        _booking_change_events(request, offset),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @app.post("/api/send-transcript")
@@ -2309,36 +2948,35 @@ async def search_flights(request: Request):
         logger.info(f" Universal search: {origin} → {destination} on {departure_date}")
         
         if not origin or not destination:
-            return JSONResponse({
+            return FastJSONResponse({
                 "success": False,
                 "message": "Origin and destination are required",
                 "flights": []
             })
         
         # Use mock database
-        if mock_db_available:
-            logger.info(f" Using mock database for {origin}→{destination}")
-            
-            flight_results = flight_api.search_flights(
-                origin=origin,
-                destination=destination,
-                departure_date=departure_date,
-                passengers=passengers,
-                cabin_class=cabin_class
-            )
-            
-            if flight_results.get("success"):
-                flights = flight_results.get("outbound_flights", [])
-                return JSONResponse({
-                    "success": True,
-                    "source": "mock_database",
-                    "message": f"Found {len(flights)} flights (demo data)",
-                    "flights": flights,
-                    "total": len(flights)
-                })
+        logger.info(f" Using mock database for {origin}→{destination}")
+        
+        flight_results = flight_api.search_flights(
+            origin=origin,
+            destination=destination,
+            departure_date=departure_date,
+            passengers=passengers,
+            cabin_class=cabin_class
+        )
+        
+        if flight_results.get("success"):
+            flights = flight_results.get("outbound_flights", [])
+            return FastJSONResponse({
+                "success": True,
+                "source": "mock_database",
+                "message": f"Found {len(flights)} flights (demo data)",
+                "flights": flights,
+                "total": len(flights)
+            })
         
         # No flights found
-        return JSONResponse({
+        return FastJSONResponse({
             "success": False,
             "source": "none",
             "message": f"No flights found from {origin} to {destination}",
@@ -2348,7 +2986,7 @@ async def search_flights(request: Request):
         
     except Exception as e:
         logger.error(f" Error in universal search: {e}")
-        return JSONResponse({
+        return FastJSONResponse({
             "success": False,
             "message": f"Error: {str(e)}",
             "flights": []
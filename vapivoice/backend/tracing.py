@@ -0,0 +1,347 @@
+"""
+Tracing - Lightweight request tracing with nested spans
+Spans follow the OpenTelemetry data model (128-bit trace ids, 64-bit span ids,
+parent links, attributes, status) and are exported to an in-memory buffer
+behind /debug/traces and, when VAPI_TRACE_FILE is set, to a JSON-lines file in
+OTLP/JSON format that an OpenTelemetry collector (otlpjsonfile receiver) can
+ingest offline. The current span lives in a contextvar, so spans nest across
+awaits; background tasks are bound to the request span explicitly.
+"""
+
+import os
+import json
+import time
+import inspect
+import random
+import logging
+import threading
+import functools
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.getenv("VAPI_TRACING", "1").lower() not in ("0", "false", "no")
+
+# Optional OTLP/JSON lines file for offline analysis
+TRACE_FILE = os.getenv("VAPI_TRACE_FILE")
+
+# Traces kept in memory for /debug/traces
+MAX_TRACES = int(os.getenv("VAPI_MAX_TRACES", "200"))
+
+SERVICE_NAME = "vapivoice-backend"
+
+# Attribute carrying the Vapi call id; copied from parent to child spans
+CALL_ID_ATTRIBUTE = "vapi.call_id"
+
+# OTLP enum values
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """A timed operation within a trace"""
+
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns",
+        "attributes", "status", "status_message", "root", "tracer"
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        parent: Optional["Span"] = None,
+        kind: int = SPAN_KIND_INTERNAL,
+        attributes: Optional[Dict[str, Any]] = None
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.span_id = f"{random.getrandbits(64):016x}"
+        if parent is not None:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self.root = parent.root
+            self.attributes = {}
+            if CALL_ID_ATTRIBUTE in parent.attributes:
+                self.attributes[CALL_ID_ATTRIBUTE] = parent.attributes[CALL_ID_ATTRIBUTE]
+        else:
+            self.trace_id = f"{random.getrandbits(128):032x}"
+            self.parent_id = None
+            self.root = self
+            self.attributes = {}
+        if attributes:
+            self.attributes.update(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = STATUS_UNSET
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(exc).__name__}: {exc}"
+        self.attributes["exception.type"] = type(exc).__name__
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer.export(self)
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": dict(self.attributes),
+            "status": self.status,
+            "status_message": self.status_message
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned when tracing is disabled"""
+
+    attributes: Dict[str, Any] = {}
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class InMemoryExporter:
+    """Keeps the most recent MAX_TRACES traces, grouped by trace id"""
+
+    def __init__(self, max_traces: int = MAX_TRACES):
+        self.max_traces = max_traces
+        self._traces: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        record = span.to_dict()
+        with self._lock:
+            spans = self._traces.get(span.trace_id)
+            if spans is None:
+                spans = self._traces[span.trace_id] = []
+                while len(self._traces) > self.max_traces:
+                    self._traces.popitem(last=False)
+            spans.append(record)
+
+    def get(self, trace_id: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            spans = self._traces.get(trace_id)
+            return list(spans) if spans is not None else None
+
+    def summaries(self) -> List[Dict[str, Any]]:
+        """One row per trace whose root span has ended"""
+        with self._lock:
+            traces = [(trace_id, list(spans)) for trace_id, spans in self._traces.items()]
+        rows = []
+        for trace_id, spans in traces:
+            root = next((s for s in spans if s["parent_id"] is None), None)
+            if root is None:
+                continue
+            rows.append({
+                "trace_id": trace_id,
+                "name": root["name"],
+                "call_id": root["attributes"].get(CALL_ID_ATTRIBUTE),
+                "status_code": root["attributes"].get("http.status_code"),
+                "response_ms": root["attributes"].get("http.response_ms"),
+                # Includes background tasks, which run after the response is sent
+                "duration_ms": root["duration_ms"],
+                "spans": len(spans),
+                "error": any(s["status"] == STATUS_ERROR for s in spans),
+                "started_at": root["start_ns"] / 1e9
+            })
+        return rows
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OTLPFileExporter:
+    """Appends each finished span as an OTLP/JSON ExportTraceServiceRequest line"""
+
+    def __init__(self, path: str, service_name: str = SERVICE_NAME):
+        self.path = path
+        self.resource = {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]}
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        otlp_span = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": span.kind,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in span.attributes.items()],
+            "status": {"code": span.status, "message": span.status_message}
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        line = json.dumps({"resourceSpans": [{
+            "resource": self.resource,
+            "scopeSpans": [{"scope": {"name": "vapivoice.tracing"}, "spans": [otlp_span]}]
+        }]})
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.write(line + "\n")
+
+
+class Tracer:
+    """Creates spans and hands finished ones to the exporters"""
+
+    def __init__(self, enabled: bool = TRACING_ENABLED, exporters: Optional[List[Any]] = None):
+        self.enabled = enabled
+        self.exporters = exporters or []
+
+    def export(self, span: Span) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                logger.error(f"Trace exporter {type(exporter).__name__} failed: {e}")
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]] = None,
+        parent: Optional[Span] = None,
+        kind: int = SPAN_KIND_INTERNAL
+    ) -> Iterator[Any]:
+        """Context manager opening a child of the current span (or of parent)"""
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+        span = Span(self, name, parent or _current_span.get(), kind, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def traced(self, name: Optional[str] = None) -> Callable:
+        """Decorator running a sync or async function inside a span"""
+        def decorator(func: Callable) -> Callable:
+            span_name = name or func.__qualname__
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.start_span(span_name):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.start_span(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def bind(self, func: Callable, name: Optional[str] = None) -> Callable:
+        """
+        Wrap a background task so it runs as a child of the current span
+
+        BackgroundTasks run after the response, when the request's span is
+        no longer current, so the parent (and its call id) is captured here.
+        """
+        parent = _current_span.get()
+        if not self.enabled or parent is None:
+            return func
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.start_span(span_name, {"background": True}, parent=parent):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def current_span() -> Any:
+    return _current_span.get() or _NOOP_SPAN
+
+
+def set_call_id(call_id: Optional[str]) -> None:
+    """Tag the current span and its trace root with the Vapi call id"""
+    span = _current_span.get()
+    if span is None or not call_id:
+        return
+    span.set_attribute(CALL_ID_ATTRIBUTE, call_id)
+    span.root.set_attribute(CALL_ID_ATTRIBUTE, call_id)
+
+
+memory_exporter = InMemoryExporter()
+tracer = Tracer(exporters=[memory_exporter] + ([OTLPFileExporter(TRACE_FILE)] if TRACE_FILE else []))
+
+
+class TracingMiddleware:
+    """ASGI middleware opening the root span of every HTTP request"""
+
+    def __init__(self, app: Any, tracer: Tracer = tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "GET")
+        attributes = {"http.method": method, "http.target": scope.get("path", "/")}
+        with self.tracer.start_span(f"{method} {scope.get('path', '/')}", attributes, kind=SPAN_KIND_SERVER) as span:
+            async def send_wrapper(message: Dict[str, Any]) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                await send(message)
+                if message["type"] == "http.response.body" and not message.get("more_body"):
+                    span.set_attribute("http.response_ms", round(span.duration_ms, 3))
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.name = f"{method} {route}"
+                    span.set_attribute("http.route", route)
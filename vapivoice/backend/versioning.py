@@ -0,0 +1,103 @@
+"""
+Versioning - Change counters for polled cache entries
+Every write to a polled entry (flight/hotel cards, call summaries) bumps its
+version. Versions are exposed as ETags so pollers can send If-None-Match and
+get a bodiless 304, or park on a long-poll until the entry changes.
+"""
+
+import asyncio
+import itertools
+import logging
+from typing import Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for ?wait= long-polls (seconds)
+MAX_LONG_POLL_SECONDS = 60.0
+
+
+class VersionTracker:
+    """Per-key version counters with async change notification"""
+
+    def __init__(self) -> None:
+        # Versions come from one global counter so a cleared-then-rewritten
+        # entry never reuses an ETag a client already holds
+        self._counter = itertools.count(1)
+        self._versions: Dict[Hashable, int] = {}
+        self._waiters: Dict[Hashable, Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = {}
+
+    def version(self, key: Hashable) -> int:
+        """Current version of key (0 if it was never written)"""
+        return self._versions.get(key, 0)
+
+    def etag(self, key: Hashable) -> str:
+        """Weak ETag for the current version of key"""
+        return f'W/"{self._versions.get(key, 0)}"'
+
+    def bump(self, *keys: Hashable) -> int:
+        """Record a change to one or more keys and wake their long-pollers"""
+        version = next(self._counter)
+        for key in keys:
+            self._versions[key] = version
+            waiter = self._waiters.pop(key, None)
+            if waiter is not None:
+                self._wake(*waiter)
+        return version
+
+    def forget(self, *keys: Hashable) -> None:
+        """Drop keys whose entries no longer exist (they read as version 0 again)"""
+        for key in keys:
+            self._versions.pop(key, None)
+            waiter = self._waiters.pop(key, None)
+            if waiter is not None:
+                self._wake(*waiter)
+
+    @staticmethod
+    def _wake(loop: asyncio.AbstractEventLoop, event: asyncio.Event) -> None:
+        # bump() may run in a threadpool (sync endpoints, background tasks)
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            event.set()
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(event.set)
+
+    def matches(self, key: Hashable, if_none_match: Optional[str]) -> bool:
+        """True if an If-None-Match header already names the current version"""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return key in self._versions
+        current = self.etag(key)
+        # Weak comparison: W/"7" and "7" name the same version
+        current_opaque = current[2:]
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag == current_opaque:
+                return True
+        return False
+
+    async def wait_for_change(self, key: Hashable, version: int, timeout: float) -> bool:
+        """
+        Park until key moves past version or the timeout expires
+
+        Returns:
+            True if the key changed, False on timeout
+        """
+        timeout = max(0.0, min(timeout, MAX_LONG_POLL_SECONDS))
+        if self.version(key) != version:
+            return True
+        loop = asyncio.get_running_loop()
+        waiter = self._waiters.get(key)
+        if waiter is None or waiter[0] is not loop:
+            waiter = (loop, asyncio.Event())
+            self._waiters[key] = waiter
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.version(key) != version
@@ -0,0 +1,200 @@
+"""
+Webhook Payload Reader - Size-limited, incremental parsing of Vapi webhook bodies
+End-of-call reports carry the whole conversation (messages, OpenAI-formatted
+messages, a flat transcript, recording URLs, the assistant config...). Only a
+handful of those paths are used by vapi_webhook, so large bodies are parsed as
+a stream and everything else is skipped instead of being built into dicts.
+"""
+
+import os
+import json
+import logging
+from typing import Dict, Any, Optional, AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+# Optional streaming parser (C backend when available)
+try:
+    import ijson
+    from ijson.common import ObjectBuilder
+    streaming_available = True
+except ImportError:
+    ijson = None
+    ObjectBuilder = None
+    streaming_available = False
+    logger.info("ijson not installed - webhook bodies will be parsed in one piece")
+
+# Hard limit for a single webhook body
+MAX_BODY_BYTES = int(os.getenv("VAPI_MAX_BODY_BYTES", 16 * 1024 * 1024))
+
+# Bodies smaller than this are cheaper to json.loads in one go
+STREAMING_THRESHOLD_BYTES = int(os.getenv("VAPI_STREAMING_THRESHOLD_BYTES", 64 * 1024))
+
+# Paths vapi_webhook actually reads. Anything outside these subtrees is skipped.
+KEPT_PATHS = frozenset([
+    # Format 1: {"type": "call.ended", "callId": ..., "data": {...}, "metadata": {...}}
+    "type", "event", "callId", "call_id", "timestamp", "data", "metadata",
+    "id", "toolCallId", "function", "tool", "parameters", "arguments",
+    "functionCall", "toolCall", "call.id",
+    # Format 2: {"message": {"type": "end-of-call-report", ...}}
+    "message.type", "message.id", "message.callId",
+    "message.role", "message.transcriptType", "message.transcript",
+    "message.toolCall", "message.toolCalls",
+    "message.analysis",
+    "message.duration", "message.endedAt", "message.timestamp", "message.createdAt",
+    "message.call.id", "message.call.duration", "message.call.endedAt", "message.call.createdAt",
+])
+
+# Transcript messages are built one at a time rather than as a whole subtree
+MESSAGES_PATH = "message.artifact.messages"
+MESSAGE_ITEM_PATH = MESSAGES_PATH + ".item"
+
+# Event types that only need to be acknowledged - parsing stops once one is seen
+ACK_ONLY_EVENTS = frozenset([
+    "status-update", "conversation-update", "speech-update",
+    "hang", "user-interrupted", "model-output", "voice-input"
+])
+
+_VALUE_EVENTS = frozenset(["start_map", "start_array", "string", "number", "boolean", "null"])
+_SCALAR_EVENTS = frozenset(["string", "number", "boolean", "null"])
+
+
+class PayloadTooLargeError(Exception):
+    """Raised when a webhook body exceeds MAX_BODY_BYTES"""
+
+
+class _BoundedBody:
+    """Async file-like view over request.stream() that enforces the size limit"""
+
+    def __init__(self, chunks: AsyncIterator[bytes], limit: int, initial: bytes = b""):
+        self._chunks = chunks
+        self._limit = limit
+        self._buffer = initial
+        self.bytes_read = len(initial)
+
+    async def read(self, size: int = -1) -> bytes:
+        while not self._buffer:
+            try:
+                chunk = await self._chunks.__anext__()
+            except StopAsyncIteration:
+                return b""
+            self.bytes_read += len(chunk)
+            if self.bytes_read > self._limit:
+                raise PayloadTooLargeError(f"Webhook body exceeds {self._limit} bytes")
+            self._buffer = chunk
+        if size is None or size < 0 or size >= len(self._buffer):
+            data, self._buffer = self._buffer, b""
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def _assign(document: Dict[str, Any], path: str, value: Any) -> None:
+    """Set document[a][b][c] = value for path 'a.b.c', creating dicts on the way"""
+    keys = path.split(".")
+    node = document
+    for key in keys[:-1]:
+        child = node.get(key)
+        if not isinstance(child, dict):
+            child = {}
+            node[key] = child
+        node = child
+    node[keys[-1]] = value
+
+
+async def _parse_pruned(body: _BoundedBody) -> Dict[str, Any]:
+    """Stream-parse a webhook body, materialising only KEPT_PATHS and transcript messages"""
+    document: Dict[str, Any] = {}
+    builder = None
+    builder_path = None
+    depth = 0
+    messages = None
+
+    async for prefix, event, value in ijson.parse_async(body, use_float=True):
+        if builder is not None:
+            builder.event(event, value)
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+            if depth == 0:
+                if builder_path == MESSAGE_ITEM_PATH:
+                    messages.append(builder.value)
+                else:
+                    _assign(document, builder_path, builder.value)
+                builder = None
+            continue
+
+        if event not in _VALUE_EVENTS:
+            continue
+
+        if prefix == MESSAGES_PATH and event == "start_array":
+            messages = []
+            _assign(document, MESSAGES_PATH, messages)
+            continue
+
+        if prefix in KEPT_PATHS or (prefix == MESSAGE_ITEM_PATH and messages is not None):
+            if event in _SCALAR_EVENTS:
+                if prefix == MESSAGE_ITEM_PATH:
+                    messages.append(value)
+                else:
+                    _assign(document, prefix, value)
+                if prefix in ("message.type", "type") and value in ACK_ONLY_EVENTS:
+                    # Routing decided from the document prefix - skip the rest of the body
+                    logger.info(f"Webhook {value}: acknowledged without parsing remaining body")
+                    break
+                continue
+            builder = ObjectBuilder()
+            builder.event(event, value)
+            builder_path = prefix
+            depth = 1
+
+    return document
+
+
+async def read_webhook_payload(request, max_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Read and parse a Vapi webhook body
+
+    Small bodies (tool calls, call.started) are parsed with json.loads. Large
+    bodies are parsed incrementally when ijson is installed, keeping only the
+    fields vapi_webhook uses and the artifact.messages transcript.
+
+    Args:
+        request: Starlette/FastAPI request
+        max_bytes: Body size limit (defaults to VAPI_MAX_BODY_BYTES)
+
+    Returns:
+        Parsed (possibly pruned) payload dict
+
+    Raises:
+        PayloadTooLargeError: Body is over the limit
+        ValueError: Body is not valid JSON
+    """
+    limit = max_bytes or MAX_BODY_BYTES
+
+    content_length = request.headers.get("content-length")
+    declared = int(content_length) if content_length and content_length.isdigit() else None
+    if declared is not None and declared > limit:
+        raise PayloadTooLargeError(f"Webhook body of {declared} bytes exceeds {limit} bytes")
+
+    body = _BoundedBody(request.stream().__aiter__(), limit)
+
+    if streaming_available and (declared is None or declared > STREAMING_THRESHOLD_BYTES):
+        try:
+            payload = await _parse_pruned(body)
+        except ijson.JSONError as e:
+            raise ValueError(f"Invalid JSON body: {e}") from e
+        logger.info(f"Streamed webhook body ({body.bytes_read} bytes read)")
+        return payload
+
+    chunks = []
+    while True:
+        chunk = await body.read()
+        if not chunk:
+            break
+        chunks.append(chunk)
+    payload = json.loads(b"".join(chunks) or b"{}")
+    if not isinstance(payload, dict):
+        raise ValueError("Webhook body must be a JSON object")
+    return payload
@@ -0,0 +1,169 @@
+"""
+Booking Bulk I/O Benchmark - Import / export rows per second
+Writes N synthetic bookings (2 passengers each) to an NDJSON and a CSV
+file. Each file is imported into a fresh database with
+BookingService.import_bookings (executemany, one transaction per batch)
+and exported back with export_bookings. With --memory, peak Python memory
+is traced too (tracemalloc slows the run several times) to show it stays
+flat as N grows. The baseline inserts rows one at a time
+with a commit each, the way create_booking writes.
+
+Usage:
+    python benchmarks/bench_booking_bulk.py
+    python benchmarks/bench_booking_bulk.py --rows 100000,500000 --batch 5000 --json bulk.json
+    python benchmarks/bench_booking_bulk.py --rows 10000,100000 --memory
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import sqlite3
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from typing import Dict, Any, List, Iterator
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import booking_io
+from backend.bookings import BookingService, _INSERT_BOOKING, _INSERT_PASSENGER
+from backend.booking_io import BOOKING_FIELDS, PASSENGER_FIELDS
+from backend.references import encode
+
+
+def synthetic_records(rows: int) -> Iterator[Dict[str, Any]]:
+    for i in range(1, rows + 1):
+        reference = encode(i)
+        yield {
+            "booking_id": f"BK_20251201_{reference}",
+            "booking_reference": reference,
+            "booking_type": "flight" if i % 3 else "hotel",
+            "customer_phone": f"+9198{i % 100000000:08d}",
+            "customer_email": f"customer{i}@example.com",
+            "item_id": f"BLR-DXB-{i % 6 + 1:03d}",
+            "booking_data": {"flight_id": f"BLR-DXB-{i % 6 + 1:03d}", "price": 15000 + i % 5000, "currency": "INR"},
+            "total_amount": 15000 + i % 5000,
+            "currency": "INR",
+            "status": ("pending", "confirmed", "completed")[i % 3],
+            "created_at": f"2025-12-{i % 28 + 1:02d}T10:00:00",
+            "updated_at": f"2025-12-{i % 28 + 1:02d}T10:00:00",
+            "passengers": [
+                {"first_name": "Asha", "last_name": f"Rao{i}", "date_of_birth": "1990-01-01",
+                 "passport_number": f"P{i:08d}", "nationality": "IN"},
+                {"first_name": "Ravi", "last_name": f"Rao{i}", "date_of_birth": "1988-05-12",
+                 "passport_number": f"Q{i:08d}", "nationality": "IN"}
+            ]
+        }
+
+
+def write_file(path: str, rows: int, fmt: str) -> None:
+    """Stream synthetic records to disk in export format"""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(booking_io.header(fmt))
+        batch = []
+        for record in synthetic_records(rows):
+            batch.append(record)
+            if len(batch) == 5000:
+                f.write(booking_io.format_records(batch, fmt))
+                batch = []
+        f.write(booking_io.format_records(batch, fmt))
+
+
+def measure(fn, trace_memory: bool) -> Dict[str, Any]:
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    value = fn()
+    elapsed = time.perf_counter() - start
+    peak = None
+    if trace_memory:
+        peak = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+        tracemalloc.stop()
+    return {"seconds": elapsed, "peak_mb": peak, "value": value}
+
+
+def bench_format(workdir: str, rows: int, fmt: str, batch: int, trace_memory: bool) -> List[Dict[str, Any]]:
+    source = os.path.join(workdir, f"bookings_{rows}.{fmt}")
+    write_file(source, rows, fmt)
+    service = BookingService(db_path=os.path.join(workdir, f"import_{rows}_{fmt}.db"))
+
+    def load() -> Dict[str, Any]:
+        with open(source, encoding="utf-8", newline="") as f:
+            return service.import_bookings(f, fmt, batch_size=batch)
+
+    imported = measure(load, trace_memory)
+    assert imported["value"]["imported"] == rows, imported["value"]
+
+    def dump() -> int:
+        size = 0
+        for chunk in service.export_bookings(fmt, batch_size=batch):
+            size += len(chunk)
+        return size
+
+    exported = measure(dump, trace_memory)
+    return [
+        {"direction": "import", "format": fmt, "rows": rows, "seconds": round(imported["seconds"], 3),
+         "rows_per_second": round(rows / imported["seconds"]), "peak_mb": imported["peak_mb"],
+         "file_mb": round(os.path.getsize(source) / 1e6, 1)},
+        {"direction": "export", "format": fmt, "rows": rows, "seconds": round(exported["seconds"], 3),
+         "rows_per_second": round(rows / exported["seconds"]), "peak_mb": exported["peak_mb"],
+         "file_mb": round(exported["value"] / 1e6, 1)}
+    ]
+
+
+def bench_row_at_a_time(workdir: str, rows: int) -> Dict[str, Any]:
+    """One INSERT (+ passengers) and commit per booking, like create_booking"""
+    service = BookingService(db_path=os.path.join(workdir, f"single_{rows}.db"))
+    now = "2025-12-01T10:00:00"
+    records = [booking_io.booking_row(record, now) for record in synthetic_records(rows)]
+    start = time.perf_counter()
+    for row, passengers in records:
+        conn = sqlite3.connect(service.db_path)
+        conn.execute(_INSERT_BOOKING, tuple(row[field] for field in BOOKING_FIELDS))
+        conn.executemany(_INSERT_PASSENGER, [
+            (row["booking_id"], *(person[field] for field in PASSENGER_FIELDS)) for person in passengers
+        ])
+        conn.commit()
+        conn.close()
+    elapsed = time.perf_counter() - start
+    return {"direction": "import", "format": "row-at-a-time", "rows": rows, "seconds": round(elapsed, 3),
+            "rows_per_second": round(rows / elapsed), "peak_mb": None, "file_mb": None}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="10000,100000", help="Comma-separated booking counts")
+    parser.add_argument("--batch", type=int, default=2000, help="Rows per transaction / export query")
+    parser.add_argument("--baseline-rows", type=int, default=2000, help="Rows for the row-at-a-time baseline")
+    parser.add_argument("--memory", action="store_true", help="Trace peak Python memory (slower)")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    workdir = tempfile.mkdtemp(prefix="bench_bulk_")
+    results: List[Dict[str, Any]] = []
+    print(f"{'direction':<8} {'format':<14} {'rows':>9} {'seconds':>9} {'rows/s':>10} {'peak MB':>8} {'file MB':>8}")
+    for rows in [int(r) for r in args.rows.split(",") if r.strip()]:
+        for fmt in booking_io.FORMATS:
+            results.extend(bench_format(workdir, rows, fmt, args.batch, args.memory))
+    if args.baseline_rows:
+        results.append(bench_row_at_a_time(workdir, args.baseline_rows))
+    for row in results:
+        print(
+            f"{row['direction']:<8} {row['format']:<14} {row['rows']:>9,} {row['seconds']:>9} "
+            f"{row['rows_per_second']:>10,} {row['peak_mb'] if row['peak_mb'] is not None else '-':>8} "
+            f"{row['file_mb'] if row['file_mb'] is not None else '-':>8}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "booking_bulk", "python": platform.python_version(),
+                       "sqlite": sqlite3.sqlite_version, "batch": args.batch, "results": results}, f, indent=2)
+        print(f"\nSaved results to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
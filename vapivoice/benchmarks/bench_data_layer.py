@@ -0,0 +1,372 @@
+"""
+Data Layer Benchmark - Microbenchmarks for the catalogue, booking and summary code
+Each component is timed against synthetic data scaled from 10^3 to 10^6
+records (flights on a route, hotels, stored bookings, transcript messages) so
+the point where a component stops scaling shows up as a jump in per-call time.
+
+Usage:
+    python benchmarks/bench_data_layer.py
+    python benchmarks/bench_data_layer.py --scales 1000,10000,100000,1000000 --json data_layer.json
+    python benchmarks/bench_data_layer.py --only booking
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import sqlite3
+import logging
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import datetime
+from typing import Dict, Any, List, Callable, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+AIRLINES = [("Air India", "AI"), ("IndiGo", "6E"), ("Emirates", "EK"), ("Saudia", "SV"), ("Qatar Airways", "QR")]
+HOTEL_TYPES = [("5-star Luxury", 5), ("4-star Business", 4), ("3-star Budget", 3)]
+CITY_NAMES = ["bangalore", "Bengaluru", "JEDDAH", "riyadh", "dubai", "new york", "Timbuktu", "xyz", "Kochi", "goa"]
+USER_LINES = [
+    "I want to fly from Bangalore to Jeddah on December 15th",
+    "Book the IndiGo flight for two travellers, my email is traveller@example.com",
+    "Can you find me a hotel in Riyadh",
+    "What is the baggage allowance",
+]
+ASSISTANT_LINES = [
+    "Here are the available flights from Bangalore to Jeddah.",
+    "Your booking is confirmed, booking ID ABC12345.",
+    "I found six hotels in Riyadh.",
+    "Checked baggage is 30kg and cabin baggage is 7kg.",
+]
+
+
+# Synthetic data generators
+
+def airport_codes(count: int) -> List[str]:
+    """count distinct three-letter codes (AAA, AAB, ...)"""
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    codes = []
+    for a in letters:
+        for b in letters:
+            for c in letters:
+                codes.append(a + b + c)
+                if len(codes) == count:
+                    return codes
+    return codes
+
+
+def make_flight(index: int, origin_code: str, dest_code: str, rng: random.Random) -> Dict[str, Any]:
+    airline, code = AIRLINES[index % len(AIRLINES)]
+    hour = rng.randrange(24)
+    return {
+        "id": f"{origin_code}-{dest_code}-{index + 1:03d}",
+        "airline": airline,
+        "flight_number": f"{code} {100 + index % 900}",
+        "origin": origin_code,
+        "destination": dest_code,
+        "from": {"code": origin_code, "time": f"{hour:02d}:15"},
+        "to": {"code": dest_code, "time": f"{(hour + 5) % 24:02d}:30"},
+        "duration": "5h 15m",
+        "stops": index % 3 == 0,
+        "price": 15000 + rng.randrange(20000),
+        "currency": "INR",
+        "cabin_class": "Economy",
+        "seats_available": rng.randrange(1, 60),
+        "baggage": {"checked": "30kg", "cabin": "7kg"}
+    }
+
+
+def flights_catalogue(size: int, hot_route: str = "BLR-JED", per_route: int = 20, seed: int = 1) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    flights_db with `size` flights on hot_route plus size // per_route other
+    routes of per_route flights, so both route length and route count scale
+    """
+    rng = random.Random(seed)
+    origin_code, dest_code = hot_route.split("-")
+    catalogue = {hot_route: [make_flight(i, origin_code, dest_code, rng) for i in range(size)]}
+    codes = airport_codes(max(2, int((size // per_route) ** 0.5) + 2))
+    routes = 0
+    for origin in codes:
+        for dest in codes:
+            if routes >= size // per_route:
+                return catalogue
+            if origin != dest:
+                catalogue[f"{origin}-{dest}"] = [make_flight(i, origin, dest, rng) for i in range(per_route)]
+                routes += 1
+    return catalogue
+
+
+def hotels_catalogue(size: int, per_city: int = 50, seed: int = 2) -> Dict[str, List[Dict[str, Any]]]:
+    """hotels_data with `size` hotels spread over size // per_city cities"""
+    rng = random.Random(seed)
+    catalogue: Dict[str, List[Dict[str, Any]]] = {}
+    cities = max(1, size // per_city)
+    for i in range(size):
+        city = "Riyadh" if i % cities == 0 else f"City{i % cities:06d}"
+        hotel_type, stars = HOTEL_TYPES[i % len(HOTEL_TYPES)]
+        catalogue.setdefault(city, []).append({
+            "id": f"hotel_{city.lower()}_{i:07d}",
+            "name": f"Hotel {i}",
+            "city": city,
+            "location": f"{rng.randrange(1, 200)} Main Road, {city}",
+            "type": hotel_type,
+            "stars": stars,
+            "price": f"SAR {rng.randrange(200, 1500)}/night",
+            "reviews": "Clean rooms, friendly staff",
+            "google_maps_url": f"https://www.google.com/maps/search/?api=1&query=Hotel+{i}"
+        })
+    return catalogue
+
+
+def transcript(size: int, seed: int = 3) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "message": rng.choice(USER_LINES if i % 2 == 0 else ASSISTANT_LINES),
+            "time": float(i)
+        }
+        for i in range(size)
+    ]
+
+
+def populate_bookings(db_path: str, size: int, customers: int = 1000, seed: int = 4) -> List[str]:
+    """Bulk-insert `size` bookings (bypassing BookingService) and return their references"""
+    rng = random.Random(seed)
+    now = datetime.now().isoformat()
+    references = [f"R{i:09d}" for i in range(size)]
+    rows = (
+        (
+            f"BK{i:09d}", references[i], "flight" if i % 3 else "hotel",
+            f"+9190000{i % customers:05d}", "traveller@example.com", f"ITEM-{i}",
+            '{"price": 15000}', float(10000 + rng.randrange(20000)), "INR", "pending", now, now
+        )
+        for i in range(size)
+    )
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO bookings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return references
+
+
+# Harness
+
+def measure(fn: Callable[[], Any], min_time: float, rounds: int) -> Dict[str, float]:
+    """
+    pytest-benchmark style timing: calibrate iterations so one round takes at
+    least min_time, then report per-call min/median/mean/stddev over rounds
+    """
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or iterations >= 1 << 20:
+            break
+        iterations *= 2 if elapsed < min_time / 10 else max(2, int(min_time / max(elapsed, 1e-9)) + 1)
+
+    samples = [elapsed / iterations]
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        samples.append((time.perf_counter() - start) / iterations)
+
+    return {
+        "iterations": iterations,
+        "rounds": len(samples),
+        "min_us": round(min(samples) * 1e6, 3),
+        "median_us": round(statistics.median(samples) * 1e6, 3),
+        "mean_us": round(statistics.fmean(samples) * 1e6, 3),
+        "stddev_us": round(statistics.pstdev(samples) * 1e6, 3),
+        "ops_per_second": round(1 / statistics.median(samples)) if min(samples) else None
+    }
+
+
+class Suite:
+    def __init__(self, min_time: float, rounds: int, only: Optional[str]):
+        self.min_time = min_time
+        self.rounds = rounds
+        self.only = only
+        self.results: List[Dict[str, Any]] = []
+
+    def wants(self, group: str) -> bool:
+        return not self.only or self.only in group
+
+    def run(self, group: str, name: str, scale: int, fn: Callable[[], Any], setup_seconds: float = 0.0) -> None:
+        stats = measure(fn, self.min_time, self.rounds)
+        row = {"group": group, "name": name, "scale": scale, "setup_seconds": round(setup_seconds, 3), **stats}
+        self.results.append(row)
+        print(
+            f"{group:<10} {name:<42} n={scale:<9,} median {row['median_us']:>12,.2f}us  "
+            f"min {row['min_us']:>12,.2f}us  ({row['iterations']}x{row['rounds']})"
+        )
+
+
+# Benchmarks
+
+def bench_flights(suite: Suite, scale: int) -> None:
+    from backend.mock_flights import MockFlightsDatabase
+
+    db = MockFlightsDatabase()
+    start = time.perf_counter()
+    db.flights_db = flights_catalogue(scale)
+    setup = time.perf_counter() - start
+
+    suite.run("flights", "search_flights known route", scale,
+              lambda: db.search_flights("Bangalore", "Jeddah", "2025-12-20"), setup)
+    suite.run("flights", "search_flights small route (20 flights)", scale,
+              lambda: db.search_flights("AAA", "AAB", "2025-12-20"), setup)
+    suite.run("flights", "search_flights dynamic route", scale,
+              lambda: db.search_flights("Timbuktu", "Reykjavik", "2025-12-20"), setup)
+
+    start = time.perf_counter()
+    graph = db.route_graph()
+    graph_setup = time.perf_counter() - start
+    for rank_by in ("price", "duration"):
+        suite.run("flights", f"connections AAB-AAA by {rank_by}", scale,
+                  lambda: graph.search("AAB", "AAA", "2025-12-20", rank_by=rank_by), graph_setup)
+
+    # Lookup table is fixed-size; only the call cost matters here
+    batch = [CITY_NAMES[i % len(CITY_NAMES)] for i in range(1000)]
+    suite.run("flights", "_normalize_city x1000", scale, lambda: [db._normalize_city(n) for n in batch])
+
+    # Same catalogue through the mmap-backed columnar store
+    from backend.flight_inventory import write_inventory, ColumnarFlightInventory
+
+    path = os.path.join(os.getcwd(), f"flights_{scale}.vfi")
+    start = time.perf_counter()
+    write_inventory(path, (flight for route in db.flights_db.values() for flight in route))
+    inventory = ColumnarFlightInventory(path)
+    setup = time.perf_counter() - start
+    suite.run("flights", "columnar search_flights known route", scale,
+              lambda: inventory.search_flights("Bangalore", "Jeddah", "2025-12-20"), setup)
+    suite.run("flights", "columnar search_flights small route", scale,
+              lambda: inventory.search_flights("AAA", "AAB", "2025-12-20"), setup)
+    inventory.close()
+    os.remove(path)
+
+
+def bench_hotels(suite: Suite, scale: int) -> None:
+    from backend.mock_hotels import MockHotelsDatabase
+
+    db = MockHotelsDatabase()
+    start = time.perf_counter()
+    db.hotels_data = hotels_catalogue(scale)
+    setup = time.perf_counter() - start
+    last_city = next(reversed(db.hotels_data))
+    last_id = db.hotels_data[last_city][-1]["id"]
+
+    suite.run("hotels", "search_hotels first city", scale, lambda: db.search_hotels("Riyadh"), setup)
+    suite.run("hotels", "search_hotels last city", scale, lambda: db.search_hotels(last_city), setup)
+    suite.run("hotels", "search_hotels unknown city", scale, lambda: db.search_hotels("Atlantis"), setup)
+    suite.run("hotels", "get_hotel_details last hotel", scale, lambda: db.get_hotel_details(last_id), setup)
+
+
+def bench_bookings(suite: Suite, scale: int, workdir: str) -> None:
+    from backend.bookings import BookingService
+    from backend.mock_flights import MockFlightsDatabase
+
+    db_path = os.path.join(workdir, f"bookings_{scale}.db")
+    service = BookingService(db_path=db_path, flights=MockFlightsDatabase())
+    start = time.perf_counter()
+    references = populate_bookings(db_path, scale)
+    setup = time.perf_counter() - start
+    rng = random.Random(5)
+
+    suite.run("booking", "create_booking", scale,
+              lambda: service.create_booking("flight", "BLR-JED-001", "+919999900000", "traveller@example.com"), setup)
+    suite.run("booking", "get_booking_status", scale,
+              lambda: service.get_booking_status(rng.choice(references)), setup)
+    # Support agents polling a handful of bookings: served by the record cache
+    polled = references[:32]
+    suite.run("booking", "get_booking_status polled", scale,
+              lambda: service.get_booking_status(rng.choice(polled)), setup)
+    suite.run("booking", "update_booking_status", scale,
+              lambda: service.update_booking_status(rng.choice(references), "confirmed"), setup)
+    suite.run("booking", "get_customer_bookings", scale,
+              lambda: service.get_customer_bookings(f"+9190000{rng.randrange(1000):05d}"), setup)
+    cursors = [service.get_customer_bookings(f"+9190000{i:05d}")["next_cursor"] for i in range(100)]
+    pages = [(f"+9190000{i:05d}", cursor) for i, cursor in enumerate(cursors) if cursor]
+    if pages:
+        def second_page() -> Dict[str, Any]:
+            phone, cursor = rng.choice(pages)
+            return service.get_customer_bookings(phone, cursor=cursor)
+
+        suite.run("booking", "get_customer_bookings page 2", scale, second_page, setup)
+
+
+def bench_email(suite: Suite, scale: int) -> None:
+    from backend.email_service import EmailService
+
+    service = EmailService()
+    messages = transcript(scale)
+    booking = {
+        "departure_location": "Bangalore", "destination": "Jeddah", "departure_date": "2025-12-15",
+        "airline": "IndiGo", "flight_number": "6E 77", "num_travelers": 2, "booking_id": "ABC12345"
+    }
+    suite.run("email", "_generate_html_email", scale, lambda: service._generate_html_email(
+        "Traveller", "Flight booked", transcript=messages, booking_details=booking,
+        call_duration=300, session_id="bench", timestamp="December 01, 2025 at 10:00 AM"
+    ))
+
+
+def bench_summary(suite: Suite, scale: int) -> None:
+    from backend.server import generate_structured_summary, extract_booking_from_transcript
+
+    messages = transcript(scale)
+    suite.run("summary", "extract_booking_from_transcript", scale,
+              lambda: extract_booking_from_transcript(messages, "Caller booked a flight"))
+    booking = extract_booking_from_transcript(messages, "Caller booked a flight")
+    suite.run("summary", "generate_structured_summary", scale,
+              lambda: generate_structured_summary(messages, booking))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1000,10000,100000", help="Comma-separated record counts (up to 1000000)")
+    parser.add_argument("--only", help="Run only groups containing this (flights, hotels, booking, email, summary)")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Minimum seconds per round")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    # The modules under test log every call; that would dominate the timings
+    logging.disable(logging.ERROR)
+    output = os.path.abspath(args.json) if args.json else None
+    workdir = tempfile.mkdtemp(prefix="bench_data_layer_")
+    # server.py creates bookings.db in the working directory
+    os.chdir(workdir)
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    suite = Suite(args.min_time, args.rounds, args.only)
+    for scale in scales:
+        if suite.wants("flights"):
+            bench_flights(suite, scale)
+        if suite.wants("hotels"):
+            bench_hotels(suite, scale)
+        if suite.wants("booking"):
+            bench_bookings(suite, scale, workdir)
+        if suite.wants("email"):
+            bench_email(suite, scale)
+        if suite.wants("summary"):
+            bench_summary(suite, scale)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump({
+                "benchmark": "data_layer",
+                "python": platform.python_version(),
+                "scales": scales,
+                "results": suite.results
+            }, f, indent=2)
+        print(f"\nSaved results to {output}")
+
+
+if __name__ == "__main__":
+    main()
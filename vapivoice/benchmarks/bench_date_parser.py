@@ -0,0 +1,160 @@
+"""
+Date Parser Benchmark - Resolves a large corpus of spoken dates
+Compares the old inline webhook normaliser with backend.date_parser, cold and
+with the LRU memo warm
+
+Usage:
+    python benchmarks/bench_date_parser.py --size 200000
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import date_parser
+from backend.date_parser import resolve_spoken_date, find_spoken_dates
+
+
+MONTH_NAMES = [
+    "January", "February", "March", "April", "May", "June", "July",
+    "August", "September", "October", "November", "December"
+]
+ORDINALS = [
+    "first", "second", "third", "fourth", "fifth", "sixth", "seventh", "eighth",
+    "ninth", "tenth", "eleventh", "twelfth", "thirteenth", "fourteenth",
+    "fifteenth", "sixteenth", "seventeenth", "eighteenth", "nineteenth",
+    "twentieth", "twenty-first", "twenty-second", "twenty-third",
+    "twenty-fourth", "twenty-fifth", "twenty-sixth", "twenty-seventh",
+    "twenty-eighth"
+]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def build_corpus(size: int, seed: int = 7) -> list:
+    """
+    Synthetic spoken-date corpus. Real callers repeat a small set of phrases
+    ("next Friday", "December 20th"), so draws are skewed towards a hot set.
+    """
+    rng = random.Random(seed)
+
+    def one() -> str:
+        month = rng.randrange(12)
+        day = rng.randrange(28)
+        year = rng.choice(["", " 2025", " 2026"])
+        kind = rng.randrange(9)
+        if kind == 0:
+            return f"{MONTH_NAMES[month]} {ORDINALS[day]}{year}"
+        if kind == 1:
+            return f"{MONTH_NAMES[month]} {day + 1}{year}"
+        if kind == 2:
+            return f"the {day + 1}th of {MONTH_NAMES[month]}"
+        if kind == 3:
+            return f"{MONTH_NAMES[month][:3].lower()} {day + 1}"
+        if kind == 4:
+            return f"2025{month + 1:02d}{day + 1:02d}"
+        if kind == 5:
+            return f"{day + 1:02d}/{month + 1:02d}/2026"
+        if kind == 6:
+            return f"{rng.choice(['next', 'this', 'coming'])} {rng.choice(WEEKDAYS)}"
+        if kind == 7:
+            return rng.choice(["tomorrow", "day after tomorrow", "in two weeks", "in 3 days"])
+        return f"I want to fly on {MONTH_NAMES[month]} {day + 1} please"
+
+    hot = [one() for _ in range(200)]
+    return [rng.choice(hot) if rng.random() < 0.8 else one() for _ in range(size)]
+
+
+def legacy_normalise(departure_date: str) -> str:
+    """The inline normaliser vapi_webhook used before date_parser existed"""
+    if departure_date and len(departure_date) == 8 and departure_date.isdigit():
+        departure_date = f"{departure_date[0:4]}-{departure_date[4:6]}-{departure_date[6:8]}"
+    if departure_date and not departure_date[0:4].isdigit():
+        month_map = {
+            'january': '01', 'jan': '01', 'february': '02', 'feb': '02',
+            'march': '03', 'mar': '03', 'april': '04', 'apr': '04', 'may': '05',
+            'june': '06', 'jun': '06', 'july': '07', 'jul': '07',
+            'august': '08', 'aug': '08', 'september': '09', 'sep': '09',
+            'october': '10', 'oct': '10', 'november': '11', 'nov': '11',
+            'december': '12', 'dec': '12'
+        }
+        date_lower = departure_date.lower()
+        day_match = re.search(r'\b(\d{1,2})\b', date_lower)
+        month_match = None
+        for month_name, month_num in month_map.items():
+            if month_name in date_lower:
+                month_match = month_num
+                break
+        if day_match and month_match:
+            year = 2025 if int(month_match) <= 2 else 2026
+            departure_date = f"{year}-{month_match}-{day_match.group(1).zfill(2)}"
+        else:
+            departure_date = "2025-12-20"
+    return departure_date
+
+
+def timed(label: str, fn, corpus: list) -> dict:
+    start = time.perf_counter()
+    resolved = 0
+    for text in corpus:
+        if fn(text):
+            resolved += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "name": label,
+        "items": len(corpus),
+        "seconds": round(elapsed, 4),
+        "per_second": round(len(corpus) / elapsed) if elapsed else None,
+        "us_per_item": round(elapsed / len(corpus) * 1e6, 3),
+        "resolved": resolved
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=200000, help="Number of utterances")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.size)
+    reference = date(2025, 11, 1)
+    results = []
+
+    results.append(timed("legacy inline normaliser", legacy_normalise, corpus))
+
+    date_parser.clear_cache()
+    unique = list(dict.fromkeys(corpus))
+    results.append(timed("date_parser cold (unique)", lambda t: resolve_spoken_date(t, reference), unique))
+
+    date_parser.clear_cache()
+    results.append(timed("date_parser corpus", lambda t: resolve_spoken_date(t, reference), corpus))
+    info = date_parser.cache_info()
+    results[-1]["cache_hit_rate"] = round(info.hits / max(1, info.hits + info.misses), 4)
+
+    transcript = " ".join(corpus[:2000])
+    start = time.perf_counter()
+    found = find_spoken_dates(transcript, reference)
+    results.append({
+        "name": "find_spoken_dates (2000-utterance transcript)",
+        "items": len(found),
+        "seconds": round(time.perf_counter() - start, 4)
+    })
+
+    for row in results:
+        extra = f"  hit rate {row['cache_hit_rate']:.1%}" if "cache_hit_rate" in row else ""
+        rate = f"{row['per_second']:>10,}/s" if row.get("per_second") else " " * 12
+        print(f"{row['name']:<48} {row['seconds']:>8.3f}s {rate}{extra}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"benchmark": "date_parser", "size": args.size, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
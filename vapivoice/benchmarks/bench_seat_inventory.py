@@ -0,0 +1,187 @@
+"""
+Seat Inventory Benchmark - Hold / confirm throughput under contention
+Many threads (or concurrent HTTP requests) book seats at once, either all on
+one flight or spread over many, and every run checks that exactly the
+flight's capacity was sold - no seat twice, none lost. The SQLite baseline
+does the same check-and-decrement as a conditional UPDATE
+(... WHERE seats >= n) for comparison with the in-memory striped locks.
+
+Usage:
+    python benchmarks/bench_seat_inventory.py
+    python benchmarks/bench_seat_inventory.py --threads 1,8,32 --ops 2000 --json seats.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import sqlite3
+import argparse
+import platform
+import tempfile
+import threading
+from typing import Dict, Any, List, Callable
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_threads(threads: int, ops: int, work: Callable[[int, int], bool]) -> Dict[str, Any]:
+    """ops calls of work(thread, i) on each of `threads` threads released together"""
+    barrier = threading.Barrier(threads + 1)
+    successes = [0] * threads
+
+    def worker(index: int) -> None:
+        barrier.wait()
+        done = 0
+        for i in range(ops):
+            if work(index, i):
+                done += 1
+        successes[index] = done
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    total = threads * ops
+    return {
+        "threads": threads,
+        "attempts": total,
+        "succeeded": sum(successes),
+        "seconds": round(elapsed, 4),
+        "ops_per_second": round(total / elapsed) if elapsed else None
+    }
+
+
+def report(results: List[Dict[str, Any]], name: str, row: Dict[str, Any], expected_sold: int, sold: int) -> None:
+    row = {"name": name, **row, "sold": sold, "correct": sold == expected_sold == row["succeeded"]}
+    results.append(row)
+    print(
+        f"{name:<40} threads={row['threads']:<4} {row['ops_per_second']:>10,} ops/s  "
+        f"sold {sold:>7,}/{expected_sold:<7,} {'ok' if row['correct'] else 'OVERSOLD/LOST'}"
+    )
+
+
+def bench_memory(results: List[Dict[str, Any]], threads: int, ops: int) -> None:
+    from backend.seat_inventory import SeatInventory
+
+    # Same flight, capacity below demand: the sold-out path is exercised too
+    capacity = threads * ops // 2
+    inventory = SeatInventory(capacity=lambda flight_id: capacity)
+    row = run_threads(threads, ops, lambda t, i: inventory.book("BLR-JED-001", "2025-12-20")["success"])
+    report(results, "memory book, one flight", row, capacity, inventory.availability("BLR-JED-001", "2025-12-20")["seats_sold"])
+
+    # Hold then confirm (two lock round-trips) on one flight
+    inventory = SeatInventory(capacity=lambda flight_id: capacity)
+
+    def hold_confirm(t: int, i: int) -> bool:
+        held = inventory.hold("BLR-JED-001", "2025-12-20")
+        return held["success"] and inventory.confirm(held["hold_id"])["success"]
+
+    row = run_threads(threads, ops, hold_confirm)
+    report(results, "memory hold+confirm, one flight", row, capacity, inventory.availability("BLR-JED-001", "2025-12-20")["seats_sold"])
+
+    # Hold then release: seats always come back, nothing is sold
+    inventory = SeatInventory(capacity=lambda flight_id: 1)
+
+    def hold_release(t: int, i: int) -> bool:
+        held = inventory.hold("BLR-JED-001", "2025-12-20")
+        return held["success"] and inventory.release(held["hold_id"])["success"] and False
+
+    row = run_threads(threads, ops, hold_release)
+    report(results, "memory hold+release, one flight", row, 0, inventory.availability("BLR-JED-001", "2025-12-20")["seats_sold"])
+
+    # Spread over 256 flights: striping lets threads work on different flights
+    for stripes in (1, 64):
+        inventory = SeatInventory(capacity=lambda flight_id: ops, stripes=stripes)
+        row = run_threads(threads, ops, lambda t, i: inventory.book(f"BLR-JED-{(t * 31 + i) % 256:03d}", "2025-12-20")["success"])
+        sold = sum(inventory.availability(f"BLR-JED-{n:03d}", "2025-12-20")["seats_sold"] for n in range(256))
+        report(results, f"memory book, 256 flights, {stripes} stripes", row, threads * ops, sold)
+
+
+def bench_sqlite(results: List[Dict[str, Any]], threads: int, ops: int, workdir: str) -> None:
+    path = os.path.join(workdir, f"seats_{threads}.db")
+    capacity = threads * ops // 2
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("CREATE TABLE seats (flight_key TEXT PRIMARY KEY, available INTEGER, sold INTEGER)")
+    conn.execute("INSERT INTO seats VALUES (?, ?, 0)", ("BLR-JED-001@2025-12-20", capacity))
+    conn.commit()
+    conn.close()
+    local = threading.local()
+
+    def book(t: int, i: int) -> bool:
+        db = getattr(local, "conn", None)
+        if db is None:
+            db = local.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        cursor = db.execute(
+            "UPDATE seats SET available = available - 1, sold = sold + 1 WHERE flight_key = ? AND available >= 1",
+            ("BLR-JED-001@2025-12-20",)
+        )
+        return cursor.rowcount == 1
+
+    row = run_threads(threads, ops, book)
+    conn = sqlite3.connect(path)
+    sold = conn.execute("SELECT sold FROM seats").fetchone()[0]
+    conn.close()
+    report(results, "sqlite conditional UPDATE, one flight", row, capacity, sold)
+
+
+async def bench_http(results: List[Dict[str, Any]], concurrency: int, capacity: int) -> None:
+    """Concurrent POST /api/seat-holds on one flight through the ASGI app"""
+    import httpx
+    from backend import server
+    from backend.seat_inventory import SeatInventory
+
+    server.seat_inventory = SeatInventory(capacity=lambda flight_id: capacity)
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        body = {"flight_id": "BLR-JED-001", "travel_date": "2025-12-20", "seats": 1}
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(client.post("/api/seat-holds", json=body) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    held = sum(1 for response in responses if response.status_code == 200)
+    row = {
+        "threads": concurrency,
+        "attempts": concurrency,
+        "succeeded": held,
+        "seconds": round(elapsed, 4),
+        "ops_per_second": round(concurrency / elapsed) if elapsed else None
+    }
+    report(results, "http POST /api/seat-holds, one flight", row, capacity,
+           server.seat_inventory.availability("BLR-JED-001", "2025-12-20")["seats_held"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", default="1,4,16,64", help="Comma-separated thread counts")
+    parser.add_argument("--ops", type=int, default=2000, help="Operations per thread")
+    parser.add_argument("--requests", type=int, default=2000, help="Concurrent HTTP hold requests")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    logging.disable(logging.ERROR)
+    output = os.path.abspath(args.json) if args.json else None
+    workdir = tempfile.mkdtemp(prefix="bench_seats_")
+    # server.py creates bookings.db in the working directory
+    os.chdir(workdir)
+
+    results: List[Dict[str, Any]] = []
+    for threads in [int(t) for t in args.threads.split(",") if t.strip()]:
+        bench_memory(results, threads, args.ops)
+        bench_sqlite(results, threads, max(1, args.ops // 10), workdir)
+    asyncio.run(bench_http(results, args.requests, args.requests // 2))
+
+    if output:
+        with open(output, "w") as f:
+            json.dump({"benchmark": "seat_inventory", "python": platform.python_version(), "results": results}, f, indent=2)
+        print(f"\nSaved results to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Startup Benchmark - Import-time profile and time-to-first-request
+Runs fresh interpreters so nothing is cached in-process:
+  1. `python -X importtime -c "import backend.server"`, summarised per module
+     and per top-level package
+  2. time from interpreter start to the first answered request, with lazy
+     services (default) and with VAPI_EAGER_INIT=1 (the old eager behaviour)
+
+Usage:
+    python benchmarks/bench_startup.py --runs 7 --json startup.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+from collections import defaultdict
+from typing import Dict, Any, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executed in a fresh interpreter; prints one JSON line of timings
+FIRST_REQUEST_SCRIPT = r"""
+import time
+t0 = time.perf_counter()
+import sys, json, asyncio, logging
+logging.disable(logging.ERROR)
+sys.path.insert(0, {root!r})
+from backend import server
+t_import = time.perf_counter()
+import httpx
+
+async def first_requests():
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/health")
+        t_health = time.perf_counter()
+        await client.post("/webhooks/vapi", json={{"message": {{"type": "tool-calls", "call": {{"id": "startup"}},
+            "toolCalls": [{{"id": "t1", "function": {{"name": "search_flights",
+            "arguments": {{"origin": "BLR", "destination": "JED", "departure_date": "2025-12-20"}}}}}}]}}}})
+        t_tool = time.perf_counter()
+        return t_health, t_tool
+
+t_health, t_tool = asyncio.run(first_requests())
+print(json.dumps({{
+    "import_ms": (t_import - t0) * 1000,
+    "first_health_ms": (t_health - t0) * 1000,
+    "first_tool_call_ms": (t_tool - t0) * 1000
+}}))
+"""
+
+
+def import_profile(workdir: str) -> List[Dict[str, Any]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import logging; logging.disable(logging.ERROR); import backend.server"],
+        cwd=workdir, env={**os.environ, "PYTHONPATH": ROOT}, capture_output=True, text=True, check=True
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # Indentation of the name is nesting depth; strip it
+        name = name.strip()
+        rows.append({"module": name, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    return rows
+
+
+def first_request(workdir: str, eager: bool) -> Dict[str, float]:
+    env = {**os.environ, "VAPI_EAGER_INIT": "1" if eager else "0"}
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_REQUEST_SCRIPT.format(root=ROOT)],
+        cwd=workdir, env=env, capture_output=True, text=True, check=True
+    )
+    # bookings.db is created in workdir on first use; start each run cold
+    db_path = os.path.join(workdir, "bookings.db")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per mode")
+    parser.add_argument("--top", type=int, default=15, help="Modules to list in the import profile")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_startup_")
+
+    modules = import_profile(workdir)
+    packages: Dict[str, float] = defaultdict(float)
+    for row in modules:
+        top = row["module"].split(".")[0]
+        packages[top if top != "backend" else row["module"]] += row["self_ms"]
+
+    print("Slowest imports (cumulative)")
+    for row in sorted(modules, key=lambda r: r["cumulative_ms"], reverse=True)[:args.top]:
+        print(f"  {row['module']:<44} {row['cumulative_ms']:>8.1f}ms  self {row['self_ms']:>7.1f}ms")
+    print("\nSelf time by package")
+    for name, ms in sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"  {name:<44} {ms:>8.1f}ms")
+
+    startup = {}
+    for mode, eager in (("lazy", False), ("eager", True)):
+        runs = [first_request(workdir, eager) for _ in range(args.runs)]
+        startup[mode] = {key: round(statistics.median(run[key] for run in runs), 2) for key in runs[0]}
+
+    print(f"\nTime from interpreter start (median of {args.runs})")
+    for mode, row in startup.items():
+        print(
+            f"  {mode:<6} import {row['import_ms']:>8.1f}ms  first /health {row['first_health_ms']:>8.1f}ms  "
+            f"first tool-call {row['first_tool_call_ms']:>8.1f}ms"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "benchmark": "startup",
+                "python": sys.version.split()[0],
+                "imports": sorted(modules, key=lambda r: r["cumulative_ms"], reverse=True),
+                "startup": startup
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
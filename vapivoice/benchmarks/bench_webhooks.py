@@ -0,0 +1,255 @@
+"""
+Webhook Benchmark - Replays synthetic Vapi payloads against the FastAPI app
+Runs in-process over httpx's ASGI transport (no sockets), so numbers measure
+the app itself: search_flights / search_hotels tool-calls, call.started and
+end-of-call-reports with transcripts of varying length. Reports p50/p95/p99
+latency and throughput per path and can compare against a saved run.
+
+Usage:
+    python benchmarks/bench_webhooks.py --requests 500 --json results.json
+    python benchmarks/bench_webhooks.py --compare results.json --threshold 0.2
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tempfile
+import platform
+from typing import Dict, Any, List, Callable, Optional
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROUTES = [("BLR", "JED"), ("BLR", "RUH"), ("BLR", "DXB"), ("BLR", "CCU"), ("MAA", "DXB")]
+CITIES = ["Riyadh", "Jeddah", "Al-Ula", "Abha", "Dammam"]
+DATES = ["2025-12-20", "December 15th", "next Friday", "20251218", "the 3rd of January"]
+TRANSCRIPT_LENGTHS = (10, 100, 1000)
+
+USER_LINES = [
+    "I want to fly from Bangalore to Jeddah on December 15th",
+    "Can you show me hotels in Riyadh for three nights",
+    "Two travellers, economy please",
+    "Book the IndiGo flight, my email is traveller@example.com",
+    "What time does it land?",
+]
+ASSISTANT_LINES = [
+    "Here are the available flights for your dates.",
+    "I found six hotels in Riyadh, shown on your screen.",
+    "Your booking is confirmed, booking ID ABC123.",
+    "The flight lands at 5:30 in the morning local time.",
+]
+
+
+def _tool_call(rng: random.Random, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    call_id = f"bench-{rng.randrange(1000)}"
+    return {
+        "message": {
+            "type": "tool-calls",
+            "call": {"id": call_id},
+            "toolCalls": [{
+                "id": f"tool-{rng.randrange(10 ** 6)}",
+                "type": "function",
+                "function": {"name": name, "arguments": arguments}
+            }]
+        }
+    }
+
+
+def search_flights_payload(rng: random.Random) -> Dict[str, Any]:
+    origin, destination = rng.choice(ROUTES)
+    return _tool_call(rng, "search_flights", {
+        "origin": origin,
+        "destination": destination,
+        "departure_date": rng.choice(DATES)
+    })
+
+
+def search_hotels_payload(rng: random.Random) -> Dict[str, Any]:
+    return _tool_call(rng, "search_hotels", {"city": rng.choice(CITIES)})
+
+
+def call_started_payload(rng: random.Random) -> Dict[str, Any]:
+    return {"message": {"type": "call.started", "call": {"id": f"bench-{rng.randrange(1000)}"}}}
+
+
+def end_of_call_payload(rng: random.Random, messages: int) -> Dict[str, Any]:
+    transcript = []
+    for i in range(messages):
+        role = "user" if i % 2 == 0 else "assistant"
+        line = rng.choice(USER_LINES if role == "user" else ASSISTANT_LINES)
+        transcript.append({"role": role, "message": line, "time": float(i), "secondsFromStart": i})
+    return {
+        "message": {
+            "type": "end-of-call-report",
+            "call": {"id": f"bench-{rng.randrange(1000)}", "createdAt": 1764547200000},
+            "timestamp": 1764547200000,
+            "duration": messages * 4,
+            "analysis": {"summary": "Caller searched flights and hotels and booked a flight."},
+            "artifact": {
+                "messages": transcript,
+                "transcript": "\n".join(f"{m['role']}: {m['message']}" for m in transcript)
+            }
+        }
+    }
+
+
+def scenarios() -> Dict[str, Callable[[random.Random], Dict[str, Any]]]:
+    paths = {
+        "tool-calls search_flights": search_flights_payload,
+        "tool-calls search_hotels": search_hotels_payload,
+        "call.started": call_started_payload,
+    }
+    for length in TRANSCRIPT_LENGTHS:
+        paths[f"end-of-call-report ({length} msgs)"] = lambda rng, n=length: end_of_call_payload(rng, n)
+    return paths
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def run_path(
+    client: httpx.AsyncClient,
+    build: Callable[[random.Random], Dict[str, Any]],
+    requests: int,
+    concurrency: int,
+    warmup: int,
+    seed: int
+) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    # Bodies are encoded up front so the client side costs as little as possible
+    bodies = [json.dumps(build(rng)).encode() for _ in range(warmup + requests)]
+    headers = {"content-type": "application/json"}
+
+    for body in bodies[:warmup]:
+        await client.post("/webhooks/vapi", content=body, headers=headers)
+
+    latencies: List[float] = []
+    errors = 0
+    queue = iter(bodies[warmup:])
+
+    async def worker() -> None:
+        nonlocal errors
+        for body in queue:
+            start = time.perf_counter()
+            response = await client.post("/webhooks/vapi", content=body, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "throughput_rps": round(requests / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        "body_bytes": round(sum(len(b) for b in bodies) / len(bodies))
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    # Server creates bookings.db in the working directory - keep it out of the tree
+    os.chdir(tempfile.mkdtemp(prefix="bench_webhooks_"))
+    from backend import server
+
+    transport = httpx.ASGITransport(app=server.app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for index, (name, build) in enumerate(scenarios().items()):
+            if args.only and args.only not in name:
+                continue
+            results[name] = await run_path(
+                client, build, args.requests, args.concurrency, args.warmup, args.seed + index
+            )
+            row = results[name]
+            print(
+                f"{name:<36} p50 {row['p50_ms']:>8.2f}ms  p95 {row['p95_ms']:>8.2f}ms  "
+                f"p99 {row['p99_ms']:>8.2f}ms  {row['throughput_rps']:>8.1f} req/s"
+                + (f"  errors {row['errors']}" if row["errors"] else "")
+            )
+    return {
+        "benchmark": "webhooks",
+        "python": platform.python_version(),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], metric: str, threshold: float) -> List[str]:
+    """Paths whose metric got worse than baseline by more than threshold (fraction)"""
+    regressions = []
+    print(f"\nComparison on {metric} (threshold +{threshold:.0%})")
+    for name, row in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get(metric):
+            print(f"{name:<36} no baseline")
+            continue
+        change = (row[metric] - base[metric]) / base[metric]
+        flag = "REGRESSION" if change > threshold else ""
+        print(f"{name:<36} {base[metric]:>9.2f} -> {row[metric]:>9.2f} ({change:+.1%}) {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300, help="Timed requests per path")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent in-flight requests")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests per path")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", help="Run only paths whose name contains this")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Baseline results file to compare against")
+    parser.add_argument("--metric", default="p95_ms", choices=["p50_ms", "p95_ms", "p99_ms"])
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed slowdown before failing (0.15 = 15%%)")
+    parser.add_argument("--verbose", action="store_true", help="Keep the server's logging")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        # The webhook handlers log every payload; that would dominate the timings
+        logging.disable(logging.ERROR)
+
+    baseline: Optional[Dict[str, Any]] = None
+    if args.compare:
+        with open(os.path.abspath(args.compare)) as f:
+            baseline = json.load(f)
+    output = os.path.abspath(args.json) if args.json else None
+
+    current = asyncio.run(run(args))
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nSaved results to {output}")
+
+    if baseline is not None:
+        regressions = compare(current, baseline, args.metric, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} path(s) regressed beyond {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Booking cache tests - least-recently-used eviction and invalidation
+"""
+
+import io
+
+from backend.bookings import BookingCache, BookingRecord, BookingService
+
+
+def record(reference: str) -> BookingRecord:
+    return BookingRecord((f"BK_{reference}", reference, "hotel", "pending", 100.0, "SAR", "{}", "2026-01-01"), [])
+
+
+def test_hit_refreshes_recency():
+    cache = BookingCache(max_entries=2)
+    cache.put(record("A"), cache.generation)
+    cache.put(record("B"), cache.generation)
+    assert cache.get("A") is not None
+    cache.put(record("C"), cache.generation)
+    assert cache.get("B") is None
+    assert cache.get("A") is not None and cache.get("C") is not None
+
+
+def test_stale_put_after_invalidate_is_dropped():
+    cache = BookingCache()
+    generation = cache.generation
+    cache.invalidate("A")
+    cache.put(record("A"), generation)
+    assert cache.get("A") is None
+
+
+def test_status_update_invalidates_cached_record(tmp_path):
+    service = BookingService(db_path=str(tmp_path / "bookings.db"))
+    service.import_bookings(io.StringIO('{"booking_type": "hotel", "customer_phone": "+1"}\n'))
+    reference = service.get_customer_bookings("+1")["bookings"][0]["booking_reference"]
+    assert service.get_booking_status(reference)["status"] == "pending"
+    assert service.update_booking_status(reference, "confirmed")
+    assert service.get_booking_status(reference)["status"] == "confirmed"
+
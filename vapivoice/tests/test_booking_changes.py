@@ -0,0 +1,70 @@
+"""
+Booking change feed tests - status changes are logged with the write and followable
+"""
+
+import io
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import server
+from backend.bookings import BookingService
+
+
+@pytest.fixture
+def service(tmp_path) -> BookingService:
+    service = BookingService(db_path=str(tmp_path / "bookings.db"))
+    service.import_bookings(io.StringIO('{"booking_type": "hotel", "customer_phone": "+1"}\n'))
+    return service
+
+
+def reference_of(service: BookingService) -> str:
+    return service.get_customer_bookings("+1")["bookings"][0]["booking_reference"]
+
+
+def statuses(service: BookingService, offset: int = 0):
+    return [(change["old_status"], change["new_status"]) for change in service.changes.read(offset)]
+
+
+def test_status_changes_are_logged_once(service):
+    reference = reference_of(service)
+    assert service.update_booking_status(reference, "confirmed")
+    assert service.update_booking_status(reference, "confirmed")
+    assert statuses(service) == [(None, "pending"), ("pending", "confirmed")]
+
+
+def test_spoken_reference_forms_are_updated(service):
+    reference = reference_of(service)
+    spoken = f"{reference[:4]}-{reference[4:]}".lower()
+    assert service.update_booking_status(spoken, "cancelled")
+    assert service.get_booking_status(reference)["status"] == "cancelled"
+    assert statuses(service)[-1] == ("pending", "cancelled")
+    assert service.changes.read(0)[-1]["booking_reference"] == reference
+
+
+def test_unknown_reference_is_not_updated(service):
+    assert not service.update_booking_status("ZZZZZZZZ", "cancelled")
+    assert statuses(service) == [(None, "pending")]
+
+
+def test_follow_yields_new_changes(service):
+    reference = reference_of(service)
+
+    async def next_change():
+        follower = service.changes.follow()
+        pending = asyncio.ensure_future(follower.__anext__())
+        await asyncio.sleep(0.1)
+        await asyncio.to_thread(service.update_booking_status, reference, "completed")
+        return await asyncio.wait_for(pending, 5)
+
+    change = asyncio.run(next_change())
+    assert (change["old_status"], change["new_status"]) == ("pending", "completed")
+
+
+@pytest.mark.parametrize("path", ["/api/booking-changes", "/api/booking-changes/stream"])
+def test_feed_refused_without_configured_token(monkeypatch, path):
+    monkeypatch.setattr(server, "BULK_TOKEN", None)
+    assert TestClient(server.app).get(path).status_code == 403
+    monkeypatch.setattr(server, "BULK_TOKEN", "secret")
+    assert TestClient(server.app).get(path, headers={"x-bulk-token": "guess"}).status_code == 403
@@ -0,0 +1,45 @@
+"""
+Bulk import tests - batches are atomic and refused batches don't stop the import
+"""
+
+import io
+import json
+import sqlite3
+
+from backend.bookings import BookingService
+
+
+def records(*phones: str) -> io.StringIO:
+    return io.StringIO("".join(
+        json.dumps({"booking_type": "hotel", "customer_phone": phone, "item_id": "hotel_riyadh_001"}) + "\n"
+        for phone in phones
+    ))
+
+
+def test_import_skips_existing_bookings(tmp_path):
+    service = BookingService(db_path=str(tmp_path / "bookings.db"))
+    first = service.import_bookings(records("+1", "+2"))
+    assert (first["imported"], first["skipped"]) == (2, 0)
+    exported = io.StringIO("".join(service.export_bookings()))
+    again = service.import_bookings(exported)
+    assert (again["imported"], again["skipped"]) == (0, 2)
+
+
+def test_refused_batch_is_rolled_back_and_rejected(tmp_path):
+    service = BookingService(db_path=str(tmp_path / "bookings.db"))
+    conn = sqlite3.connect(service.db_path)
+    conn.execute(
+        "CREATE TRIGGER refuse BEFORE INSERT ON bookings WHEN NEW.customer_phone = '+bad' "
+        "BEGIN SELECT RAISE(ABORT, 'refused'); END"
+    )
+    conn.commit()
+    conn.close()
+
+    result = service.import_bookings(records("+1", "+bad", "+3", "+4"), batch_size=2)
+    assert result["success"]
+    assert (result["imported"], result["rejected"], result["batches"]) == (2, 2, 1)
+    assert [error["line"] for error in result["errors"]] == [1, 2]
+    assert [change["booking_reference"] for change in service.changes.read(0)] == [
+        booking["booking_reference"] for booking in service.get_customer_bookings("+3")["bookings"]
+    ] + [booking["booking_reference"] for booking in service.get_customer_bookings("+4")["bookings"]]
+    assert service.get_customer_bookings("+1")["bookings"] == []
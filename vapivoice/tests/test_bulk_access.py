@@ -0,0 +1,34 @@
+"""
+Bulk endpoint access tests - refused unless VAPI_BULK_TOKEN is set and sent
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend import server
+
+BULK_REQUESTS = [
+    ("GET", "/admin/bookings/export"),
+    ("POST", "/admin/bookings/import")
+]
+
+
+@pytest.mark.parametrize("method,path", BULK_REQUESTS)
+def test_refused_when_no_token_is_configured(monkeypatch, method, path):
+    monkeypatch.setattr(server, "BULK_TOKEN", None)
+    response = TestClient(server.app).request(method, path, headers={"x-bulk-token": ""})
+    assert response.status_code == 403
+
+
+@pytest.mark.parametrize("method,path", BULK_REQUESTS)
+def test_refused_with_wrong_token(monkeypatch, method, path):
+    monkeypatch.setattr(server, "BULK_TOKEN", "secret")
+    response = TestClient(server.app).request(method, path, headers={"x-bulk-token": "guess"})
+    assert response.status_code == 403
+
+
+def test_allowed_with_token(monkeypatch):
+    monkeypatch.setattr(server, "BULK_TOKEN", "secret")
+    response = TestClient(server.app).get("/admin/bookings/export", params={"format": "xml"}, headers={"x-bulk-token": "secret"})
+    # Past the guard: the bad format is what's refused
+    assert response.status_code == 400
@@ -0,0 +1,23 @@
+"""
+Lifecycle tests - lazy construction and the initialized check
+"""
+
+from backend.lifecycle import LazyService, is_initialized
+
+
+class Service:
+    built = 0
+
+    def __init__(self):
+        Service.built += 1
+        self.initialized = "service attribute"
+
+
+def test_is_initialized_does_not_build_the_service():
+    service = LazyService("test_service", Service)
+    assert not is_initialized(service)
+    assert Service.built == 0
+    # Unknown attributes still reach the service, even ones named like the check
+    assert service.initialized == "service attribute"
+    assert is_initialized(service)
+    assert Service.built == 1
@@ -0,0 +1,35 @@
+"""
+Quote tests - quoted prices and dates reach the saved booking
+"""
+
+from backend.bookings import BookingService
+from backend.mock_flights import MockFlightsDatabase
+from backend.quotes import QuoteCache, flight_quote
+
+
+def make_service(tmp_path, quotes: QuoteCache) -> BookingService:
+    return BookingService(db_path=str(tmp_path / "bookings.db"), flights=MockFlightsDatabase(), quotes=quotes)
+
+
+def test_flight_quotes_are_kept_per_travel_date():
+    quotes = QuoteCache()
+    flight = {"id": "F1", "from": {"code": "BLR", "time": "02:15"}, "to": {"code": "JED", "time": "06:00"}, "price": 100}
+    quotes.quote_flights([{**flight, "departure_date": "2026-12-20"}, {**flight, "departure_date": "2027-01-05", "price": 90}])
+    assert quotes.get("flight", "F1", "2026-12-20")["price"] == 100
+    assert quotes.get("flight", "F1", "2027-01-05")["price"] == 90
+    assert quotes.get("flight", "F1", "2027-02-01") is None
+
+
+def test_booking_uses_quote_for_its_own_date(tmp_path):
+    quotes = QuoteCache()
+    service = make_service(tmp_path, quotes)
+    flight = service.flights.get_flight("BLR-JED-001")
+    quotes.put("flight", "BLR-JED-001", {**flight_quote(flight, "2026-12-20"), "price": 1234}, "2026-12-20")
+
+    quoted = service.create_booking("flight", "BLR-JED-001", "+911", travel_date="2026-12-20")
+    assert quoted["total_amount"] == 1234
+
+    other_day = service.create_booking("flight", "BLR-JED-001", "+911", travel_date="2027-01-05")
+    details = service.get_booking_status(other_day["booking_reference"])["booking_details"]
+    assert details["departure"].startswith("2027-01-05")
+    assert other_day["total_amount"] == flight["price"]
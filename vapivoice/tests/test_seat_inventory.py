@@ -0,0 +1,133 @@
+"""
+Seat inventory tests - timer wheel expiry and hold / confirm / release
+"""
+
+import time
+
+from backend.seat_inventory import SeatInventory, TimerWheel, MAX_SEATS_PER_HOLD
+
+
+def make_inventory(seats: int = 5, **kwargs) -> SeatInventory:
+    return SeatInventory(capacity=lambda flight_id: seats if flight_id != "UNKNOWN" else None, **kwargs)
+
+
+# TimerWheel
+
+def test_wheel_fires_at_fractional_deadline():
+    wheel = TimerWheel(now=0)
+    wheel.schedule("h", 100.5)
+    assert wheel.advance(100.2) == []
+    assert wheel.advance(101) == ["h"]
+    assert len(wheel) == 0
+
+
+def test_wheel_fires_at_exact_deadline():
+    wheel = TimerWheel(now=0)
+    wheel.schedule("h", 100.0)
+    assert wheel.advance(99.9) == []
+    assert wheel.advance(100.0) == ["h"]
+
+
+def test_wheel_waits_extra_rotations_for_long_deadlines():
+    wheel = TimerWheel(tick=1.0, slots=8, now=0)
+    wheel.schedule("h", 20.5)
+    assert wheel.advance(5) == []
+    assert wheel.advance(13) == []
+    assert wheel.advance(20.2) == []
+    assert wheel.advance(21) == ["h"]
+
+
+def test_wheel_catches_up_after_falling_behind():
+    wheel = TimerWheel(tick=1.0, slots=8, now=0)
+    wheel.schedule("a", 2.5)
+    wheel.schedule("b", 6.5)
+    assert sorted(wheel.advance(100)) == ["a", "b"]
+
+
+def test_wheel_never_schedules_into_a_passed_slot():
+    wheel = TimerWheel(now=0)
+    wheel.advance(50)
+    wheel.schedule("late", 10)
+    assert wheel.advance(51) == ["late"]
+
+
+def test_wheel_cancel():
+    wheel = TimerWheel(now=0)
+    wheel.schedule("h", 5)
+    wheel.cancel("h")
+    wheel.cancel("missing")
+    assert wheel.advance(10) == []
+    assert len(wheel) == 0
+
+
+# SeatInventory
+
+def test_hold_takes_seats_and_release_gives_them_back():
+    inventory = make_inventory(5)
+    held = inventory.hold("F1", "2026-12-20", seats=2)
+    assert held["success"] and held["seats_left"] == 3
+    assert inventory.availability("F1", "2026-12-20")["seats_held"] == 2
+    assert inventory.release(held["hold_id"]) == {"success": True, "hold_id": held["hold_id"]}
+    assert inventory.availability("F1", "2026-12-20")["seats_available"] == 5
+    assert not inventory.release(held["hold_id"])["success"]
+
+
+def test_hold_rejects_bad_seat_counts_and_unknown_flights():
+    inventory = make_inventory(5)
+    assert not inventory.hold("F1", seats=0)["success"]
+    assert not inventory.hold("F1", seats=MAX_SEATS_PER_HOLD + 1)["success"]
+    assert inventory.hold("UNKNOWN")["error"] == "Flight not found"
+
+
+def test_no_oversell():
+    inventory = make_inventory(3)
+    assert inventory.hold("F1", seats=2)["success"]
+    sold_out = inventory.hold("F1", seats=2)
+    assert not sold_out["success"] and sold_out["seats_left"] == 1
+
+
+def test_confirm_sells_held_seats_once():
+    inventory = make_inventory(5)
+    held = inventory.hold("F1", "2026-12-20", seats=2)
+    sale = inventory.confirm(held["hold_id"], "F1", "2026-12-20", 2)
+    assert sale["success"] and sale["seats"] == 2
+    assert not inventory.confirm(held["hold_id"])["success"]
+    availability = inventory.availability("F1", "2026-12-20")
+    assert (availability["seats_available"], availability["seats_held"], availability["seats_sold"]) == (3, 0, 2)
+
+
+def test_confirm_rejects_mismatched_hold_and_keeps_it():
+    inventory = make_inventory(5)
+    held = inventory.hold("F1", "2026-12-20", seats=1)
+    assert not inventory.confirm(held["hold_id"], "F1", "2026-12-20", 4)["success"]
+    assert not inventory.confirm(held["hold_id"], "F1", "2027-01-05", 1)["success"]
+    assert not inventory.confirm(held["hold_id"], "F2", "2026-12-20", 1)["success"]
+    assert inventory.confirm(held["hold_id"], "F1", "2026-12-20", 1)["success"]
+
+
+def test_confirm_rejects_hold_past_expiry_before_the_wheel_sweeps_it():
+    inventory = make_inventory(5, hold_ttl=0.05)
+    held = inventory.hold("F1", seats=2)
+    time.sleep(0.1)
+    # The wheel's one-second tick hasn't necessarily passed yet
+    assert not inventory.confirm(held["hold_id"])["success"]
+    assert inventory.availability("F1")["seats_available"] == 5
+    assert inventory.stats()["active_holds"] == 0
+
+
+def test_expired_holds_are_released():
+    wheel = TimerWheel(now=time.monotonic())
+    inventory = make_inventory(5, wheel=wheel, hold_ttl=0.5)
+    held = inventory.hold("F1", seats=3)
+    assert inventory.expire_due(time.monotonic() + 2) == 1
+    assert inventory.availability("F1")["seats_available"] == 5
+    assert not inventory.confirm(held["hold_id"])["success"]
+
+
+def test_connection_holds_every_segment():
+    inventory = make_inventory(2)
+    held = inventory.hold("F1+F2", "2026-12-20", seats=2)
+    assert held["success"]
+    assert not inventory.hold("F2", "2026-12-20")["success"]
+    inventory.release(held["hold_id"])
+    assert inventory.hold("F2", "2026-12-20", seats=2)["success"]